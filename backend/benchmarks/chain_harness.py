@@ -0,0 +1,284 @@
+"""Benchmark BlockchainService against a real TraceChain deployment.
+
+Compiles the contracts with Hardhat, spawns a local Hardhat node (or uses
+--rpc-url), deploys TraceChain and drives the service through mint bursts,
+stage updates, token lookups, transaction verification and a mixed
+workload. Results are printed as JSON: throughput, latency percentiles and
+gas per operation.
+
+Usage (from backend/):
+
+    python -m benchmarks.chain_harness --mints 200 --output bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from bson import ObjectId
+from web3 import AsyncWeb3, AsyncHTTPProvider
+
+BLOCKCHAIN_DIR = Path(__file__).resolve().parents[2] / "blockchain"
+ARTIFACT_PATH = BLOCKCHAIN_DIR / "artifacts" / "contracts" / "TraceChain.sol" / "TraceChain.json"
+
+# Account #0 of the default Hardhat node mnemonic; never holds real funds
+HARDHAT_PRIVATE_KEY = "0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d7bf4f2ff80"
+
+class OperationStats:
+    """Latency and gas samples for one operation type"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies: List[float] = []
+        self.gas: List[int] = []
+        self.errors = 0
+        self.elapsed = 0.0
+
+    async def record(self, call: Awaitable[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        start = time.perf_counter()
+        try:
+            result = await call
+        except Exception:
+            self.errors += 1
+            return None
+        self.latencies.append((time.perf_counter() - start) * 1000)
+
+        if isinstance(result, dict):
+            if result.get("success") is False or result.get("verified") is False:
+                self.errors += 1
+            gas = result.get("gas_per_batch") or result.get("gas_used")
+            if gas:
+                self.gas.append(gas)
+        return result
+
+    def summary(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+        count = len(latencies)
+
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(count - 1, int(p * count))], 2)
+
+        return {
+            "count": count,
+            "errors": self.errors,
+            "elapsed_s": round(self.elapsed, 3),
+            "throughput_per_s": round(count / self.elapsed, 1) if self.elapsed else None,
+            "latency_ms": {
+                "p50": percentile(0.50),
+                "p95": percentile(0.95),
+                "p99": percentile(0.99),
+                "max": round(latencies[-1], 2) if latencies else None
+            },
+            "gas": {
+                "mean": round(sum(self.gas) / len(self.gas)) if self.gas else None,
+                "total": sum(self.gas)
+            }
+        }
+
+async def run_phase(stats: OperationStats, calls: List[Callable[[], Awaitable]], concurrency: int):
+    """Run calls with bounded concurrency and record the phase duration"""
+    slots = asyncio.Semaphore(concurrency)
+
+    async def run(call):
+        async with slots:
+            return await stats.record(call())
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*[run(call) for call in calls])
+    stats.elapsed += time.perf_counter() - start
+    return results
+
+def compile_contracts():
+    subprocess.run(["npx", "hardhat", "compile", "--quiet"], cwd=BLOCKCHAIN_DIR, check=True)
+
+async def spawn_hardhat_node(port: int) -> subprocess.Popen:
+    process = subprocess.Popen(
+        ["npx", "hardhat", "node", "--port", str(port)],
+        cwd=BLOCKCHAIN_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+
+    w3 = AsyncWeb3(AsyncHTTPProvider(f"http://127.0.0.1:{port}"))
+    for _ in range(120):
+        if await w3.is_connected():
+            return process
+        await asyncio.sleep(0.5)
+
+    process.terminate()
+    raise RuntimeError("Hardhat node did not start")
+
+async def deploy(rpc_url: str) -> str:
+    """Deploy TraceChain and register the signer as a verified producer"""
+    w3 = AsyncWeb3(AsyncHTTPProvider(rpc_url))
+    account = w3.eth.account.from_key(HARDHAT_PRIVATE_KEY)
+    artifact = json.loads(ARTIFACT_PATH.read_text())
+
+    async def send(function) -> Any:
+        transaction = await function.build_transaction({
+            "from": account.address,
+            "nonce": await w3.eth.get_transaction_count(account.address, "pending")
+        })
+        signed = account.sign_transaction(transaction)
+        tx_hash = await w3.eth.send_raw_transaction(signed.rawTransaction)
+        return await w3.eth.wait_for_transaction_receipt(tx_hash)
+
+    factory = w3.eth.contract(abi=artifact["abi"], bytecode=artifact["bytecode"])
+    receipt = await send(factory.constructor())
+    contract = w3.eth.contract(address=receipt.contractAddress, abi=artifact["abi"])
+
+    await send(contract.functions.registerProducer("Benchmark Farm", "Local Hardhat"))
+    await send(contract.functions.verifyProducer(account.address))
+    return receipt.contractAddress
+
+def make_batch(index: int) -> Dict[str, Any]:
+    return {
+        "_id": ObjectId(),
+        "product_type": random.choice(["Organic Tomatoes", "Carrots", "Lettuce", "Apples"]),
+        "quantity": random.randint(50, 1000),
+        "harvest_date": datetime.utcnow(),
+        "location": f"Field {index % 20}, Green Valley Farm"
+    }
+
+async def run_benchmark(args) -> Dict[str, Any]:
+    node = None
+    if not args.skip_compile:
+        compile_contracts()
+    if args.rpc_url:
+        rpc_url = args.rpc_url
+    else:
+        node = await spawn_hardhat_node(args.port)
+        rpc_url = f"http://127.0.0.1:{args.port}"
+
+    try:
+        contract_address = await deploy(rpc_url)
+
+        # BlockchainService reads its configuration from the environment
+        os.environ.update({
+            "RPC_URL": rpc_url,
+            "CONTRACT_ADDRESS": contract_address,
+            "CONTRACT_ABI_PATH": str(ARTIFACT_PATH),
+            "PRIVATE_KEY": HARDHAT_PRIVATE_KEY,
+            "TX_RECEIPT_POLL_INTERVAL": "0.05",
+            "MINT_BATCH_SIZE": str(args.mint_batch_size)
+        })
+        from services.blockchain_service import BlockchainService
+
+        service = BlockchainService()
+        await service.connect()
+        try:
+            return await run_workloads(service, args, contract_address)
+        finally:
+            await service.close()
+    finally:
+        if node:
+            node.terminate()
+            node.wait()
+
+async def run_workloads(service, args, contract_address: str) -> Dict[str, Any]:
+    stats = {name: OperationStats(name) for name in [
+        "mint", "stage_update", "token_lookup", "token_lookup_multi", "verify_transaction"
+    ]}
+
+    # Mint burst: all requests arrive at once and are grouped by the aggregator
+    batches = [make_batch(i) for i in range(args.mints)]
+    mints = await run_phase(
+        stats["mint"],
+        [lambda b=b: service.mint_batch_nft(b) for b in batches],
+        concurrency=args.mints
+    )
+    minted = [m for m in mints if m and m.get("success")]
+    token_ids = [m["token_id"] for m in minted]
+    if not token_ids:
+        raise RuntimeError("No batches were minted")
+
+    await run_phase(
+        stats["stage_update"],
+        [
+            lambda t=t: service.update_stage(t, "processed", "Processing Center", "Processor", "Washed and packed")
+            for t in token_ids[:args.stage_updates]
+        ],
+        concurrency=args.concurrency
+    )
+
+    async def cold_lookup(token_id: int):
+        service.token_cache.invalidate(token_id)
+        return await service.get_token_info(token_id)
+
+    await run_phase(
+        stats["token_lookup"],
+        [lambda t=t: cold_lookup(t) for t in random.choices(token_ids, k=args.lookups)],
+        concurrency=args.concurrency
+    )
+
+    async def multi_lookup():
+        service.token_cache.clear()
+        return await service.get_tokens_info(random.sample(token_ids, min(50, len(token_ids))))
+
+    await run_phase(stats["token_lookup_multi"], [multi_lookup] * 20, concurrency=1)
+
+    await run_phase(
+        stats["verify_transaction"],
+        [lambda m=m: service.verify_transaction(m["transaction_hash"]) for m in random.choices(minted, k=args.lookups)],
+        concurrency=args.concurrency
+    )
+
+    # Mixed traffic: mostly reads with a steady trickle of writes
+    mixed = OperationStats("mixed")
+    operations = []
+    for i in range(args.mixed_ops):
+        roll = random.random()
+        if roll < 0.1:
+            operations.append(lambda i=i: service.mint_batch_nft(make_batch(args.mints + i)))
+        elif roll < 0.3:
+            operations.append(lambda: service.update_stage(
+                random.choice(token_ids), "shipped", "Distribution Hub", "Carrier", "Shipped to retailer"
+            ))
+        elif roll < 0.8:
+            operations.append(lambda: service.get_token_info(random.choice(token_ids)))
+        else:
+            operations.append(lambda: service.verify_transaction(random.choice(minted)["transaction_hash"]))
+    await run_phase(mixed, operations, concurrency=args.concurrency)
+
+    return {
+        "environment": {
+            "rpc_url": service.w3.provider.endpoint_uri,
+            "contract_address": contract_address,
+            "mint_batch_size": args.mint_batch_size,
+            "concurrency": args.concurrency,
+            "python": sys.version.split()[0]
+        },
+        "operations": {name: s.summary() for name, s in {**stats, "mixed": mixed}.items()}
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rpc-url", help="Use a running node instead of spawning Hardhat")
+    parser.add_argument("--port", type=int, default=8546)
+    parser.add_argument("--skip-compile", action="store_true")
+    parser.add_argument("--mints", type=int, default=200)
+    parser.add_argument("--mint-batch-size", type=int, default=20)
+    parser.add_argument("--stage-updates", type=int, default=100)
+    parser.add_argument("--lookups", type=int, default=500)
+    parser.add_argument("--mixed-ops", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_benchmark(args))
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output)
+
+if __name__ == "__main__":
+    main()
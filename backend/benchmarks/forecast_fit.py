@@ -0,0 +1,70 @@
+"""Time the vectorized forecast fit over many product price series.
+
+Generates --series synthetic daily price series (random trend, weekly
+wobble, noise and missing days), fits them all with the forecast engine's
+damped Holt model, and compares the held-out --horizon days against a
+naive last-price forecast. Prints timings and errors as JSON.
+
+Usage (from backend/):
+
+    python -m benchmarks.forecast_fit --series 10000
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from services.forecasting import ALPHAS, BETAS, fill_gaps, fit_holt, project
+
+def synthetic(series: int, days: int, rng) -> np.ndarray:
+    steps = np.arange(days)
+    base = rng.uniform(2, 10, (series, 1))
+    drift = rng.normal(0, 0.002, (series, 1))
+    wobble = 0.02 * np.sin(2 * np.pi * steps / 7 + rng.uniform(0, 7, (series, 1)))
+    noise = np.cumsum(rng.normal(0, 0.01, (series, days)), axis=1)
+    return base * np.exp(drift * steps + wobble + noise)
+
+def main(args):
+    rng = np.random.default_rng(args.seed)
+    prices = synthetic(args.series, args.days + args.horizon, rng)
+    history, future = prices[:, :args.days].copy(), prices[:, args.days:]
+    history[rng.random(history.shape) < args.missing] = np.nan
+    history[:, 0] = prices[:, 0]
+
+    start = time.perf_counter()
+    filled = fill_gaps(history)
+    fill_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fitted = fit_holt(filled)
+    fit_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    forecasts = np.array([
+        project(fitted["level"][i], fitted["trend"][i], fitted["sigma"][i], args.horizon)[0]
+        for i in range(args.series)
+    ])
+    project_s = time.perf_counter() - start
+
+    naive = np.repeat(filled[:, -1:], args.horizon, axis=1)
+    print(json.dumps({
+        "series": args.series,
+        "days": args.days,
+        "grid_points": len(ALPHAS) * len(BETAS),
+        "fill_ms": round(fill_s * 1000, 1),
+        "fit_ms": round(fit_s * 1000, 1),
+        "fit_us_per_series": round(fit_s / args.series * 1e6, 1),
+        "project_ms": round(project_s * 1000, 1),
+        "mape_holt": round(float(np.mean(np.abs(forecasts - future) / future)) * 100, 2),
+        "mape_last_price": round(float(np.mean(np.abs(naive - future) / future)) * 100, 2)
+    }, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--series", type=int, default=10000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--horizon", type=int, default=30)
+    parser.add_argument("--missing", type=float, default=0.1, help="Fraction of days without a price")
+    parser.add_argument("--seed", type=int, default=7)
+    main(parser.parse_args())
@@ -0,0 +1,88 @@
+"""Time get_price_history over five years of stored prices.
+
+Seeds --observations-per-day observed prices per day for --years years
+into a scratch database (DATABASE_NAME with a _bench suffix, dropped
+afterwards), then times daily, weekly and monthly history requests with a
+cold and a warm rollup cache. Prints the timings as JSON.
+
+Usage (from backend/, with MONGODB_URL pointing at a MongoDB 5.0+ server):
+
+    python -m benchmarks.price_history --years 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from database.connection import connect_to_mongo, close_mongo_connection, db
+
+def observations(product: str, years: int, per_day: int):
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    price = 5.0
+    for day in range(years * 365, -1, -1):
+        for i in range(per_day):
+            price = max(0.5, price * (1 + random.uniform(-0.02, 0.02)))
+            yield {
+                "product_type": product,
+                "price": round(price, 2),
+                "volume": round(random.uniform(1, 50), 1),
+                "observed_at": today - timedelta(days=day) + timedelta(hours=8 + i * 8 / per_day)
+            }
+
+async def timed(call, repeat: int) -> float:
+    """Median milliseconds per call"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await call()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return round(samples[len(samples) // 2], 2)
+
+async def main(args):
+    os.environ["DATABASE_NAME"] = os.getenv("DATABASE_NAME", "agritrust") + "_bench"
+    await connect_to_mongo()
+    from services.price_store import price_store
+    from services.pricing_service import PricingService
+    pricing_service = PricingService()
+
+    try:
+        start = time.perf_counter()
+        seeded = list(observations("bench-product", args.years, args.observations_per_day))
+        for i in range(0, len(seeded), 10000):
+            await price_store.ingest(seeded[i:i + 10000])
+        ingest_s = time.perf_counter() - start
+
+        period = f"{args.years}y"
+        report = {
+            "observations": len(seeded),
+            "ingest_s": round(ingest_s, 2),
+            "period": period
+        }
+        for interval in ("daily", "weekly", "monthly"):
+            async def history():
+                return await pricing_service.get_price_history("bench-product", period, interval)
+
+            async def cold_history():
+                price_store.cache.clear()
+                return await history()
+
+            report[interval] = {
+                "bars": len((await history())["price_history"]),
+                "cold_ms": await timed(cold_history, args.repeat),
+                "warm_ms": await timed(history, args.repeat)
+            }
+        print(json.dumps(report, indent=2))
+    finally:
+        await db.client.drop_database(db.database.name)
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--observations-per-day", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
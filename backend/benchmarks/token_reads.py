@@ -0,0 +1,78 @@
+"""Compare sequential and batched token reads against a local node.
+
+Usage (from backend/, with RPC_URL and CONTRACT_ADDRESS pointing at a node
+that already has at least --tokens minted tokens):
+
+    python -m benchmarks.token_reads --tokens 50
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from aiohttp import TraceConfig
+
+from services.blockchain_service import BlockchainService
+
+def count_requests(service: BlockchainService) -> dict:
+    """Count HTTP round trips made through the service's pooled session"""
+    counter = {"requests": 0}
+
+    async def on_request_start(session, context, params):
+        counter["requests"] += 1
+
+    trace = TraceConfig()
+    trace.on_request_start.append(on_request_start)
+    trace.freeze()
+    service.session.trace_configs.append(trace)
+    return counter
+
+async def sequential(service: BlockchainService, token_ids):
+    for token_id in token_ids:
+        await service.contract.functions.ownerOf(token_id).call()
+        await service.contract.functions.getBatchInfo(token_id).call()
+
+async def batched(service: BlockchainService, token_ids):
+    service.token_cache.clear()
+    await service.get_tokens_info(token_ids)
+
+async def measure(name, fn, service, counter, token_ids, repeat):
+    latencies = []
+    counter["requests"] = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn(service, token_ids)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    latencies.sort()
+    return {
+        "method": name,
+        "tokens": len(token_ids),
+        "round_trips": counter["requests"] // repeat,
+        "latency_ms_p50": round(latencies[len(latencies) // 2], 2),
+        "latency_ms_max": round(latencies[-1], 2)
+    }
+
+async def main(token_count: int, repeat: int):
+    service = BlockchainService()
+    if not service.contract:
+        raise SystemExit("CONTRACT_ADDRESS and compiled artifacts are required")
+
+    await service.connect()
+    try:
+        counter = count_requests(service)
+        token_ids = list(range(1, token_count + 1))
+        results = [
+            await measure("sequential", sequential, service, counter, token_ids, repeat),
+            await measure("json_rpc_batch", batched, service, counter, token_ids, repeat)
+        ]
+        print(json.dumps(results, indent=2))
+    finally:
+        await service.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tokens", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.tokens, args.repeat))
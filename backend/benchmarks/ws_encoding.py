@@ -0,0 +1,109 @@
+"""Measure WebSocket bandwidth and CPU for a burst of batch_updated events.
+
+Pushes --events messages to one simulated client through ConnectionManager
+for every combination of encoding (JSON, MessagePack), coalescing (off,
+--coalesce-ms / WS_COALESCE_MAX) and permessage-deflate (off, on). Deflate
+is applied the way the websockets library does it: one raw DEFLATE stream
+per connection with context takeover, flushed at each frame.
+
+Usage (from backend/):
+
+    python -m benchmarks.ws_encoding --events 10000
+"""
+import argparse
+import asyncio
+import json
+import time
+import zlib
+
+from websocket.manager import ConnectionManager
+
+class MeasuringWebSocket:
+    def __init__(self, deflate: bool, expected: int):
+        self.compressor = zlib.compressobj(wbits=-15) if deflate else None
+        self.expected = expected
+        self.frames = 0
+        self.messages = 0
+        self.bytes = 0
+        self.decode_cpu = 0.0
+        self.done = asyncio.Event()
+
+    async def accept(self):
+        pass
+
+    async def close(self, code: int = 1000):
+        pass
+
+    async def send_text(self, data: str):
+        self._count(data.encode(), json.loads)
+
+    async def send_bytes(self, data: bytes):
+        import msgpack
+        self._count(data, msgpack.unpackb)
+
+    def _count(self, payload: bytes, decode):
+        # Decoding only counts messages; it is client work, so not charged
+        start = time.process_time()
+        message = decode(payload)
+        self.decode_cpu += time.process_time() - start
+
+        if self.compressor:
+            # The trailing 0x00 0x00 0xff 0xff of each flush is not sent
+            payload = self.compressor.compress(payload) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+            payload = payload[:-4]
+        self.frames += 1
+        self.bytes += len(payload)
+        self.messages += len(message["messages"]) if message.get("type") == "batch" else 1
+        if self.messages >= self.expected:
+            self.done.set()
+
+def event(i: int) -> dict:
+    return {
+        "type": "batch_updated",
+        "batch_id": f"6523f0c2a1b2c3d4e5f6{i:04x}",
+        "old_stage": "processed",
+        "new_stage": "shipped",
+        "location": "Distribution Hub, Fresno CA"
+    }
+
+async def run(encoding: str, coalesce_ms: int, deflate: bool, events: int) -> dict:
+    manager = ConnectionManager()
+    manager.max_queue = events
+    websocket = MeasuringWebSocket(deflate, events)
+    await manager.connect(websocket, "producer-1", "conn-1", encoding=encoding, coalesce_ms=coalesce_ms)
+
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    for i in range(events):
+        await manager.send_personal_message(event(i), "producer-1")
+        if i % 100 == 0:
+            # Let the writer run as it would between requests
+            await asyncio.sleep(0)
+    await websocket.done.wait()
+    cpu = time.process_time() - cpu - websocket.decode_cpu
+    wall = time.perf_counter() - wall
+    manager.disconnect("producer-1", "conn-1")
+
+    return {
+        "encoding": encoding,
+        "coalesce_ms": coalesce_ms,
+        "deflate": deflate,
+        "frames": websocket.frames,
+        "kb_per_10k_events": round(websocket.bytes / events * 10000 / 1024, 1),
+        "cpu_ms_per_10k_events": round(cpu / events * 10000 * 1000, 1),
+        "wall_ms": round(wall * 1000, 1)
+    }
+
+async def main(args):
+    results = []
+    for encoding in ("json", "msgpack"):
+        for coalesce_ms in (0, args.coalesce_ms):
+            for deflate in (False, True):
+                results.append(await run(encoding, coalesce_ms, deflate, args.events))
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=10000)
+    parser.add_argument("--coalesce-ms", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,92 @@
+"""Measure WebSocket broadcast fan-out with in-process simulated clients.
+
+Compares the previous inline fan-out (json.dumps and an awaited send per
+connection) against ConnectionManager's serialize-once, per-connection
+queue fan-out. A fraction of clients are slow to show head-of-line
+blocking.
+
+Usage (from backend/):
+
+    python -m benchmarks.ws_fanout --connections 50000 --messages 5
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from websocket.manager import ConnectionManager
+
+MESSAGE = {
+    "type": "public_batch_update",
+    "batch_id": "6523f0c2a1b2c3d4e5f60718",
+    "stage": "shipped"
+}
+
+class SimulatedWebSocket:
+    def __init__(self, delay: float, stats: dict):
+        self.delay = delay
+        self.stats = stats
+
+    async def accept(self):
+        pass
+
+    async def close(self, code: int = 1000):
+        pass
+
+    async def send_text(self, data: str):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.stats["delivered"] += 1
+        if self.stats["delivered"] == self.stats["expected"]:
+            self.stats["done"].set()
+
+def make_sockets(count: int, slow_every: int, slow_delay: float, stats: dict):
+    return [
+        SimulatedWebSocket(slow_delay if slow_every and i % slow_every == 0 else 0, stats)
+        for i in range(count)
+    ]
+
+async def inline_fanout(sockets, messages: int, stats: dict) -> dict:
+    start = time.perf_counter()
+    for _ in range(messages):
+        for websocket in sockets:
+            await websocket.send_text(json.dumps(MESSAGE))
+    call_ms = (time.perf_counter() - start) * 1000
+    return {"broadcast_call_ms": round(call_ms / messages, 2), "delivered_all_ms": round(call_ms, 2)}
+
+async def queued_fanout(sockets, messages: int, stats: dict) -> dict:
+    manager = ConnectionManager()
+    for i, websocket in enumerate(sockets):
+        await manager.connect(websocket, f"user-{i % 1000}", f"conn-{i}")
+
+    start = time.perf_counter()
+    for _ in range(messages):
+        await manager.broadcast(MESSAGE)
+    call_ms = (time.perf_counter() - start) * 1000
+    await stats["done"].wait()
+    delivered_ms = (time.perf_counter() - start) * 1000
+
+    for connection_id in list(manager.active_connections):
+        manager.disconnect(manager.connection_users[connection_id], connection_id)
+    return {"broadcast_call_ms": round(call_ms / messages, 2), "delivered_all_ms": round(delivered_ms, 2)}
+
+async def run(name, fanout, args) -> dict:
+    stats = {"delivered": 0, "expected": args.connections * args.messages, "done": asyncio.Event()}
+    sockets = make_sockets(args.connections, args.slow_every, args.slow_delay, stats)
+    result = await fanout(sockets, args.messages, stats)
+    return {"method": name, "connections": args.connections, "messages": args.messages, **result}
+
+async def main(args):
+    results = [
+        await run("inline", inline_fanout, args),
+        await run("serialize_once_queued", queued_fanout, args)
+    ]
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connections", type=int, default=50000)
+    parser.add_argument("--messages", type=int, default=5)
+    parser.add_argument("--slow-every", type=int, default=1000, help="Every Nth client is slow (0 for none)")
+    parser.add_argument("--slow-delay", type=float, default=0.02, help="Seconds per send for slow clients")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,113 @@
+"""Load test ConnectionManager with 100k simulated local WebSocket clients.
+
+Connects --clients in-process sockets, keeps most of them talking while a
+--silent fraction goes quiet, and lets the timer wheel ping and reap them.
+Reports connect throughput, memory per connection, the cost of each wheel
+tick, broadcast latency and the manager's own metrics as JSON.
+
+Usage (from backend/):
+
+    python -m benchmarks.ws_load --clients 100000
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import time
+
+class SimulatedWebSocket:
+    __slots__ = ("received",)
+
+    def __init__(self):
+        self.received = 0
+
+    async def accept(self):
+        pass
+
+    async def close(self, code: int = 1000):
+        pass
+
+    async def send_text(self, data: str):
+        self.received += 1
+
+async def main(args):
+    # Short intervals so reaping is observable within the run
+    os.environ["WS_HEARTBEAT_INTERVAL"] = str(args.heartbeat)
+    os.environ["WS_IDLE_TIMEOUT"] = str(args.idle_timeout)
+    os.environ["WS_TIMER_TICK"] = str(args.tick)
+    from websocket.manager import ConnectionManager, process_rss
+
+    if args.gc_threshold:
+        # With 100k+ long-lived objects, full collections dominate bursts
+        gc.set_threshold(args.gc_threshold, 50, 100)
+
+    manager = ConnectionManager()
+    await manager.start()
+
+    # Time each wheel tick
+    tick_ms = []
+    advance = manager.timers.advance
+
+    def timed_advance():
+        start = time.perf_counter()
+        advance()
+        tick_ms.append((time.perf_counter() - start) * 1000)
+
+    manager.timers.advance = timed_advance
+
+    rss_before = process_rss()
+    start = time.perf_counter()
+    connections = []
+    for i in range(args.clients):
+        connections.append(await manager.connect(SimulatedWebSocket(), f"user-{i % args.users}", f"conn-{i}"))
+    connect_s = time.perf_counter() - start
+    rss_connected = process_rss()
+
+    start = time.perf_counter()
+    await manager.broadcast({"type": "public_batch_update", "batch_id": "load-test", "stage": "shipped"})
+    broadcast_ms = (time.perf_counter() - start) * 1000
+    while sum(1 for c in connections if c.websocket.received) < args.clients:
+        await asyncio.sleep(0.01)
+    delivered_ms = (time.perf_counter() - start) * 1000
+
+    silent = int(args.clients * args.silent)
+    active = connections[silent:]
+    for connection in connections:
+        connection.touch()
+
+    # Active clients send something every half heartbeat; silent ones never do
+    deadline = time.monotonic() + args.idle_timeout + args.heartbeat * 1.5
+    while time.monotonic() < deadline:
+        for connection in active:
+            connection.touch()
+        await asyncio.sleep(args.heartbeat / 2)
+    metrics = manager.metrics()
+
+    tick_ms.sort()
+    report = {
+        "clients": args.clients,
+        "silent_clients": silent,
+        "connect_per_s": round(args.clients / connect_s),
+        "rss_bytes_per_connection": (rss_connected - rss_before) // args.clients,
+        "reaped": manager.reaped,
+        "wheel_ticks": len(tick_ms),
+        "tick_ms_p50": round(tick_ms[len(tick_ms) // 2], 3) if tick_ms else None,
+        "tick_ms_max": round(tick_ms[-1], 3) if tick_ms else None,
+        "broadcast_call_ms": round(broadcast_ms, 2),
+        "broadcast_delivered_ms": round(delivered_ms, 2),
+        "metrics": metrics
+    }
+    await manager.stop()
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=100000)
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--silent", type=float, default=0.1, help="Fraction of clients that go quiet")
+    parser.add_argument("--heartbeat", type=float, default=2.0)
+    parser.add_argument("--idle-timeout", type=float, default=5.0)
+    parser.add_argument("--tick", type=float, default=0.1)
+    parser.add_argument("--gc-threshold", type=int, help="Generation 0 GC threshold to use")
+    asyncio.run(main(parser.parse_args()))
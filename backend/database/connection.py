@@ -1,6 +1,7 @@
 import os
 from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo.errors import ConnectionFailure
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import ConnectionFailure, CollectionInvalid, OperationFailure
 import logging
 
 logger = logging.getLogger(__name__)
@@ -24,10 +25,119 @@ async def connect_to_mongo():
         await db.client.admin.command('ping')
         logger.info(f"Connected to MongoDB at {mongodb_url}")
         
+        await init_collections()
+        
     except ConnectionFailure as e:
         logger.error(f"Could not connect to MongoDB: {e}")
         raise
 
+MIN_SERVER_VERSION = (5, 0)
+
+QUALITY_TIMESERIES = {
+    "timeField": "assessment_date",
+    "metaField": "batch_id",
+    "granularity": "hours"
+}
+
+async def init_collections():
+    """Create special collections and indexes used by the API
+
+    Needs MongoDB 5.0 or later, for time-series collections and the
+    $dateTrunc stage of the quality history.
+    """
+    database = db.database
+    
+    server_version = tuple((await db.client.server_info())["versionArray"][:2])
+    if server_version < MIN_SERVER_VERSION:
+        raise RuntimeError(
+            f"MongoDB {'.'.join(map(str, server_version))} is not supported; "
+            f"{'.'.join(map(str, MIN_SERVER_VERSION))} or later is required"
+        )
+    
+    # Quality assessments are append-only readings per batch, so they live in
+    # a time-series collection bucketed by batch_id
+    try:
+        await database.create_collection("quality_assessments", timeseries=QUALITY_TIMESERIES)
+        logger.info("Created time-series collection quality_assessments")
+    except CollectionInvalid:
+        # Deployments from before the time-series change still have a
+        # regular collection, which create_collection leaves alone
+        existing = await database.list_collections(filter={"name": "quality_assessments"}).to_list(None)
+        if existing and existing[0].get("type") != "timeseries":
+            logger.warning(
+                "quality_assessments is a regular collection, not a time-series one; "
+                "convert it with `python -m database.migrate_quality_assessments`"
+            )
+    
+    await database.quality_assessments.create_index(
+        [("batch_id", ASCENDING), ("assessment_date", DESCENDING)]
+    )
+    
+    # Mirror of on-chain state maintained by the chain indexer
+    await database.chain_tokens.create_index("token_id", unique=True)
+    await database.chain_tokens.create_index("batch_id")
+    await database.chain_tokens.create_index([("producer", ASCENDING), ("token_id", ASCENDING)])
+    await database.chain_tokens.create_index([("product_type", ASCENDING), ("token_id", ASCENDING)])
+    await database.chain_tokens.create_index([("current_stage", ASCENDING), ("token_id", ASCENDING)])
+    await database.chain_events.create_index(
+        [("transaction_hash", ASCENDING), ("log_index", ASCENDING)], unique=True
+    )
+    await database.chain_events.create_index([("token_id", ASCENDING), ("block_number", ASCENDING)])
+    await database.chain_events.create_index("block_number")
+    await database.chain_producers.create_index("address", unique=True)
+    
+    # Transaction outbox
+    await database.tx_outbox.create_index("idempotency_key", unique=True)
+    await database.tx_outbox.create_index([("status", ASCENDING), ("next_attempt_at", ASCENDING)])
+    await database.tx_outbox.create_index([("batch_id", ASCENDING), ("created_at", DESCENDING)])
+    
+    # Merkle anchoring of supply chain events
+    await database.batches.create_index("supply_chain.timestamp")
+    await database.anchors.create_index("period_end")
+    await database.anchors.create_index("root", unique=True)
+    await database.anchor_proofs.create_index(
+        [("batch_id", ASCENDING), ("event_index", ASCENDING)], unique=True
+    )
+    
+    # Notification inbox; read notifications expire after NOTIFICATION_READ_TTL_DAYS
+    await database.notifications.create_index([("user_id", ASCENDING), ("_id", DESCENDING)])
+    read_ttl = int(os.getenv("NOTIFICATION_READ_TTL_DAYS", "30")) * 86400
+    try:
+        await database.notifications.create_index("read_at", expireAfterSeconds=read_ttl)
+    except OperationFailure:
+        # The TTL changed since the index was created
+        await database.command(
+            "collMod", "notifications",
+            index={"keyPattern": {"read_at": 1}, "expireAfterSeconds": read_ttl}
+        )
+    
+    # Observed prices and their daily OHLC/VWAP rollups
+    try:
+        await database.create_collection(
+            "price_observations",
+            timeseries={
+                "timeField": "observed_at",
+                "metaField": "product_type",
+                "granularity": "hours"
+            }
+        )
+        logger.info("Created time-series collection price_observations")
+    except CollectionInvalid:
+        pass
+    
+    await database.price_observations.create_index(
+        [("product_type", ASCENDING), ("observed_at", ASCENDING)]
+    )
+    await database.price_daily.create_index(
+        [("product_type", ASCENDING), ("date", ASCENDING)], unique=True
+    )
+    
+    # Price alerts; active ones are loaded into memory at startup and new
+    # ones are picked up by created_at
+    await database.price_alerts.create_index([("status", ASCENDING), ("product_type", ASCENDING)])
+    await database.price_alerts.create_index([("status", ASCENDING), ("created_at", ASCENDING)])
+    await database.price_alerts.create_index([("user_id", ASCENDING), ("_id", DESCENDING)])
+
 async def close_mongo_connection():
     """Close database connection"""
     if db.client:
@@ -0,0 +1,70 @@
+"""Convert a regular quality_assessments collection to a time-series one.
+
+Deployments created before quality assessments moved to a time-series
+collection keep the regular one, since MongoDB cannot convert a collection
+in place or rename a time-series collection. This renames the old
+collection to quality_assessments_legacy, creates the time-series
+collection and copies every assessment across in batches. The legacy
+collection is left for the operator to drop once the copy is checked.
+
+Stop the API first, so no assessments are written during the copy. If the
+copy is interrupted, drop quality_assessments and run the script again;
+it resumes from the legacy collection.
+
+Usage (from backend/, with MONGODB_URL pointing at a MongoDB 5.0+ server):
+
+    python -m database.migrate_quality_assessments
+"""
+import argparse
+import asyncio
+
+from pymongo import ASCENDING, DESCENDING
+from database.connection import QUALITY_TIMESERIES, connect_to_mongo, close_mongo_connection, db
+
+async def collection_type(name: str):
+    existing = await db.database.list_collections(filter={"name": name}).to_list(None)
+    return existing[0].get("type", "collection") if existing else None
+
+async def main(args):
+    await connect_to_mongo()
+    try:
+        database = db.database
+        current = await collection_type("quality_assessments")
+        legacy = await collection_type("quality_assessments_legacy")
+
+        if current == "timeseries" and legacy is None:
+            print("quality_assessments is already a time-series collection")
+            return
+        if current == "timeseries":
+            # An interrupted copy; start it over
+            await database.quality_assessments.drop()
+        elif current is not None:
+            if legacy is not None:
+                raise SystemExit("Both quality_assessments and quality_assessments_legacy exist; resolve by hand")
+            await database.quality_assessments.rename("quality_assessments_legacy")
+
+        await database.create_collection("quality_assessments", timeseries=QUALITY_TIMESERIES)
+        await database.quality_assessments.create_index(
+            [("batch_id", ASCENDING), ("assessment_date", DESCENDING)]
+        )
+
+        copied = 0
+        batch = []
+        async for document in database.quality_assessments_legacy.find().sort("_id", 1):
+            batch.append(document)
+            if len(batch) >= args.batch_size:
+                await database.quality_assessments.insert_many(batch, ordered=False)
+                copied += len(batch)
+                batch = []
+        if batch:
+            await database.quality_assessments.insert_many(batch, ordered=False)
+            copied += len(batch)
+
+        print(f"Copied {copied} assessments; drop quality_assessments_legacy once checked")
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    asyncio.run(main(parser.parse_args()))
@@ -8,7 +8,11 @@ from dotenv import load_dotenv
 
 from database.connection import connect_to_mongo, close_mongo_connection
 from routers import producers, batches, quality, fairness, pricing, blockchain, analytics, websocket
-from routers import certifications, qr
+from routers import certifications, qr, notifications
+from services.notification_buffer import notification_buffer
+from services.price_alerts import price_alerts
+from services.forecasting import forecast_engine
+from services.price_feed import price_feed
 
 load_dotenv()
 
@@ -16,8 +20,25 @@ load_dotenv()
 async def lifespan(app: FastAPI):
     # Startup
     await connect_to_mongo()
+    await websocket.manager.start()
+    notification_buffer.start()
+    await price_alerts.start()
+    forecast_engine.start()
+    await blockchain.blockchain_service.connect()
+    blockchain.chain_indexer.start()
+    await blockchain.tx_outbox.start()
+    blockchain.anchoring_service.start()
     yield
     # Shutdown
+    await blockchain.anchoring_service.stop()
+    await blockchain.tx_outbox.stop()
+    await blockchain.chain_indexer.stop()
+    await blockchain.blockchain_service.close()
+    await forecast_engine.stop()
+    await price_alerts.stop()
+    await price_feed.stop()
+    await notification_buffer.stop()
+    await websocket.manager.stop()
     await close_mongo_connection()
 
 app = FastAPI(
@@ -47,6 +68,7 @@ app.include_router(analytics.router, prefix="/api/v1/analytics", tags=["analytic
 app.include_router(websocket.router, prefix="/ws", tags=["websocket"])
 app.include_router(certifications.router, prefix="/api/v1/certifications", tags=["certifications"])
 app.include_router(qr.router, prefix="/api/v1/qr", tags=["qr-codes"])
+app.include_router(notifications.router, prefix="/api/v1/notifications", tags=["notifications"])
 
 @app.get("/")
 async def root():
@@ -62,5 +84,7 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8000,
         reload=True,
-        log_level="info"
+        log_level="info",
+        # Negotiated per connection; clients that don't offer it get plain frames
+        ws_per_message_deflate=os.getenv("WS_PER_MESSAGE_DEFLATE", "true").lower() == "true"
     )
\ No newline at end of file
@@ -0,0 +1,18 @@
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+from datetime import datetime
+
+class PriceAlertCreate(BaseModel):
+    user_id: str
+    product_type: str = Field(..., min_length=1)
+    direction: Literal["above", "below"]
+    threshold: float = Field(..., gt=0)
+
+class PriceObservation(BaseModel):
+    product_type: str = Field(..., min_length=1)
+    price: float = Field(..., gt=0)
+    volume: float = Field(1.0, gt=0)
+    observed_at: Optional[datetime] = None
+
+class PriceObservationBatch(BaseModel):
+    observations: List[PriceObservation] = Field(..., min_length=1, max_length=10000)
@@ -43,4 +43,26 @@ class QualityAssessment(QualityAssessmentBase):
                     "recommendations": ["Store in cool, dry place"]
                 }
             }
-        }
\ No newline at end of file
+        }
+
+class MetricRange(BaseModel):
+    min: float
+    avg: float
+    max: float
+
+class QualityHistoryBucket(BaseModel):
+    bucket_start: datetime
+    assessments: int
+    overall_score: MetricRange
+    freshness: MetricRange
+    appearance: MetricRange
+    size: MetricRange
+    defects: MetricRange
+    ai_confidence: MetricRange
+
+class QualityHistory(BaseModel):
+    batch_id: str
+    interval: str
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    buckets: List[QualityHistoryBucket] = Field(default_factory=list)
@@ -1,10 +1,12 @@
 from fastapi import APIRouter, HTTPException, Depends, status
 from typing import List, Optional
 from bson import ObjectId
+from pymongo import ReturnDocument
 from datetime import datetime
 
 from models.batch import Batch, BatchCreate, BatchUpdate, SupplyChainEvent
 from database.connection import get_database
+from routers.blockchain import tx_outbox
 
 router = APIRouter()
 
@@ -144,9 +146,13 @@ async def update_batch_stage(
     location: str,
     description: str,
     actor: Optional[str] = "System",
+    anchor: bool = False,
     db=Depends(get_database)
 ):
-    """Update batch supply chain stage"""
+    """Update batch supply chain stage
+
+    With anchor=true the new event is also queued for updateStage on-chain.
+    """
     try:
         if not ObjectId.is_valid(batch_id):
             raise HTTPException(status_code=400, detail="Invalid batch ID")
@@ -155,6 +161,12 @@ async def update_batch_stage(
         if not batch:
             raise HTTPException(status_code=404, detail="Batch not found")
         
+        if anchor:
+            if batch.get("token_id") is None:
+                raise HTTPException(status_code=400, detail="Batch has not been minted")
+            if not tx_outbox.enabled:
+                raise HTTPException(status_code=503, detail="Blockchain signer not configured")
+        
         # Create new supply chain event
         new_event = SupplyChainEvent(
             stage=stage,
@@ -165,18 +177,25 @@ async def update_batch_stage(
             verified=True
         )
         
-        # Update batch
-        result = await db.batches.update_one(
+        # Update batch; the returned document is the state right after this
+        # push, so its last event is ours even with concurrent updates
+        updated_batch = await db.batches.find_one_and_update(
             {"_id": ObjectId(batch_id)},
             {
                 "$set": {"current_stage": stage},
                 "$push": {"supply_chain": new_event.dict()}
-            }
+            },
+            return_document=ReturnDocument.AFTER
         )
         
-        if result.matched_count == 0:
+        if not updated_batch:
             raise HTTPException(status_code=404, detail="Batch not found")
         
+        if anchor:
+            event_index = len(updated_batch["supply_chain"]) - 1
+            intent = await tx_outbox.enqueue_stage(updated_batch, event_index)
+            return {"message": "Batch stage updated successfully", "anchor": intent}
+        
         return {"message": "Batch stage updated successfully"}
     except HTTPException:
         raise
@@ -1,16 +1,29 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from typing import Dict, Any
+from fastapi import APIRouter, HTTPException, Depends, Response, status
+from typing import Dict, Any, Optional
 from bson import ObjectId
 
 from database.connection import get_database
 from services.blockchain_service import BlockchainService
+from services.chain_indexer import ChainIndexer
+from services.tx_outbox import TransactionOutbox
+from services.anchoring_service import AnchoringService
 
 router = APIRouter()
 blockchain_service = BlockchainService()
+chain_indexer = ChainIndexer(blockchain_service)
+tx_outbox = TransactionOutbox(blockchain_service)
+anchoring_service = AnchoringService(tx_outbox)
+
+MAX_TOKEN_IDS = 200
 
 @router.post("/mint")
-async def mint_nft(batch_data: Dict[str, Any], db=Depends(get_database)):
-    """Mint NFT for a batch"""
+async def mint_nft(batch_data: Dict[str, Any], response: Response, db=Depends(get_database)):
+    """Mint NFT for a batch
+
+    With a signer configured the mint is queued in the transaction outbox
+    and 202 is returned with the intent; poll /outbox/{intent_id} or listen
+    for transaction_status messages on the WebSocket.
+    """
     try:
         batch_id = batch_data.get("batch_id")
         if not batch_id or not ObjectId.is_valid(batch_id):
@@ -21,6 +34,13 @@ async def mint_nft(batch_data: Dict[str, Any], db=Depends(get_database)):
         if not batch:
             raise HTTPException(status_code=404, detail="Batch not found")
         
+        if tx_outbox.enabled:
+            if batch.get("token_id") is not None:
+                raise HTTPException(status_code=409, detail="Batch already minted")
+            
+            response.status_code = status.HTTP_202_ACCEPTED
+            return await tx_outbox.enqueue_mint(batch)
+        
         # Mint NFT
         result = await blockchain_service.mint_batch_nft(batch)
         
@@ -37,15 +57,121 @@ async def mint_nft(batch_data: Dict[str, Any], db=Depends(get_database)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/outbox")
+async def list_outbox_intents(batch_id: str, db=Depends(get_database)):
+    """List queued blockchain transactions for a batch"""
+    try:
+        if not ObjectId.is_valid(batch_id):
+            raise HTTPException(status_code=400, detail="Invalid batch ID")
+        
+        return await tx_outbox.list_intents(batch_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/outbox/{intent_id}")
+async def get_outbox_intent(intent_id: str, db=Depends(get_database)):
+    """Get the status of a queued blockchain transaction"""
+    try:
+        if not ObjectId.is_valid(intent_id):
+            raise HTTPException(status_code=400, detail="Invalid intent ID")
+        
+        intent = await tx_outbox.get_intent(intent_id)
+        if not intent:
+            raise HTTPException(status_code=404, detail="Intent not found")
+        
+        return intent
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/token/{token_id}")
 async def get_token_info(token_id: int, db=Depends(get_database)):
     """Get blockchain token information"""
     try:
+        # Served from the indexed mirror when available
+        if chain_indexer.enabled:
+            token_info = await chain_indexer.get_token(token_id)
+            if token_info:
+                return token_info
+        
         token_info = await blockchain_service.get_token_info(token_id)
+        token_info["freshness"] = {"source": "rpc"}
         return token_info
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/tokens")
+async def list_tokens(
+    ids: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    producer: Optional[str] = None,
+    product_type: Optional[str] = None,
+    stage: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    db=Depends(get_database)
+):
+    """List indexed blockchain tokens, or read specific tokens with ?ids=1,2,3"""
+    try:
+        if ids:
+            try:
+                token_ids = [int(token_id) for token_id in ids.split(",") if token_id.strip()]
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Token IDs must be integers")
+            
+            if len(token_ids) > MAX_TOKEN_IDS:
+                raise HTTPException(status_code=400, detail=f"At most {MAX_TOKEN_IDS} token IDs per request")
+            
+            result = await blockchain_service.get_tokens_info(token_ids)
+            result["freshness"] = {"source": "rpc"}
+            return result
+        
+        if not chain_indexer.enabled:
+            raise HTTPException(status_code=503, detail="Chain indexer not configured")
+        
+        query = {}
+        if producer:
+            query["producer"] = producer
+        if product_type:
+            query["product_type"] = product_type
+        if stage:
+            query["current_stage"] = stage
+        if is_active is not None:
+            query["is_active"] = is_active
+        
+        return await chain_indexer.list_tokens(query, skip, min(limit, 500))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/proof/{batch_id}/{event_index}")
+async def get_event_proof(batch_id: str, event_index: int, db=Depends(get_database)):
+    """Get the Merkle inclusion proof for a batch's supply chain event"""
+    try:
+        if not ObjectId.is_valid(batch_id):
+            raise HTTPException(status_code=400, detail="Invalid batch ID")
+        
+        batch = await db.batches.find_one({"_id": ObjectId(batch_id)})
+        if not batch:
+            raise HTTPException(status_code=404, detail="Batch not found")
+        
+        if not 0 <= event_index < len(batch.get("supply_chain", [])):
+            raise HTTPException(status_code=404, detail="Supply chain event not found")
+        
+        proof = await anchoring_service.get_proof(batch, event_index)
+        if not proof:
+            raise HTTPException(status_code=404, detail="Event has not been anchored yet")
+        
+        return proof
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/verify/{tx_hash}")
 async def verify_transaction(tx_hash: str, db=Depends(get_database)):
     """Verify a blockchain transaction"""
@@ -0,0 +1,55 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+from bson import ObjectId
+
+from models.notification import MarkReadRequest
+from services.notification_service import NotificationService
+
+router = APIRouter()
+
+@router.get("/{user_id}")
+async def get_notifications(
+    user_id: str,
+    before: Optional[str] = Query(None, description="Return notifications older than this id"),
+    limit: int = Query(20, ge=1, le=100),
+    unread_only: bool = False
+):
+    """Get a page of a user's notifications, newest first"""
+    try:
+        if before and not ObjectId.is_valid(before):
+            raise HTTPException(status_code=400, detail="Invalid notification ID")
+        
+        return await NotificationService.list_notifications(user_id, before, limit, unread_only)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{user_id}/unread-count")
+async def get_unread_count(user_id: str):
+    """Get the number of unread notifications for a user"""
+    try:
+        return {"unread": await NotificationService.get_unread_count(user_id)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/{user_id}/read")
+async def mark_notifications_read(user_id: str, request: MarkReadRequest):
+    """Mark specific notifications as read"""
+    try:
+        if not all(ObjectId.is_valid(i) for i in request.ids):
+            raise HTTPException(status_code=400, detail="Invalid notification ID")
+        
+        return await NotificationService.mark_read(user_id, request.ids)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/{user_id}/read-all")
+async def mark_all_notifications_read(user_id: str):
+    """Mark all of a user's notifications as read"""
+    try:
+        return await NotificationService.mark_read(user_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
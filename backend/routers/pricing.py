@@ -1,14 +1,60 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import Dict, Any, List
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 import random
+from bson import ObjectId
 
 from database.connection import get_database
+from models.pricing import PriceAlertCreate, PriceObservationBatch
+from services.http_cache import etag_matches
 from services.pricing_service import PricingService
+from services.price_alerts import price_alerts
+from services.price_store import price_store
 
 router = APIRouter()
 pricing_service = PricingService()
 
+@router.post("/observations")
+async def ingest_price_observations(batch: PriceObservationBatch):
+    """Record observed prices and update the price history rollups"""
+    try:
+        return await price_store.ingest([o.dict() for o in batch.observations])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/alerts")
+async def create_price_alert(alert: PriceAlertCreate):
+    """Subscribe to a price crossing above or below a threshold"""
+    try:
+        return await price_alerts.create_alert(alert.user_id, alert.product_type, alert.direction, alert.threshold)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/alerts/{user_id}")
+async def get_price_alerts(user_id: str, status: Optional[str] = None):
+    """Get a user's price alerts, optionally filtered by status"""
+    try:
+        return await price_alerts.list_alerts(user_id, status)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.delete("/alerts/{alert_id}")
+async def delete_price_alert(alert_id: str):
+    """Delete a price alert"""
+    try:
+        if not ObjectId.is_valid(alert_id):
+            raise HTTPException(status_code=400, detail="Invalid alert ID")
+        
+        if not await price_alerts.delete_alert(alert_id):
+            raise HTTPException(status_code=404, detail="Price alert not found")
+        return {"message": "Price alert deleted"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/{product_type}")
 async def get_current_price(product_type: str, db=Depends(get_database)):
     """Get current price for a product type"""
@@ -19,28 +65,44 @@ async def get_current_price(product_type: str, db=Depends(get_database)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{product_type}/forecast")
-async def get_price_forecast(product_type: str, days: int = 30, db=Depends(get_database)):
+async def get_price_forecast(product_type: str, days: int = Query(30, ge=1, le=365), db=Depends(get_database)):
     """Get price forecast for a product type"""
     try:
         forecast_data = await pricing_service.get_price_forecast(product_type, days)
+        if forecast_data is None:
+            raise HTTPException(status_code=404, detail="Not enough price history to forecast this product yet")
         return forecast_data
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{product_type}/history")
-async def get_price_history(product_type: str, period: str = "30d", db=Depends(get_database)):
-    """Get price history for a product type"""
+async def get_price_history(
+    product_type: str,
+    period: str = "30d",
+    interval: str = Query("daily", pattern="^(daily|weekly|monthly)$"),
+    db=Depends(get_database)
+):
+    """Get OHLC/VWAP price history for a product type"""
     try:
-        history_data = await pricing_service.get_price_history(product_type, period)
+        history_data = await pricing_service.get_price_history(product_type, period, interval)
         return history_data
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/trends/market")
-async def get_market_trends(db=Depends(get_database)):
-    """Get overall market trends"""
+async def get_market_trends(request: Request):
+    """Get overall market trends
+    
+    The response is rebuilt once per price tick; clients polling with
+    If-None-Match get 304 until prices change.
+    """
     try:
-        trends = await pricing_service.get_market_trends()
-        return trends
+        snapshot = await pricing_service.get_market_snapshot()
+        headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), snapshot.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=snapshot.body, media_type="application/json", headers=headers)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -1,12 +1,25 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from typing import Optional
 from bson import ObjectId
 
 from database.connection import get_database
-from services.qr_service import QRCodeService
+from services.http_cache import etag_matches
+from services.qr_service import QRCodeService, QRImage
 
 router = APIRouter()
 qr_service = QRCodeService()
 
+FORMAT = Query("png", pattern="^(png|jpeg|gif|svg)$")
+SIZE = Query(None, ge=64, le=2048, description="Maximum width and height in pixels")
+ERROR_LEVEL = Query("M", pattern="^[LMQH]$")
+
+def image_response(request: Request, image: QRImage) -> Response:
+    """Raw image bytes; the URL fully determines the content, so it can be cached for a year"""
+    headers = {"ETag": image.etag, "Cache-Control": "public, max-age=31536000, immutable"}
+    if etag_matches(request.headers.get("if-none-match"), image.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=image.content, media_type=image.content_type, headers=headers)
+
 @router.get("/batch/{batch_id}")
 async def generate_batch_qr(batch_id: str, format: str = "png", db=Depends(get_database)):
     """Generate QR code for batch tracking"""
@@ -19,7 +32,7 @@ async def generate_batch_qr(batch_id: str, format: str = "png", db=Depends(get_d
         if not batch:
             raise HTTPException(status_code=404, detail="Batch not found")
         
-        qr_data = qr_service.generate_batch_qr(batch_id, format)
+        qr_data = await qr_service.generate_batch_qr(batch_id, format)
         return qr_data
         
     except HTTPException:
@@ -39,10 +52,64 @@ async def generate_producer_qr(producer_id: str, db=Depends(get_database)):
         if not producer:
             raise HTTPException(status_code=404, detail="Producer not found")
         
-        qr_data = qr_service.generate_producer_qr(producer_id)
+        qr_data = await qr_service.generate_producer_qr(producer_id)
         return qr_data
         
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/batch/{batch_id}/image")
+async def get_batch_qr_image(
+    batch_id: str,
+    request: Request,
+    format: str = FORMAT,
+    size: Optional[int] = SIZE,
+    error_level: str = ERROR_LEVEL,
+    db=Depends(get_database)
+):
+    """Batch tracking QR code as an image file"""
+    try:
+        if not ObjectId.is_valid(batch_id):
+            raise HTTPException(status_code=400, detail="Invalid batch ID")
+        
+        # Verify batch exists
+        batch = await db.batches.find_one({"_id": ObjectId(batch_id)}, {"_id": 1})
+        if not batch:
+            raise HTTPException(status_code=404, detail="Batch not found")
+        
+        image = await qr_service.get_image(qr_service.batch_url(batch_id), format, size, error_level)
+        return image_response(request, image)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/producer/{producer_id}/image")
+async def get_producer_qr_image(
+    producer_id: str,
+    request: Request,
+    format: str = FORMAT,
+    size: Optional[int] = SIZE,
+    error_level: str = ERROR_LEVEL,
+    db=Depends(get_database)
+):
+    """Producer profile QR code as an image file"""
+    try:
+        if not ObjectId.is_valid(producer_id):
+            raise HTTPException(status_code=400, detail="Invalid producer ID")
+        
+        # Verify producer exists
+        producer = await db.producers.find_one({"_id": ObjectId(producer_id)}, {"_id": 1})
+        if not producer:
+            raise HTTPException(status_code=404, detail="Producer not found")
+        
+        image = await qr_service.get_image(qr_service.producer_url(producer_id), format, size, error_level)
+        return image_response(request, image)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
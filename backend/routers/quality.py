@@ -1,17 +1,21 @@
 from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, status
 from typing import Optional
 from bson import ObjectId
+from datetime import datetime
 import io
 from PIL import Image
 import random
 
-from models.quality import QualityAssessment, QualityAssessmentCreate, ImageAnalysis
+from models.quality import QualityAssessment, QualityAssessmentCreate, ImageAnalysis, QualityHistory
 from database.connection import get_database
 from services.ai_quality_service import AIQualityService
 
 router = APIRouter()
 ai_service = AIQualityService()
 
+HISTORY_INTERVALS = {"hour", "day", "week", "month"}
+QUALITY_METRICS = ["overall_score", "freshness", "appearance", "size", "defects", "ai_confidence"]
+
 @router.post("/assess/{batch_id}", response_model=QualityAssessment, status_code=status.HTTP_201_CREATED)
 async def assess_quality(
     batch_id: str,
@@ -47,7 +51,8 @@ async def assess_quality(
             "size": assessment_result["size"],
             "defects": assessment_result["defects"],
             "ai_confidence": assessment_result["confidence"],
-            "image_analysis": assessment_result["analysis"]
+            "image_analysis": assessment_result["analysis"],
+            "assessment_date": datetime.utcnow()
         }
         
         # Save to database
@@ -68,17 +73,91 @@ async def assess_quality(
 
 @router.get("/batch/{batch_id}", response_model=QualityAssessment)
 async def get_quality_assessment(batch_id: str, db=Depends(get_database)):
-    """Get quality assessment for a batch"""
+    """Get the latest quality assessment for a batch"""
     try:
         if not ObjectId.is_valid(batch_id):
             raise HTTPException(status_code=400, detail="Invalid batch ID")
         
-        assessment = await db.quality_assessments.find_one({"batch_id": batch_id})
+        # Served from the (batch_id, assessment_date) index
+        assessment = await db.quality_assessments.find_one(
+            {"batch_id": batch_id},
+            sort=[("assessment_date", -1)]
+        )
         if not assessment:
             raise HTTPException(status_code=404, detail="Quality assessment not found")
         
         return QualityAssessment(**assessment)
     except HTTPException:
         raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/batch/{batch_id}/history", response_model=QualityHistory)
+async def get_quality_history(
+    batch_id: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    interval: str = "day",
+    db=Depends(get_database)
+):
+    """Get downsampled quality assessment history for a batch"""
+    try:
+        if not ObjectId.is_valid(batch_id):
+            raise HTTPException(status_code=400, detail="Invalid batch ID")
+        
+        if interval not in HISTORY_INTERVALS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Interval must be one of: {', '.join(sorted(HISTORY_INTERVALS))}"
+            )
+        
+        if start and end and start > end:
+            raise HTTPException(status_code=400, detail="Start must be before end")
+        
+        match = {"batch_id": batch_id}
+        if start or end:
+            match["assessment_date"] = {}
+            if start:
+                match["assessment_date"]["$gte"] = start
+            if end:
+                match["assessment_date"]["$lte"] = end
+        
+        # Bucket on the server so only one document per interval is returned
+        group = {
+            "_id": {"$dateTrunc": {"date": "$assessment_date", "unit": interval}},
+            "assessments": {"$sum": 1}
+        }
+        for metric in QUALITY_METRICS:
+            group[f"{metric}_min"] = {"$min": f"${metric}"}
+            group[f"{metric}_avg"] = {"$avg": f"${metric}"}
+            group[f"{metric}_max"] = {"$max": f"${metric}"}
+        
+        pipeline = [
+            {"$match": match},
+            {"$group": group},
+            {"$sort": {"_id": 1}}
+        ]
+        results = await db.quality_assessments.aggregate(pipeline).to_list(None)
+        
+        buckets = []
+        for result in results:
+            bucket = {"bucket_start": result["_id"], "assessments": result["assessments"]}
+            for metric in QUALITY_METRICS:
+                bucket[metric] = {
+                    "min": result[f"{metric}_min"],
+                    "avg": round(result[f"{metric}_avg"], 2),
+                    "max": result[f"{metric}_max"]
+                }
+            buckets.append(bucket)
+        
+        return QualityHistory(
+            batch_id=batch_id,
+            interval=interval,
+            start=start,
+            end=end,
+            buckets=buckets
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
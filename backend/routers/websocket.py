@@ -1,37 +1,88 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
+from typing import Optional
 from websocket.manager import manager
+from websocket.encoding import decode
+from services.price_feed import price_feed
 import uuid
-import json
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+async def receive_message(websocket: WebSocket) -> dict:
+    """Next client message, sent either as JSON text or MessagePack bytes"""
+    data = await websocket.receive()
+    if data["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(data.get("code", 1000))
+    return decode(data["bytes"] if data.get("bytes") is not None else data["text"])
+
 @router.websocket("/ws/{user_id}")
-async def websocket_endpoint(websocket: WebSocket, user_id: str):
+async def websocket_endpoint(
+    websocket: WebSocket,
+    user_id: str,
+    encoding: str = "json",
+    coalesce_ms: Optional[int] = None,
+    session: Optional[str] = None,
+    resume_from: Optional[int] = None
+):
     connection_id = str(uuid.uuid4())
     
     try:
-        await manager.connect(websocket, user_id, connection_id)
+        connection = await manager.connect(
+            websocket, user_id, connection_id, encoding=encoding, coalesce_ms=coalesce_ms
+        )
         
-        # Send welcome message
-        await websocket.send_text(json.dumps({
+        # Send welcome message with the negotiated options
+        await manager.send_to_connection({
             "type": "connection",
             "message": "Connected to TraceChain real-time updates",
-            "connection_id": connection_id
-        }))
+            "connection_id": connection_id,
+            "encoding": connection.encoding,
+            "coalesce_ms": int(connection.coalesce_interval * 1000),
+            **(await manager.session_info(user_id))
+        }, connection_id)
+        
+        # Replay personal messages missed since the client's last seq
+        if resume_from is not None:
+            await manager.resume(connection_id, session, resume_from)
         
         while True:
             # Keep connection alive and handle incoming messages
-            data = await websocket.receive_text()
-            message = json.loads(data)
+            message = await receive_message(websocket)
+            connection.touch()
             
             # Handle different message types
             if message.get("type") == "ping":
-                await websocket.send_text(json.dumps({
+                await manager.send_to_connection({
                     "type": "pong",
                     "timestamp": message.get("timestamp")
-                }))
+                }, connection_id)
+            
+            elif message.get("type") == "pong":
+                # Reply to a server heartbeat; touch() above already counted it
+                pass
+            
+            elif message.get("type") == "subscribe":
+                topics = manager.subscribe(connection_id, message.get("topics") or [])
+                await manager.send_to_connection({
+                    "type": "subscribed",
+                    "topics": topics
+                }, connection_id)
+                
+                # Price subscribers start from a full snapshot, then get deltas
+                if "prices" in (message.get("topics") or []) and "prices" in topics:
+                    try:
+                        await price_feed.send_snapshot(connection_id)
+                    except Exception as e:
+                        # Keep the socket; deltas still arrive and the client can resubscribe
+                        logger.error(f"Price snapshot failed for connection {connection_id}: {e}")
+            
+            elif message.get("type") == "unsubscribe":
+                topics = manager.unsubscribe(connection_id, message.get("topics") or [])
+                await manager.send_to_connection({
+                    "type": "subscribed",
+                    "topics": topics
+                }, connection_id)
             
     except WebSocketDisconnect:
         manager.disconnect(user_id, connection_id)
@@ -40,6 +91,11 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str):
         logger.error(f"WebSocket error for user {user_id}: {e}")
         manager.disconnect(user_id, connection_id)
 
+@router.get("/metrics")
+async def get_websocket_metrics():
+    """Connection counts, heartbeat reaping and memory for this worker"""
+    return manager.metrics()
+
 # Utility functions for sending notifications
 async def notify_batch_update(batch_id: str, producer_id: str, update_data: dict):
     """Notify relevant users about batch updates"""
@@ -52,12 +108,16 @@ async def notify_batch_update(batch_id: str, producer_id: str, update_data: dict
     # Notify the producer
     await manager.send_personal_message(message, producer_id)
     
-    # Broadcast to all users (for public tracking)
-    await manager.broadcast({
+    # Publish to clients tracking this batch, its producer or its product
+    topics = [f"batch:{batch_id}", f"producer:{producer_id}"]
+    if update_data.get("product_type"):
+        topics.append(f"product:{update_data['product_type']}")
+    
+    await manager.publish({
         "type": "public_batch_update",
         "batch_id": batch_id,
         "stage": update_data.get("current_stage")
-    })
+    }, *topics)
 
 async def notify_quality_assessment(batch_id: str, producer_id: str, assessment_data: dict):
     """Notify about new quality assessments"""
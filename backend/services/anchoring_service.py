@@ -0,0 +1,273 @@
+import os
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional
+from eth_abi import encode
+from eth_utils import keccak
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+import logging
+
+from services.leases import Lease
+
+logger = logging.getLogger(__name__)
+
+LEAF_TYPES = ["string", "uint256", "string", "string", "string", "string", "uint256"]
+
+# Anchor lifecycle: proofs and outbox intent being recorded, root queued
+BUILDING = "building"
+PENDING = "pending"
+
+def event_leaf(batch_id: str, event_index: int, event: Dict[str, Any]) -> bytes:
+    """Merkle leaf for a supply chain event
+
+    Leaves are keccak256(keccak256(abi.encode(...))), the leaf encoding
+    of OpenZeppelin's StandardMerkleTree, and pairs are hashed sorted as
+    MerkleProof expects, so proofs verify with verifyEventInclusion. The
+    tree itself is built by build_merkle_tree, not StandardMerkleTree, so
+    its roots differ from that library's for the same leaves.
+    """
+    timestamp = event["timestamp"].replace(tzinfo=timezone.utc)
+    encoded = encode(LEAF_TYPES, [
+        batch_id,
+        event_index,
+        event.get("stage") or "",
+        event.get("location") or "",
+        event.get("actor") or "",
+        event.get("description") or "",
+        int(timestamp.timestamp() * 1000)
+    ])
+    return keccak(keccak(encoded))
+
+def _hash_pair(a: bytes, b: bytes) -> bytes:
+    return keccak(a + b if a < b else b + a)
+
+def build_merkle_tree(leaves: List[bytes]) -> List[List[bytes]]:
+    """All levels of a sorted-pair Merkle tree, leaves first
+
+    An odd node at the end of a level is carried up unchanged.
+    """
+    levels = [leaves]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [_hash_pair(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+def merkle_proof(levels: List[List[bytes]], index: int) -> List[bytes]:
+    """Sibling hashes from a leaf up to the root"""
+    proof = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append(level[sibling])
+        index //= 2
+    return proof
+
+def verify_proof(leaf: bytes, proof: List[bytes], root: bytes) -> bool:
+    computed = leaf
+    for sibling in proof:
+        computed = _hash_pair(computed, sibling)
+    return computed == root
+
+class AnchoringService:
+    """Commits supply chain events on-chain as periodic Merkle roots
+
+    Every ANCHOR_INTERVAL seconds the events recorded since the previous
+    anchor are collected from `batches`, hashed into a Merkle tree, and
+    only the root is queued for `anchorRoot` through the transaction
+    outbox. Inclusion proofs are stored per event in `anchor_proofs`. An
+    anchor stays `building` until its proofs and outbox intent are both
+    recorded; anchors left building by a failure are finished on the next
+    run, so every root is eventually submitted. The service only runs
+    when the outbox can submit transactions.
+
+    Events younger than ANCHOR_LAG seconds wait for the next anchor, since
+    an event is timestamped before it is written and may commit late. At
+    most about ANCHOR_MAX_EVENTS events go into one root; a larger backlog
+    is anchored in several. Only the worker holding the `anchoring` lease
+    runs the loop.
+    """
+
+    def __init__(self, tx_outbox):
+        self.outbox = tx_outbox
+        self.interval = float(os.getenv("ANCHOR_INTERVAL", "3600"))
+        self.lag = float(os.getenv("ANCHOR_LAG", "60"))
+        self.max_events = int(os.getenv("ANCHOR_MAX_EVENTS", "100000"))
+        self.lease = Lease("anchoring", float(os.getenv("ANCHOR_LEASE_TTL", "60")))
+        self._task: Optional[asyncio.Task] = None
+
+    def _database(self):
+        from database.connection import db
+        return db.database
+
+    def start(self):
+        if not self.outbox.enabled:
+            logger.info("Anchoring disabled: no contract or signing account configured")
+            return
+        if not self._task:
+            self._task = asyncio.create_task(self.lease.run(self._run))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.resume()
+                # A full anchor means more events may be waiting
+                anchor = await self.anchor_once()
+                while anchor and anchor["event_count"] >= self.max_events:
+                    anchor = await self.anchor_once()
+            except Exception as e:
+                logger.error(f"Failed to anchor supply chain events: {e}")
+
+    async def anchor_once(self) -> Optional[Dict[str, Any]]:
+        """Anchor the events recorded since the previous anchor, oldest first"""
+        database = self._database()
+
+        last_anchor = await database.anchors.find_one(sort=[("period_end", -1)])
+        period_start = last_anchor["period_end"] if last_anchor else datetime(1970, 1, 1)
+        period_end = datetime.utcnow() - timedelta(seconds=self.lag)
+        if period_end <= period_start:
+            return None
+
+        events = await self._events({"$gt": period_start, "$lte": period_end}, self.max_events)
+        if not events:
+            return None
+
+        if len(events) == self.max_events:
+            # Capped: end this anchor at the last event's timestamp, taking
+            # every event that shares it, and leave the rest for the next
+            period_end = events[-1]["event"]["timestamp"]
+            events = [e for e in events if e["event"]["timestamp"] < period_end]
+            events += await self._events(period_end)
+
+        leaves, levels, root = self._tree(events)
+        anchor = {
+            "root": root,
+            "event_count": len(leaves),
+            "period_start": period_start,
+            "period_end": period_end,
+            "status": BUILDING,
+            "created_at": datetime.utcnow()
+        }
+        try:
+            await database.anchors.insert_one(anchor)
+        except DuplicateKeyError:
+            logger.warning(f"Events up to {period_end} are already anchored under root {root}")
+            return None
+
+        await self._complete(anchor, events, leaves, levels)
+        logger.info(f"Anchored {len(leaves)} supply chain events under root {root}")
+        return anchor
+
+    async def resume(self):
+        """Finish anchors whose proofs or outbox intent were never recorded"""
+        database = self._database()
+        building = await database.anchors.find({"status": BUILDING}).sort("period_end", 1).to_list(None)
+        for anchor in building:
+            # The anchor covered every event in its period, capped or not
+            events = await self._events({"$gt": anchor["period_start"], "$lte": anchor["period_end"]})
+            leaves, levels, root = self._tree(events)
+            if root != anchor["root"]:
+                # Events in the period changed since it was anchored
+                logger.error(f"Anchor {anchor['_id']} no longer matches its events; expected {anchor['root']}, got {root}")
+                await database.anchors.update_one(
+                    {"_id": anchor["_id"]},
+                    {"$set": {"status": "failed", "error": "Events changed before the anchor was recorded"}}
+                )
+                continue
+            await self._complete(anchor, events, leaves, levels)
+            logger.info(f"Finished anchor {anchor['_id']} under root {root}")
+
+    def _tree(self, events: List[Dict[str, Any]]):
+        leaves = [event_leaf(str(e["_id"]), e["event_index"], e["event"]) for e in events]
+        levels = build_merkle_tree(leaves)
+        return leaves, levels, "0x" + levels[-1][0].hex()
+
+    async def _complete(self, anchor: Dict[str, Any], events: List[Dict[str, Any]],
+                        leaves: List[bytes], levels: List[List[bytes]]):
+        """Store an anchor's proofs and queue its root, then mark it pending"""
+        database = self._database()
+        root = anchor["root"]
+        proofs = [
+            {
+                "batch_id": str(event["_id"]),
+                "event_index": event["event_index"],
+                "leaf": "0x" + leaves[i].hex(),
+                "proof": ["0x" + node.hex() for node in merkle_proof(levels, i)],
+                "root": root,
+                "anchor_id": anchor["_id"]
+            }
+            for i, event in enumerate(events)
+        ]
+        try:
+            await database.anchor_proofs.insert_many(proofs, ordered=False)
+        except BulkWriteError as e:
+            logger.warning(f"Some anchor proofs already existed: {e.details.get('nWriteErrors')}")
+
+        # Keyed by the root, so finishing an anchor twice queues it once
+        intent = await self.outbox.enqueue_anchor(anchor)
+        # The outbox may already have confirmed it, so only move on from building
+        await database.anchors.update_one(
+            {"_id": anchor["_id"], "status": BUILDING},
+            {"$set": {"status": PENDING, "intent_id": intent["intent_id"]}}
+        )
+        anchor["intent_id"] = intent["intent_id"]
+
+    async def _events(self, timestamp, limit: int = 0) -> List[Dict[str, Any]]:
+        """Supply chain events whose timestamp matches, oldest first"""
+        pipeline = [
+            {"$match": {"supply_chain.timestamp": timestamp}},
+            {"$unwind": {"path": "$supply_chain", "includeArrayIndex": "event_index"}},
+            {"$match": {"supply_chain.timestamp": timestamp}},
+            {"$project": {"event_index": 1, "event": "$supply_chain"}},
+            {"$sort": {"event.timestamp": 1, "_id": 1, "event_index": 1}}
+        ]
+        if limit:
+            pipeline.append({"$limit": limit})
+        return await self._database().batches.aggregate(pipeline, allowDiskUse=True).to_list(None)
+
+    async def get_proof(self, batch: Dict[str, Any], event_index: int) -> Optional[Dict[str, Any]]:
+        """Inclusion proof for a batch event, checked against its current data"""
+        database = self._database()
+        batch_id = str(batch["_id"])
+
+        stored = await database.anchor_proofs.find_one({"batch_id": batch_id, "event_index": event_index})
+        if not stored:
+            return None
+
+        anchor = await database.anchors.find_one({"_id": stored["anchor_id"]})
+
+        # Recompute the leaf so edits to the stored event fail verification
+        leaf = event_leaf(batch_id, event_index, batch["supply_chain"][event_index])
+        proof = [bytes.fromhex(node[2:]) for node in stored["proof"]]
+        verified = (
+            "0x" + leaf.hex() == stored["leaf"]
+            and verify_proof(leaf, proof, bytes.fromhex(stored["root"][2:]))
+        )
+
+        return {
+            "batch_id": batch_id,
+            "event_index": event_index,
+            "leaf": stored["leaf"],
+            "proof": stored["proof"],
+            "root": stored["root"],
+            "verified": verified,
+            "anchor": {
+                "status": anchor["status"],
+                "event_count": anchor["event_count"],
+                "period_end": anchor["period_end"],
+                "transaction_hash": anchor.get("transaction_hash"),
+                "block_number": anchor.get("block_number")
+            }
+        }
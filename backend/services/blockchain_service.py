@@ -1,35 +1,109 @@
 import os
 import json
-from web3 import Web3
+import asyncio
+import itertools
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+from web3 import AsyncWeb3, AsyncHTTPProvider
+from web3.exceptions import TransactionNotFound
+from web3.logs import DISCARD
+from hexbytes import HexBytes
 from eth_account import Account
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
+
+from services.nonce_manager import NonceManager, PendingTransaction
+from services.mint_aggregator import MintAggregator
+from services.chain_cache import LRUCache, HeadBlockTracker
 
 logger = logging.getLogger(__name__)
 
+def _abi_type(output: Dict[str, Any]) -> str:
+    """Canonical ABI type string for a function output, expanding tuples"""
+    if output["type"].startswith("tuple"):
+        components = ",".join(_abi_type(c) for c in output["components"])
+        return f"({components}){output['type'][len('tuple'):]}"
+    return output["type"]
+
+class GasEstimateError(Exception):
+    """The node could not estimate gas, usually because the call would revert"""
+
+class TransactionReverted(Exception):
+    """A transaction was mined but reverted"""
+
+class ReceiptTimeout(Exception):
+    """A broadcast transaction was not mined in time; it may still be mined"""
+
+    def __init__(self, tx_hash: str, timeout: float):
+        super().__init__(f"Transaction {tx_hash} not mined within {timeout}s")
+        self.tx_hash = tx_hash
+
+class NonceConsumed(Exception):
+    """A nonce was used by a transaction other than the ones sent for it"""
+
+    def __init__(self, nonce: int):
+        super().__init__(f"Nonce {nonce} was used by another transaction")
+        self.nonce = nonce
+
+class ReplacementLimit(Exception):
+    """A transaction is still unmined after the maximum number of fee bumps"""
+
 class BlockchainService:
     def __init__(self):
         self.w3 = None
         self.contract = None
         self.account = None
+        self.nonce_manager: Optional[NonceManager] = None
+        self.mint_aggregator: Optional[MintAggregator] = None
+        self.head_tracker: Optional[HeadBlockTracker] = None
+        self.session: Optional[ClientSession] = None
+        
+        # Timeouts (seconds) and connection pool size for the RPC client
+        self.rpc_timeout = float(os.getenv("RPC_TIMEOUT", "10"))
+        self.receipt_timeout = float(os.getenv("TX_RECEIPT_TIMEOUT", "120"))
+        self.receipt_poll_interval = float(os.getenv("TX_RECEIPT_POLL_INTERVAL", "0.5"))
+        self.max_connections = int(os.getenv("RPC_MAX_CONNECTIONS", "20"))
+        
+        # Pending transactions older than this are rebroadcast with a higher gas price
+        self.replacement_after = float(os.getenv("TX_REPLACEMENT_AFTER", "60"))
+        self.replacement_gas_bump = float(os.getenv("TX_REPLACEMENT_GAS_BUMP", "1.125"))
+        self.max_replacements = int(os.getenv("TX_MAX_REPLACEMENTS", "5"))
+        
+        # Mint requests are grouped up to this many batches or this many milliseconds
+        self.mint_batch_size = int(os.getenv("MINT_BATCH_SIZE", "20"))
+        self.mint_batch_window = float(os.getenv("MINT_BATCH_WINDOW_MS", "200")) / 1000
+        
+        # Receipts this deep are final and cached permanently; token reads are
+        # cached until the indexer sees an event for the token
+        self.finality_depth = int(os.getenv("RECEIPT_FINALITY_DEPTH", "12"))
+        self.head_poll_interval = float(os.getenv("HEAD_POLL_INTERVAL", "2"))
+        self.receipt_cache = LRUCache(int(os.getenv("RECEIPT_CACHE_SIZE", "10000")))
+        self.token_cache = LRUCache(int(os.getenv("TOKEN_CACHE_SIZE", "10000")))
+        
+        # Maximum eth_calls sent in one JSON-RPC batch request
+        self.rpc_batch_size = int(os.getenv("RPC_BATCH_SIZE", "100"))
+        self._rpc_ids = itertools.count(1)
+        
         self._initialize_connection()
     
     def _initialize_connection(self):
-        """Initialize Web3 connection and contract"""
+        """Initialize Web3 provider and contract"""
         try:
-            # Connect to blockchain network
+            # Async provider so RPC calls never block the event loop
             rpc_url = os.getenv("RPC_URL", "http://localhost:8545")
-            self.w3 = Web3(Web3.HTTPProvider(rpc_url))
-            
-            if not self.w3.is_connected():
-                logger.warning("Could not connect to blockchain network")
-                return
+            self.w3 = AsyncWeb3(AsyncHTTPProvider(
+                rpc_url,
+                request_kwargs={"timeout": ClientTimeout(total=self.rpc_timeout)}
+            ))
+            self.head_tracker = HeadBlockTracker(self.w3, self.head_poll_interval)
             
             # Load contract ABI and address
             contract_address = os.getenv("CONTRACT_ADDRESS")
             if contract_address:
                 # Load ABI from compiled contract
-                abi_path = "../blockchain/artifacts/contracts/TraceChain.sol/TraceChain.json"
+                abi_path = os.getenv(
+                    "CONTRACT_ABI_PATH",
+                    "../blockchain/artifacts/contracts/TraceChain.sol/TraceChain.json"
+                )
                 if os.path.exists(abi_path):
                     with open(abi_path, 'r') as f:
                         contract_json = json.load(f)
@@ -42,86 +116,294 @@ class BlockchainService:
             private_key = os.getenv("PRIVATE_KEY")
             if private_key:
                 self.account = Account.from_key(private_key)
+                self.nonce_manager = NonceManager(self.w3, self.account.address)
+            
+            if self.contract and self.account and self.mint_batch_size > 1:
+                self.mint_aggregator = MintAggregator(
+                    self.mint_batch_nfts,
+                    max_items=self.mint_batch_size,
+                    max_wait=self.mint_batch_window
+                )
                 
             logger.info("Blockchain service initialized successfully")
             
         except Exception as e:
             logger.error(f"Failed to initialize blockchain service: {e}")
     
+    async def connect(self):
+        """Open the pooled HTTP session shared by all RPC calls"""
+        if not self.w3 or self.session:
+            return
+        
+        try:
+            self.session = ClientSession(
+                connector=TCPConnector(limit=self.max_connections),
+                timeout=ClientTimeout(total=self.rpc_timeout)
+            )
+            await self.w3.provider.cache_async_session(self.session)
+            
+            if not await self.w3.is_connected():
+                logger.warning("Could not connect to blockchain network")
+            
+            self.head_tracker.start()
+            
+            if self.mint_aggregator:
+                self.mint_aggregator.start()
+        except Exception as e:
+            logger.error(f"Failed to open blockchain session: {e}")
+    
+    async def close(self):
+        """Stop background work and close the pooled HTTP session"""
+        if self.mint_aggregator:
+            await self.mint_aggregator.stop()
+        
+        if self.head_tracker:
+            await self.head_tracker.stop()
+        
+        if self.session:
+            await self.session.close()
+            self.session = None
+    
     async def mint_batch_nft(self, batch_data: Dict[str, Any]) -> Dict[str, Any]:
         """Mint NFT for a batch"""
+        if not self.contract or not self.account:
+            # Return mock response for development
+            return {
+                "success": True,
+                "token_id": 1001,
+                "transaction_hash": "0x1234567890abcdef",
+                "message": "NFT minted successfully (mock)"
+            }
+        
+        # Concurrent requests are grouped into multi-mint transactions
+        if self.mint_aggregator and self.mint_aggregator.running:
+            return await self.mint_aggregator.submit(batch_data)
+        
+        results = await self.mint_batch_nfts([batch_data])
+        return results[str(batch_data["_id"])]
+    
+    async def mint_batch_nfts(self, batches: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Mint NFTs for several batches in one transaction, keyed by batch_id"""
+        mint_args = None
         try:
-            if not self.contract or not self.account:
-                # Return mock response for development
-                return {
-                    "success": True,
-                    "token_id": 1001,
-                    "transaction_hash": "0x1234567890abcdef",
-                    "message": "NFT minted successfully (mock)"
-                }
+            mint_args = [self.mint_args(batch_data) for batch_data in batches]
             
-            # Prepare transaction data
-            batch_id = str(batch_data["_id"])
-            product_type = batch_data["product_type"]
-            quantity = int(batch_data["quantity"])
-            harvest_date = int(batch_data["harvest_date"].timestamp())
-            location = batch_data["location"]
-            
-            # Create metadata URI (would typically be IPFS)
-            token_uri = f"https://api.tracechain.com/metadata/{batch_id}"
-            
-            # Build transaction
-            function = self.contract.functions.mintBatch(
-                batch_id,
-                product_type,
-                quantity,
-                harvest_date,
-                location,
-                token_uri
-            )
-            
-            # Estimate gas
-            gas_estimate = function.estimate_gas({'from': self.account.address})
+            if len(mint_args) == 1:
+                function = self.contract.functions.mintBatch(*mint_args[0])
+            else:
+                # mintBatches takes one array per parameter
+                function = self.contract.functions.mintBatches(
+                    *[list(column) for column in zip(*mint_args)]
+                )
             
-            # Build transaction
-            transaction = function.build_transaction({
-                'from': self.account.address,
-                'gas': gas_estimate,
-                'gasPrice': self.w3.eth.gas_price,
-                'nonce': self.w3.eth.get_transaction_count(self.account.address),
-            })
+            receipt = await self._send_transaction(function)
+            if receipt.status == 0:
+                raise TransactionReverted(f"Transaction {receipt.transactionHash.hex()} reverted")
             
-            # Sign and send transaction
-            signed_txn = self.w3.eth.account.sign_transaction(transaction, self.account.key)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+        except ReceiptTimeout as e:
+            # The transaction may still be mined, so minting again could
+            # mint twice; report the hash for the caller to follow up
+            logger.warning(f"Mint of {len(batches)} batches still pending: {e}")
+            return {
+                batch_id: {"success": False, "pending": True, "transaction_hash": e.tx_hash, "error": str(e)}
+                for batch_id, *_ in mint_args
+            }
+        except Exception as e:
+            # Bad arguments, a failed gas estimate or a revert mean nothing was
+            # minted, and a single bad batch fails the whole group
+            retry_individually = mint_args is None or isinstance(e, (GasEstimateError, TransactionReverted))
+            if len(batches) > 1 and retry_individually:
+                logger.warning(f"Multi-mint of {len(batches)} batches failed, minting individually: {e}")
+                results = {}
+                for result in await asyncio.gather(*[self.mint_batch_nfts([b]) for b in batches]):
+                    results.update(result)
+                return results
             
-            # Wait for confirmation
-            receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+            logger.error(f"Failed to mint NFT: {e}")
+            return {str(batch_data["_id"]): {"success": False, "error": str(e)} for batch_data in batches}
+        
+        # Map every BatchMinted event back to its batch ID
+        token_ids = {}
+        for event in self.contract.events.BatchMinted().process_receipt(receipt, errors=DISCARD):
+            token_ids[event['args']['batchId']] = event['args']['tokenId']
+        
+        results = {}
+        for batch_id, *_ in mint_args:
+            if batch_id not in token_ids:
+                results[batch_id] = {"success": False, "error": "BatchMinted event not found"}
+                continue
             
-            # Extract token ID from logs
-            token_id = None
-            for log in receipt.logs:
-                try:
-                    decoded = self.contract.events.BatchMinted().process_log(log)
-                    token_id = decoded['args']['tokenId']
-                    break
-                except:
-                    continue
+            results[batch_id] = {
+                "success": True,
+                "token_id": token_ids[batch_id],
+                "transaction_hash": receipt.transactionHash.hex(),
+                "block_number": receipt.blockNumber,
+                "gas_used": receipt.gasUsed,
+                "gas_per_batch": receipt.gasUsed // len(mint_args),
+                "batch_size": len(mint_args)
+            }
+        
+        return results
+    
+    def mint_args(self, batch_data: Dict[str, Any]) -> Tuple:
+        """Contract arguments for minting a batch"""
+        batch_id = str(batch_data["_id"])
+        
+        # Create metadata URI (would typically be IPFS)
+        token_uri = f"https://api.tracechain.com/metadata/{batch_id}"
+        
+        return (
+            batch_id,
+            batch_data["product_type"],
+            int(batch_data["quantity"]),
+            int(batch_data["harvest_date"].timestamp()),
+            batch_data["location"],
+            token_uri
+        )
+    
+    async def update_stage(
+        self,
+        token_id: int,
+        stage: str,
+        location: str,
+        actor: str,
+        description: str
+    ) -> Dict[str, Any]:
+        """Record a supply chain stage for a token on-chain"""
+        try:
+            function = self.contract.functions.updateStage(token_id, stage, location, actor, description)
+            receipt = await self._send_transaction(function)
             
             return {
                 "success": True,
-                "token_id": token_id,
-                "transaction_hash": tx_hash.hex(),
+                "transaction_hash": receipt.transactionHash.hex(),
                 "block_number": receipt.blockNumber,
                 "gas_used": receipt.gasUsed
             }
+        except Exception as e:
+            logger.error(f"Failed to update stage: {e}")
+            return {"success": False, "error": str(e)}
+    
+    async def _send_transaction(self, function):
+        """Sign and broadcast a contract call, then wait for its receipt"""
+        pending = await self.broadcast(function)
+        try:
+            return await asyncio.wait_for(
+                self.wait_for_receipt(pending.nonce),
+                timeout=self.receipt_timeout
+            )
+        except asyncio.TimeoutError:
+            raise ReceiptTimeout(pending.tx_hash, self.receipt_timeout)
+        finally:
+            self.nonce_manager.complete(pending.nonce)
+    
+    async def broadcast(self, function, before_send=None) -> PendingTransaction:
+        """Sign and broadcast a contract call without waiting for it to be mined
+
+        before_send, if given, is awaited with the nonce, transaction and
+        hash once signed, so the caller can record them before they exist
+        on the network.
+        """
+        try:
+            gas_estimate = await function.estimate_gas({'from': self.account.address})
+        except Exception as e:
+            raise GasEstimateError(str(e)) from e
+        gas_price = await self.w3.eth.gas_price
+        
+        # Nonces come from the local allocator so concurrent calls never collide
+        nonce = await self.nonce_manager.reserve()
+        try:
+            transaction = await function.build_transaction({
+                'from': self.account.address,
+                'gas': gas_estimate,
+                'gasPrice': gas_price,
+                'nonce': nonce,
+            })
             
+            signed_txn = self.w3.eth.account.sign_transaction(transaction, self.account.key)
+            if before_send:
+                await before_send(nonce, transaction, signed_txn.hash.hex())
+            tx_hash = await self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
         except Exception as e:
-            logger.error(f"Failed to mint NFT: {e}")
-            return {
-                "success": False,
-                "error": str(e)
-            }
+            if "nonce" in str(e).lower():
+                await self.nonce_manager.resync()
+            else:
+                await self.nonce_manager.release(nonce)
+            raise
+        
+        return self.nonce_manager.track(nonce, transaction, tx_hash.hex())
+    
+    async def _find_receipt(self, pending: PendingTransaction):
+        # Any of the original or replacement transactions may be the one mined
+        for tx_hash in reversed(pending.tx_hashes):
+            try:
+                return await self.w3.eth.get_transaction_receipt(tx_hash)
+            except TransactionNotFound:
+                continue
+        return None
+    
+    async def wait_for_receipt(self, nonce: int, on_replace=None):
+        """Poll for the receipt of a nonce, replacing the transaction if it gets stuck
+
+        on_replace, if given, is awaited with the hash of each replacement.
+        Raises NonceConsumed if the nonce was mined by a transaction that is
+        not one of ours, and ReplacementLimit once TX_MAX_REPLACEMENTS fee
+        bumps, sent or failed, have not got it mined.
+        """
+        failed_replacements = 0
+        while True:
+            pending = self.nonce_manager.get_pending(nonce)
+            
+            receipt = await self._find_receipt(pending)
+            if receipt:
+                return receipt
+            
+            if pending in self.nonce_manager.stuck(self.replacement_after):
+                mined = await self.w3.eth.get_transaction_count(self.account.address, "latest")
+                if mined > nonce:
+                    # Ours may have been mined since the first look
+                    receipt = await self._find_receipt(pending)
+                    if receipt:
+                        return receipt
+                    raise NonceConsumed(nonce)
+                
+                replacements = len(pending.tx_hashes) - 1 + failed_replacements
+                if replacements >= self.max_replacements:
+                    raise ReplacementLimit(
+                        f"Transaction with nonce {nonce} not mined after {replacements} replacements"
+                    )
+                
+                tx_hash = await self.replace_transaction(nonce)
+                if tx_hash is None:
+                    failed_replacements += 1
+                elif on_replace:
+                    await on_replace(tx_hash)
+            
+            await asyncio.sleep(self.receipt_poll_interval)
+    
+    async def replace_transaction(self, nonce: int) -> Optional[str]:
+        """Rebroadcast a pending transaction with the same nonce and a higher gas price"""
+        pending = self.nonce_manager.get_pending(nonce) if self.nonce_manager else None
+        if not pending:
+            return None
+        
+        try:
+            transaction = dict(pending.transaction)
+            bumped_price = int(transaction['gasPrice'] * self.replacement_gas_bump) + 1
+            transaction['gasPrice'] = max(bumped_price, await self.w3.eth.gas_price)
+            
+            signed_txn = self.w3.eth.account.sign_transaction(transaction, self.account.key)
+            tx_hash = await self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+            
+            self.nonce_manager.track(nonce, transaction, tx_hash.hex())
+            logger.info(f"Replaced stuck transaction with nonce {nonce}: {tx_hash.hex()}")
+            return tx_hash.hex()
+        except Exception as e:
+            # Usually means the original was mined in the meantime; wait a
+            # full interval again before the next attempt
+            logger.warning(f"Failed to replace transaction with nonce {nonce}: {e}")
+            pending.postpone()
+            return None
     
     async def get_token_info(self, token_id: int) -> Dict[str, Any]:
         """Get information about a token"""
@@ -139,51 +421,202 @@ class BlockchainService:
                     }
                 }
             
-            # Get token owner
-            owner = self.contract.functions.ownerOf(token_id).call()
+            cached = self.token_cache.get(token_id)
+            if cached:
+                return dict(cached)
             
-            # Get batch info
-            batch_info = self.contract.functions.getBatchInfo(token_id).call()
+            # Owner and batch info in a single round trip
+            owner, batch_info = await self._batch_call([
+                ("ownerOf", [token_id]),
+                ("getBatchInfo", [token_id])
+            ])
+            if isinstance(owner, Exception):
+                raise owner
+            if isinstance(batch_info, Exception):
+                raise batch_info
             
-            return {
-                "token_id": token_id,
-                "owner": owner,
-                "batch_info": {
-                    "batch_id": batch_info[0],
-                    "producer": batch_info[1],
-                    "product_type": batch_info[2],
-                    "quantity": batch_info[3],
-                    "harvest_date": batch_info[4],
-                    "location": batch_info[5],
-                    "quality_score": batch_info[6],
-                    "fairness_score": batch_info[7],
-                    "current_stage": batch_info[8],
-                    "is_active": batch_info[9],
-                    "created_at": batch_info[10]
-                }
-            }
+            token_info = self._format_token_info(token_id, owner, batch_info)
+            self.token_cache.set(token_id, token_info)
+            return dict(token_info)
             
         except Exception as e:
             logger.error(f"Failed to get token info: {e}")
             raise Exception(str(e))
     
+    async def get_tokens_info(self, token_ids: List[int]) -> Dict[str, Any]:
+        """Get information about many tokens using batched RPC calls"""
+        if not self.contract:
+            return {
+                "tokens": [await self.get_token_info(token_id) for token_id in token_ids],
+                "not_found": []
+            }
+        
+        tokens = {}
+        missing = []
+        for token_id in dict.fromkeys(token_ids):
+            cached = self.token_cache.get(token_id)
+            if cached:
+                tokens[token_id] = dict(cached)
+            else:
+                missing.append(token_id)
+        
+        calls = []
+        for token_id in missing:
+            calls.append(("ownerOf", [token_id]))
+            calls.append(("getBatchInfo", [token_id]))
+        
+        # Chunks keep each batch under provider limits and are sent concurrently
+        chunks = [calls[i:i + self.rpc_batch_size] for i in range(0, len(calls), self.rpc_batch_size)]
+        results = []
+        for chunk_results in await asyncio.gather(*[self._batch_call(chunk) for chunk in chunks]):
+            results.extend(chunk_results)
+        
+        not_found = []
+        for index, token_id in enumerate(missing):
+            owner, batch_info = results[2 * index], results[2 * index + 1]
+            if isinstance(owner, Exception) or isinstance(batch_info, Exception):
+                not_found.append(token_id)
+                continue
+            
+            token_info = self._format_token_info(token_id, owner, batch_info)
+            self.token_cache.set(token_id, token_info)
+            tokens[token_id] = dict(token_info)
+        
+        return {
+            "tokens": [tokens[token_id] for token_id in dict.fromkeys(token_ids) if token_id in tokens],
+            "not_found": not_found
+        }
+    
+    def _format_token_info(self, token_id: int, owner: str, batch_info) -> Dict[str, Any]:
+        return {
+            "token_id": token_id,
+            "owner": owner,
+            "batch_info": {
+                "batch_id": batch_info[0],
+                "producer": batch_info[1],
+                "product_type": batch_info[2],
+                "quantity": batch_info[3],
+                "harvest_date": batch_info[4],
+                "location": batch_info[5],
+                "quality_score": batch_info[6],
+                "fairness_score": batch_info[7],
+                "current_stage": batch_info[8],
+                "is_active": batch_info[9],
+                "created_at": batch_info[10]
+            }
+        }
+    
+    async def _batch_call(self, calls: List[Tuple[str, List[Any]]]) -> List[Any]:
+        """Run several contract view calls in one JSON-RPC batch request
+
+        Each call is a (function name, args) pair. Results come back in the
+        same order; a call that reverted yields an Exception instead.
+        """
+        if not calls:
+            return []
+        
+        payload = []
+        for fn_name, args in calls:
+            payload.append({
+                "jsonrpc": "2.0",
+                "id": next(self._rpc_ids),
+                "method": "eth_call",
+                "params": [
+                    {"to": self.contract.address, "data": self.contract.encodeABI(fn_name=fn_name, args=args)},
+                    "latest"
+                ]
+            })
+        
+        endpoint = self.w3.provider.endpoint_uri
+        if self.session:
+            async with self.session.post(endpoint, json=payload) as response:
+                response.raise_for_status()
+                replies = await response.json()
+        else:
+            async with ClientSession(timeout=ClientTimeout(total=self.rpc_timeout)) as session:
+                async with session.post(endpoint, json=payload) as response:
+                    response.raise_for_status()
+                    replies = await response.json()
+        
+        # Batch replies may arrive in any order
+        replies_by_id = {reply.get("id"): reply for reply in replies}
+        
+        results = []
+        for request, (fn_name, args) in zip(payload, calls):
+            reply = replies_by_id.get(request["id"])
+            if not reply or "error" in reply:
+                error = reply["error"].get("message") if reply else "No reply"
+                results.append(Exception(f"{fn_name}{tuple(args)} failed: {error}"))
+                continue
+            
+            outputs = self.contract.get_function_by_name(fn_name).abi["outputs"]
+            decoded = self.w3.codec.decode(
+                [_abi_type(output) for output in outputs],
+                HexBytes(reply["result"])
+            )
+            results.append(decoded[0] if len(decoded) == 1 else decoded)
+        
+        return results
+    
     async def verify_transaction(self, tx_hash: str) -> Dict[str, Any]:
         """Verify a blockchain transaction"""
         try:
             if not self.w3:
                 return {"verified": False, "error": "Blockchain not connected"}
             
-            # Get transaction receipt
-            receipt = self.w3.eth.get_transaction_receipt(tx_hash)
+            tx_hash = tx_hash.lower()
+            receipt = await self._get_final_receipt(tx_hash)
+            
+            if not receipt:
+                # Get transaction receipt
+                tx_receipt = await self.w3.eth.get_transaction_receipt(tx_hash)
+                receipt = {
+                    "block_number": tx_receipt.blockNumber,
+                    "block_hash": tx_receipt.blockHash.hex(),
+                    "gas_used": tx_receipt.gasUsed,
+                    "status": tx_receipt.status
+                }
+            
+            head = await self.head_tracker.get_block_number()
+            confirmations = max(head - receipt["block_number"], 0)
+            finalized = confirmations >= self.finality_depth
+            
+            if finalized and "finalized" not in receipt:
+                await self._store_final_receipt(tx_hash, receipt)
             
             return {
                 "verified": True,
-                "block_number": receipt.blockNumber,
-                "gas_used": receipt.gasUsed,
-                "status": receipt.status,
-                "confirmations": self.w3.eth.block_number - receipt.blockNumber
+                "block_number": receipt["block_number"],
+                "gas_used": receipt["gas_used"],
+                "status": receipt["status"],
+                "confirmations": confirmations,
+                "finalized": finalized
             }
             
         except Exception as e:
             logger.error(f"Failed to verify transaction: {e}")
-            return {"verified": False, "error": str(e)}
\ No newline at end of file
+            return {"verified": False, "error": str(e)}
+    
+    async def _get_final_receipt(self, tx_hash: str) -> Optional[Dict[str, Any]]:
+        """Look up a finalized receipt in the in-process and MongoDB caches"""
+        receipt = self.receipt_cache.get(tx_hash)
+        if receipt:
+            return receipt
+        
+        from database.connection import db
+        if db.database is None:
+            return None
+        
+        receipt = await db.database.tx_receipts.find_one({"_id": tx_hash})
+        if receipt:
+            self.receipt_cache.set(tx_hash, receipt)
+        return receipt
+    
+    async def _store_final_receipt(self, tx_hash: str, receipt: Dict[str, Any]):
+        """Cache a finalized receipt permanently; it can no longer change"""
+        receipt = {**receipt, "_id": tx_hash, "finalized": True}
+        self.receipt_cache.set(tx_hash, receipt)
+        
+        from database.connection import db
+        if db.database is not None:
+            await db.database.tx_receipts.replace_one({"_id": tx_hash}, receipt, upsert=True)
@@ -0,0 +1,74 @@
+import asyncio
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+class LRUCache:
+    """Small bounded in-process cache with least-recently-used eviction"""
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._items: OrderedDict = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        if key not in self._items:
+            return None
+        self._items.move_to_end(key)
+        return self._items[key]
+
+    def set(self, key: Hashable, value: Any):
+        self._items[key] = value
+        self._items.move_to_end(key)
+        if len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        self._items.pop(key, None)
+
+    def clear(self):
+        self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+class HeadBlockTracker:
+    """Tracks the chain head with one RPC call per poll interval
+
+    Request handlers read the cached head instead of asking the node for
+    eth_blockNumber on every call.
+    """
+
+    def __init__(self, w3, poll_interval: float = 2.0):
+        self.w3 = w3
+        self.poll_interval = poll_interval
+        self.block_number: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if not self._task:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                self.block_number = await self.w3.eth.block_number
+            except Exception as e:
+                logger.warning(f"Failed to refresh head block: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def get_block_number(self) -> int:
+        # Without the polling task there is nothing keeping the value fresh
+        if self._task is None or self.block_number is None:
+            self.block_number = await self.w3.eth.block_number
+        return self.block_number
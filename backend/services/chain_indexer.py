@@ -0,0 +1,349 @@
+import os
+import asyncio
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from web3 import AsyncWeb3
+from services.leases import Lease
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Contract events mirrored into MongoDB
+INDEXED_EVENTS = [
+    "BatchMinted",
+    "StageUpdated",
+    "QualityAssessed",
+    "FairnessAssessed",
+    "ProducerVerified",
+    "BatchDeactivated",
+    "Transfer",
+]
+
+CURSOR_ID = "chain_indexer"
+
+class ChainIndexer:
+    """Follows TraceChain contract logs and mirrors token state into MongoDB
+
+    Logs are read with eth_getLogs in bounded block ranges and only once
+    they are `confirmations` blocks deep, so ordinary reorgs never reach
+    the mirror. The last indexed block and its hash are checkpointed; if
+    that block is later replaced, the cursor rewinds by the confirmation
+    depth, tokens and producers touched by the dropped events are rebuilt
+    from the events that remain, and the range is indexed again.
+
+    Only the worker holding the `chain_indexer` lease indexes. Every
+    worker follows the cursor and drops its cached token reads for the
+    tokens the indexer has seen events for.
+    """
+
+    def __init__(self, blockchain_service):
+        self.blockchain = blockchain_service
+        self.confirmations = int(os.getenv("INDEXER_CONFIRMATIONS", "12"))
+        self.block_range = int(os.getenv("INDEXER_BLOCK_RANGE", "2000"))
+        self.poll_interval = float(os.getenv("INDEXER_POLL_INTERVAL", "5"))
+        self.start_block = int(os.getenv("INDEXER_START_BLOCK", "0"))
+        self.lease = Lease("chain_indexer", float(os.getenv("INDEXER_LEASE_TTL", "30")))
+
+        self._task: Optional[asyncio.Task] = None
+        self._follow_task: Optional[asyncio.Task] = None
+        self._events: Dict[str, Any] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.blockchain.contract is not None
+
+    def _database(self):
+        from database.connection import db
+        return db.database
+
+    def _load_events(self):
+        """Map topic0 hashes to the contract events we follow"""
+        contract = self.blockchain.contract
+        for name in INDEXED_EVENTS:
+            event = contract.events[name]()
+            signature = f"{name}({','.join(i['type'] for i in event.abi['inputs'])})"
+            self._events[AsyncWeb3.keccak(text=signature).hex()] = event
+
+    def start(self):
+        if self.enabled and not self._task:
+            self._load_events()
+            self._task = asyncio.create_task(self.lease.run(self._run))
+            self._follow_task = asyncio.create_task(self._follow())
+
+    async def stop(self):
+        for task in (self._task, self._follow_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = None
+        self._follow_task = None
+
+    async def _run(self):
+        while True:
+            try:
+                caught_up = await self.sync_once()
+            except Exception as e:
+                logger.error(f"Chain indexer error: {e}")
+                caught_up = True
+
+            if caught_up:
+                await asyncio.sleep(self.poll_interval)
+
+    async def _follow(self):
+        """Drop cached token reads for events indexed by whichever worker leads"""
+        seen = None
+        while True:
+            try:
+                last_block = (await self.get_cursor())["last_block"]
+                if seen is not None and last_block < seen:
+                    # A rewind deleted the dropped events, so their tokens are unknown
+                    self.blockchain.token_cache.clear()
+                elif seen is not None and last_block > seen:
+                    token_ids = await self._database().chain_events.distinct(
+                        "token_id", {"block_number": {"$gt": seen, "$lte": last_block}}
+                    )
+                    for token_id in token_ids:
+                        if token_id is not None:
+                            self.blockchain.token_cache.invalidate(token_id)
+                seen = last_block
+            except Exception as e:
+                logger.error(f"Chain indexer follower error: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def get_cursor(self) -> Dict[str, Any]:
+        cursor = await self._database().indexer_state.find_one({"_id": CURSOR_ID})
+        return cursor or {"_id": CURSOR_ID, "last_block": self.start_block - 1, "last_block_hash": None}
+
+    async def sync_once(self) -> bool:
+        """Index the next block range. Returns True once caught up with the safe head."""
+        w3 = self.blockchain.w3
+        database = self._database()
+        cursor = await self.get_cursor()
+
+        head = await w3.eth.block_number
+        safe_block = head - self.confirmations
+
+        # Deep reorg: the checkpointed block is no longer canonical
+        if cursor["last_block_hash"] and cursor["last_block"] >= 0:
+            block = await w3.eth.get_block(cursor["last_block"])
+            if block["hash"].hex() != cursor["last_block_hash"]:
+                await self._rewind(cursor["last_block"] - self.confirmations)
+                return False
+
+        from_block = cursor["last_block"] + 1
+        to_block = min(safe_block, from_block + self.block_range - 1)
+
+        if to_block < from_block:
+            await database.indexer_state.update_one(
+                {"_id": CURSOR_ID},
+                {"$set": {"head_block": head, "checked_at": datetime.utcnow()}},
+                upsert=True
+            )
+            return True
+
+        logs = await w3.eth.get_logs({
+            "fromBlock": from_block,
+            "toBlock": to_block,
+            "address": self.blockchain.contract.address,
+            "topics": [list(self._events.keys())]
+        })
+
+        for log in logs:
+            event = self._events.get(log["topics"][0].hex())
+            if event:
+                await self._apply(event.process_log(log))
+
+        to_block_data = await w3.eth.get_block(to_block)
+        await database.indexer_state.update_one(
+            {"_id": CURSOR_ID},
+            {"$set": {
+                "last_block": to_block,
+                "last_block_hash": to_block_data["hash"].hex(),
+                "head_block": head,
+                "checked_at": datetime.utcnow()
+            }},
+            upsert=True
+        )
+
+        return to_block >= safe_block
+
+    async def _rewind(self, block_number: int):
+        """Drop mirrored events after block_number and index them again"""
+        block_number = max(block_number, self.start_block - 1)
+        logger.warning(f"Chain reorg detected, rewinding indexer to block {block_number}")
+
+        database = self._database()
+        dropped = {"block_number": {"$gt": block_number}}
+        token_ids = [t for t in await database.chain_events.distinct("token_id", dropped) if t is not None]
+        producers = await database.chain_events.distinct(
+            "args.producer", {**dropped, "event": "ProducerVerified"}
+        )
+        await database.chain_events.delete_many(dropped)
+        await self._rebuild(token_ids, producers)
+
+        block_hash = None
+        if block_number >= 0:
+            block = await self.blockchain.w3.eth.get_block(block_number)
+            block_hash = block["hash"].hex()
+
+        await database.indexer_state.update_one(
+            {"_id": CURSOR_ID},
+            {"$set": {"last_block": block_number, "last_block_hash": block_hash}},
+            upsert=True
+        )
+
+    async def _rebuild(self, token_ids: List[int], producers: List[str]):
+        """Recompute mirrored tokens and producers from their remaining events"""
+        if not token_ids and not producers:
+            return
+
+        database = self._database()
+        await database.chain_tokens.delete_many({"token_id": {"$in": token_ids}})
+        await database.chain_producers.delete_many({"address": {"$in": producers}})
+
+        events = database.chain_events.find({"$or": [
+            {"token_id": {"$in": token_ids}},
+            {"event": "ProducerVerified", "args.producer": {"$in": producers}}
+        ]}).sort([("block_number", 1), ("log_index", 1)])
+        async for event in events:
+            await self._fold(event["event"], event["args"], event["token_id"], event["block_number"])
+
+    async def _apply(self, event):
+        """Record an event and fold it into the mirrored state"""
+        database = self._database()
+        args = dict(event["args"])
+        name = event["event"]
+        token_id = args.get("tokenId")
+
+        await database.chain_events.update_one(
+            {"transaction_hash": event["transactionHash"].hex(), "log_index": event["logIndex"]},
+            {"$set": {
+                "event": name,
+                "token_id": token_id,
+                "block_number": event["blockNumber"],
+                "block_hash": event["blockHash"].hex(),
+                "args": {k: _to_bson(v) for k, v in args.items()}
+            }},
+            upsert=True
+        )
+        await self._fold(name, args, token_id, event["blockNumber"])
+
+    async def _fold(self, name: str, args: Dict[str, Any], token_id: Optional[int], block: int):
+        """Apply one event to the mirrored token and producer state"""
+        database = self._database()
+
+        if token_id is not None:
+            self.blockchain.token_cache.invalidate(token_id)
+
+        if name == "BatchMinted":
+            # Immutable batch fields, read as of the mint's block so a later
+            # burn or state change cannot affect a replay. The owner comes
+            # from the mint's Transfer event.
+            info = await self.blockchain.contract.functions.getBatchInfo(token_id).call(block_identifier=block)
+            await self._update_token(token_id, block, {
+                "batch_id": info[0],
+                "producer": info[1],
+                "product_type": info[2],
+                "quantity": _to_bson(info[3]),
+                "harvest_date": _to_bson(info[4]),
+                "location": info[5],
+                "created_at": info[10],
+                "minted_block": block
+            }, initial={
+                "quality_score": 0,
+                "fairness_score": 0,
+                "current_stage": "harvested",
+                "is_active": True
+            })
+        elif name == "StageUpdated":
+            await self._update_token(token_id, block, {"current_stage": args["stage"]})
+        elif name == "QualityAssessed":
+            await self._update_token(token_id, block, {"quality_score": args["qualityScore"]})
+        elif name == "FairnessAssessed":
+            await self._update_token(token_id, block, {"fairness_score": args["fairnessScore"]})
+        elif name == "BatchDeactivated":
+            await self._update_token(token_id, block, {"is_active": False})
+        elif name == "Transfer":
+            await self._update_token(token_id, block, {"owner": args["to"]})
+        elif name == "ProducerVerified":
+            await database.chain_producers.update_one(
+                {"address": args["producer"]},
+                {"$set": {"is_verified": True, "verified_at": args["timestamp"], "updated_block": block}},
+                upsert=True
+            )
+
+    async def _update_token(self, token_id: int, block: int, fields: Dict[str, Any],
+                            initial: Optional[Dict[str, Any]] = None):
+        """Set fields on a mirrored token; initial fields only if no event has set them yet"""
+        chain_tokens = self._database().chain_tokens
+        await chain_tokens.update_one(
+            {"token_id": token_id},
+            {"$set": fields, "$max": {"updated_block": block}},
+            upsert=True
+        )
+        if initial:
+            # A replayed mint must not reset state that later events changed
+            await chain_tokens.update_one(
+                {"token_id": token_id, "current_stage": {"$exists": False}},
+                {"$set": initial}
+            )
+
+    async def get_token(self, token_id: int) -> Optional[Dict[str, Any]]:
+        """Token state from the mirror, with a freshness indicator"""
+        token = await self._database().chain_tokens.find_one({"token_id": token_id})
+        if not token:
+            return None
+        return format_token(token, await self.freshness())
+
+    async def list_tokens(self, query: Dict[str, Any], skip: int = 0, limit: int = 100) -> Dict[str, Any]:
+        cursor = self._database().chain_tokens.find(query).sort("token_id", 1).skip(skip).limit(limit)
+        tokens = await cursor.to_list(length=limit)
+        freshness = await self.freshness()
+        return {
+            "tokens": [format_token(token) for token in tokens],
+            "freshness": freshness
+        }
+
+    async def freshness(self) -> Dict[str, Any]:
+        cursor = await self.get_cursor()
+        indexed_block = cursor["last_block"]
+        head_block = cursor.get("head_block")
+        return {
+            "source": "index",
+            "indexed_block": indexed_block,
+            "head_block": head_block,
+            "lag_blocks": head_block - indexed_block if head_block is not None else None,
+            "checked_at": cursor.get("checked_at")
+        }
+
+def _to_bson(value):
+    """uint256 values that do not fit in a BSON int64 are stored as strings"""
+    if isinstance(value, int) and not isinstance(value, bool) and value > 2 ** 63 - 1:
+        return str(value)
+    return value
+
+def format_token(token: Dict[str, Any], freshness: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Shape a mirrored token like BlockchainService.get_token_info"""
+    result = {
+        "token_id": token["token_id"],
+        "owner": token.get("owner"),
+        "batch_info": {
+            "batch_id": token.get("batch_id"),
+            "producer": token.get("producer"),
+            "product_type": token.get("product_type"),
+            "quantity": token.get("quantity"),
+            "harvest_date": token.get("harvest_date"),
+            "location": token.get("location"),
+            "quality_score": token.get("quality_score"),
+            "fairness_score": token.get("fairness_score"),
+            "current_stage": token.get("current_stage"),
+            "is_active": token.get("is_active"),
+            "created_at": token.get("created_at")
+        }
+    }
+    if freshness:
+        result["freshness"] = freshness
+    return result
@@ -0,0 +1,204 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+import numpy as np
+from services.chain_cache import LRUCache
+import logging
+
+logger = logging.getLogger(__name__)
+
+ALPHAS = np.array([0.1, 0.2, 0.4, 0.6, 0.8])
+BETAS = np.array([0.01, 0.05, 0.1, 0.2])
+DAMPING = 0.98
+MIN_OBSERVED_DAYS = 14
+
+def fill_gaps(series: np.ndarray) -> np.ndarray:
+    """Forward-fill NaN gaps in each row; leading gaps take the first value"""
+    valid = ~np.isnan(series)
+    columns = np.arange(series.shape[1])
+    last_valid = np.maximum.accumulate(np.where(valid, columns, 0), axis=1)
+    first_valid = valid.argmax(axis=1)
+    last_valid = np.maximum(last_valid, first_valid[:, None])
+    return np.take_along_axis(series, last_valid, axis=1)
+
+def fit_holt(series: np.ndarray, alphas: np.ndarray = ALPHAS, betas: np.ndarray = BETAS,
+             damping: float = DAMPING) -> Dict[str, np.ndarray]:
+    """Fit damped-trend Holt smoothing to every row of series at once
+
+    series is (n_series, n_days) with no gaps. Every (alpha, beta) pair on
+    the grid is run side by side as an extra leading axis, so the Python
+    loop is over days only; each series keeps the pair with the smallest
+    one-step-ahead squared error.
+    """
+    alpha = np.repeat(alphas, len(betas))[:, None]
+    beta = np.tile(betas, len(alphas))[:, None]
+    n_grid, (n_series, n_days) = len(alpha), series.shape
+
+    # One contiguous row per day, so each step reads a single block
+    days = np.ascontiguousarray(series.T)
+    level = np.broadcast_to(days[0], (n_grid, n_series)).copy()
+    trend = np.broadcast_to(days[1] - days[0], (n_grid, n_series)).copy()
+    sse = np.zeros((n_grid, n_series))
+
+    for t in range(1, n_days):
+        predicted = level + damping * trend
+        error = days[t] - predicted
+        sse += error * error
+        new_level = predicted + alpha * error
+        trend = beta * (new_level - level) + (1 - beta) * damping * trend
+        level = new_level
+
+    best = sse.argmin(axis=0)
+    rows = np.arange(n_series)
+    return {
+        "level": level[best, rows],
+        "trend": trend[best, rows],
+        "alpha": alpha[best, 0],
+        "beta": beta[best, 0],
+        "sigma": np.sqrt(sse[best, rows] / (n_days - 1))
+    }
+
+def project(level: float, trend: float, sigma: float, days: int, damping: float = DAMPING):
+    """Point forecast and 95% interval half-width for 1..days ahead"""
+    steps = np.arange(1, days + 1)
+    predicted = level + trend * np.cumsum(damping ** steps)
+    return np.maximum(predicted, 0.01), 1.96 * sigma * np.sqrt(steps)
+
+class ForecastEngine:
+    """Scheduled price forecasts for every product with stored history
+
+    Every FORECAST_INTERVAL seconds the daily closes of the last
+    FORECAST_WINDOW_DAYS days are loaded for all products in one query,
+    laid out as a (products x days) matrix and fitted in one vectorized
+    pass. Only the fitted state is kept per product; responses are built
+    from it per (product, horizon) and cached until the next fit.
+    """
+
+    def __init__(self):
+        self.interval = float(os.getenv("FORECAST_INTERVAL", "3600"))
+        self.window = int(os.getenv("FORECAST_WINDOW_DAYS", "365"))
+        self.models: Dict[str, Dict[str, Any]] = {}
+        self.fitted_at: Optional[datetime] = None
+        self.cache = LRUCache(int(os.getenv("FORECAST_CACHE_SIZE", "10000")))
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if not self._task:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Forecast refresh failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def refresh(self):
+        """Refit every product's model from the stored daily closes"""
+        from database.connection import db
+
+        midnight = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        start = midnight - timedelta(days=self.window - 1)
+        documents = await db.database.price_daily.find(
+            {"date": {"$gte": start, "$lte": midnight}},
+            {"_id": 0, "product_type": 1, "date": 1, "close": 1}
+        ).to_list(None)
+
+        # The query bounds the window, but a row outside it must never index
+        # past the series, e.g. one written with a skewed clock
+        columns = (np.array([d["date"] for d in documents], dtype="datetime64[D]") - np.datetime64(start, "D")).astype(np.int64)
+        inside = (columns >= 0) & (columns < self.window)
+        documents = [d for d, keep in zip(documents, inside.tolist()) if keep]
+        if not documents:
+            return
+
+        products, rows = np.unique([d["product_type"] for d in documents], return_inverse=True)
+        series = np.full((len(products), self.window), np.nan)
+        series[rows, columns[inside]] = [d["close"] for d in documents]
+
+        # Too little history to fit a trend; these products get no forecast
+        observed = np.count_nonzero(~np.isnan(series), axis=1)
+        keep = observed >= MIN_OBSERVED_DAYS
+        products, series = products[keep], fill_gaps(series[keep])
+        if not len(products):
+            return
+
+        # Fitting is pure NumPy; keep it off the event loop
+        fitted = await asyncio.get_running_loop().run_in_executor(None, fit_holt, series)
+
+        self.models = {
+            product: {
+                "level": float(fitted["level"][i]),
+                "trend": float(fitted["trend"][i]),
+                "sigma": float(fitted["sigma"][i]),
+                "alpha": float(fitted["alpha"][i]),
+                "beta": float(fitted["beta"][i]),
+                "last_close": float(series[i, -1])
+            }
+            for i, product in enumerate(products.tolist())
+        }
+        self.fitted_at = datetime.utcnow()
+        self.cache.clear()
+        logger.info(f"Fitted price forecasts for {len(self.models)} products")
+
+    def forecast(self, product_type: str, days: int) -> Optional[Dict[str, Any]]:
+        """Cached forecast for a product and horizon, or None without a model"""
+        key = (product_type.lower(), days)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        model = self.models.get(key[0])
+        if model is None:
+            return None
+
+        predicted, margin = project(model["level"], model["trend"], model["sigma"], days)
+        first_day = self.fitted_at.date() + timedelta(days=1)
+        forecast = [
+            {
+                "date": (first_day + timedelta(days=i)).isoformat(),
+                "predicted_price": round(float(price), 2),
+                "lower": round(float(max(price - width, 0.0)), 2),
+                "upper": round(float(price + width), 2),
+                "confidence": round(float(max(0.0, 1 - width / price)), 2)
+            }
+            for i, (price, width) in enumerate(zip(predicted, margin))
+        ]
+
+        current_price = model["last_close"]
+        final_price = float(predicted[-1])
+        result = {
+            "product_type": key[0],
+            "current_price": round(current_price, 2),
+            "forecast_period": f"{days} days",
+            "forecast": forecast,
+            "trend": {
+                "direction": "up" if final_price > current_price else "down",
+                "percentage": round(abs(final_price - current_price) / current_price * 100, 1),
+                "factors": [
+                    f"Damped trend over the last {self.window} days of prices",
+                    "Smoothing fitted to recent forecast errors"
+                ]
+            },
+            "model": {
+                "method": "damped_holt",
+                "alpha": model["alpha"],
+                "beta": model["beta"],
+                "fitted_at": self.fitted_at.isoformat()
+            }
+        }
+        self.cache.set(key, result)
+        return result
+
+forecast_engine = ForecastEngine()
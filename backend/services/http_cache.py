@@ -0,0 +1,22 @@
+import hashlib
+from typing import Optional
+
+def content_etag(body: bytes) -> str:
+    """Strong ETag derived from the response bytes"""
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+def version_etag(name: str, version: int) -> str:
+    """Weak ETag for a resource whose content is identified by a version"""
+    return f'W/"{name}-{version}"'
+
+def _opaque(tag: str) -> str:
+    return tag[2:] if tag.startswith("W/") else tag
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches etag (weak comparison)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = (tag.strip() for tag in if_none_match.split(","))
+    return any(_opaque(tag) == _opaque(etag) for tag in tags)
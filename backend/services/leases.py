@@ -0,0 +1,92 @@
+import os
+import socket
+import asyncio
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Lease:
+    """Exclusive, expiring ownership of a named role across all workers
+
+    The holder is recorded in the `leases` collection with an expiry and
+    must renew before it passes; once it has, any worker may take over.
+    Used for background loops that must run in exactly one process.
+    """
+
+    def __init__(self, name: str, ttl: float):
+        self.name = name
+        self.ttl = ttl
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{ObjectId()}"
+
+    def _collection(self):
+        from database.connection import db
+        return db.database.leases
+
+    async def acquire(self) -> bool:
+        """Take the lease if it is free or expired, or renew it if already held"""
+        now = datetime.utcnow()
+        try:
+            await self._collection().update_one(
+                {"_id": self.name, "$or": [{"owner": self.owner}, {"expires_at": {"$lte": now}}]},
+                {"$set": {"owner": self.owner, "expires_at": now + timedelta(seconds=self.ttl)}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            # Held by another worker: the upsert collided with its document
+            return False
+
+    async def release(self):
+        await self._collection().delete_one({"_id": self.name, "owner": self.owner})
+
+    async def run(self, work: Callable[[], Awaitable]):
+        """Run work() whenever this worker holds the lease
+
+        The lease is renewed every third of its TTL. If a renewal fails,
+        work() is cancelled before another worker can take over.
+        """
+        while True:
+            try:
+                held = await self.acquire()
+            except Exception as e:
+                logger.error(f"Failed to acquire {self.name} lease: {e}")
+                held = False
+
+            if not held:
+                await asyncio.sleep(self.ttl / 3)
+                continue
+
+            logger.info(f"Acquired {self.name} lease as {self.owner}")
+            task = asyncio.create_task(work())
+            try:
+                while True:
+                    await asyncio.wait({task}, timeout=self.ttl / 3)
+                    if task.done():
+                        task.result()
+                        break
+                    try:
+                        held = await self.acquire()
+                    except Exception as e:
+                        logger.error(f"Failed to renew {self.name} lease: {e}")
+                        held = False
+                    if not held:
+                        logger.warning(f"Lost {self.name} lease")
+                        break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"{self.name} failed while holding the lease: {e}")
+            finally:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                try:
+                    await self.release()
+                except Exception as e:
+                    logger.error(f"Failed to release {self.name} lease: {e}")
+
+            # Give other workers a chance before trying again
+            await asyncio.sleep(self.ttl / 3)
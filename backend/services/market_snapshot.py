@@ -0,0 +1,91 @@
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from pymongo import ReturnDocument
+from services.http_cache import version_etag
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Snapshot:
+    """One serialized version of the market trends response"""
+
+    __slots__ = ("version", "data", "body", "etag")
+
+    def __init__(self, version: int, data: Dict[str, Any]):
+        self.version = version
+        self.data = data
+        self.body = json.dumps(data, default=str).encode()
+        # Builds of the same version can differ (timestamps, fallback
+        # prices), so the tag names the version rather than hashing the body
+        self.etag = version_etag("market", version)
+
+class MarketSnapshots:
+    """Market trends built once per price tick and shared by all requests
+
+    The version is a counter in the `market_state` collection that a price
+    tick on any worker increments, so every worker sees the tick. Each
+    request reads the counter; the first one to see a new version rebuilds
+    the snapshot, and requests that arrive while it is being built wait
+    for that same build. The response is serialized once per version, so
+    serving a cached snapshot does no JSON encoding.
+
+    Listeners added with on_change() are called when this worker notices a
+    tick made by another worker, so caches the build reads can be dropped.
+    """
+
+    def __init__(self):
+        # Last version this worker has seen
+        self.version = 0
+        self._current: Optional[Snapshot] = None
+        self._building: Optional[asyncio.Future] = None
+        self._listeners: List[Callable[[], None]] = []
+
+    def _collection(self):
+        from database.connection import db
+        return db.database.market_state
+
+    def on_change(self, listener: Callable[[], None]):
+        self._listeners.append(listener)
+
+    def _seen(self, version: int, own: bool = False):
+        # Any step other than this worker's own increment came from elsewhere
+        expected = self.version + 1 if own else self.version
+        if version != expected:
+            for listener in self._listeners:
+                listener()
+        self.version = version
+
+    async def invalidate(self):
+        """Mark the current snapshot stale on every worker after a price tick"""
+        state = await self._collection().find_one_and_update(
+            {"_id": "prices"}, {"$inc": {"version": 1}},
+            upsert=True, return_document=ReturnDocument.AFTER
+        )
+        self._seen(state["version"], own=True)
+
+    async def get(self, build: Callable[[], Awaitable[Dict[str, Any]]]) -> Snapshot:
+        state = await self._collection().find_one({"_id": "prices"})
+        self._seen(state["version"] if state else 0)
+
+        current = self._current
+        if current is not None and current.version == self.version:
+            return current
+
+        if self._building is None:
+            self._building = asyncio.ensure_future(self._build(build))
+        # A cancelled request must not cancel the build other requests wait on
+        return await asyncio.shield(self._building)
+
+    async def _build(self, build: Callable[[], Awaitable[Dict[str, Any]]]) -> Snapshot:
+        version = self.version
+        try:
+            trends = await build()
+            # A tick during the build leaves this snapshot stale, so the next request rebuilds
+            snapshot = Snapshot(version, {**trends, "version": version})
+            self._current = snapshot
+            return snapshot
+        finally:
+            self._building = None
+
+market_snapshots = MarketSnapshots()
@@ -0,0 +1,103 @@
+import asyncio
+from typing import Dict, Any, List, Tuple, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+class MintAggregator:
+    """Collects mint requests and submits them as multi-mint transactions
+
+    Requests are grouped until either max_items are pending or max_wait
+    seconds have passed since the first one arrived. Each group is handed
+    to mint_many, which returns one result per batch_id. stop() flushes
+    whatever is still queued, so no caller is left waiting.
+    """
+
+    def __init__(self, mint_many, max_items: int = 20, max_wait: float = 0.2):
+        self.mint_many = mint_many
+        self.max_items = max_items
+        self.max_wait = max_wait
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        self._flushes: set = set()
+        # The group _run is currently collecting
+        self._collecting: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        # Requests still queued or being grouped are minted now rather than
+        # left waiting on a loop that no longer runs
+        items, self._collecting = self._collecting, []
+        while not self._queue.empty():
+            items.append(self._queue.get_nowait())
+        for i in range(0, len(items), self.max_items):
+            self._start_flush(items[i:i + self.max_items])
+
+        # Let submitted groups finish so callers get their results
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    async def submit(self, batch_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue a batch for minting and wait for its result"""
+        if not self.running:
+            raise RuntimeError("Mint aggregator is not running")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((batch_data, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            self._collecting = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            while len(self._collecting) < self.max_items:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    self._collecting.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Flush in the background so the next group can start collecting
+            # while this one waits for its receipt
+            items, self._collecting = self._collecting, []
+            self._start_flush(items)
+
+    def _start_flush(self, items: List[Tuple[Dict[str, Any], asyncio.Future]]):
+        flush = asyncio.create_task(self._flush(items))
+        self._flushes.add(flush)
+        flush.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, items: List[Tuple[Dict[str, Any], asyncio.Future]]):
+        try:
+            results = await self.mint_many([batch_data for batch_data, _ in items])
+        except Exception as e:
+            logger.error(f"Failed to mint batch group of {len(items)}: {e}")
+            results = {}
+            error = str(e)
+        else:
+            error = "Batch not minted"
+
+        for batch_data, future in items:
+            if future.done():
+                continue
+            result = results.get(str(batch_data["_id"]), {"success": False, "error": error})
+            future.set_result(result)
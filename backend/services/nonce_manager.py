@@ -0,0 +1,112 @@
+import asyncio
+import heapq
+import time
+from typing import Dict, Any, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+class PendingTransaction:
+    """A broadcast transaction that is still waiting for a receipt"""
+
+    def __init__(self, nonce: int, transaction: Dict[str, Any], tx_hash: str):
+        self.nonce = nonce
+        self.transaction = transaction
+        self.tx_hashes = [tx_hash]
+        self.sent_at = time.monotonic()
+
+    @property
+    def tx_hash(self) -> str:
+        return self.tx_hashes[-1]
+
+    def replaced(self, transaction: Dict[str, Any], tx_hash: str):
+        self.transaction = transaction
+        self.tx_hashes.append(tx_hash)
+        self.sent_at = time.monotonic()
+
+    def postpone(self):
+        """Restart the stuck timer without a replacement"""
+        self.sent_at = time.monotonic()
+
+class NonceManager:
+    """In-process nonce allocator for a single signer account
+
+    Nonces are handed out from a local counter so concurrent transactions
+    never share one. Nonces that were reserved but never broadcast are
+    returned to a pool and reused first, so they do not leave gaps.
+    """
+
+    def __init__(self, w3, address: str):
+        self.w3 = w3
+        self.address = address
+        self._lock = asyncio.Lock()
+        self._next_nonce: Optional[int] = None
+        self._released: List[int] = []
+        self._pending: Dict[int, PendingTransaction] = {}
+
+    async def _pending_count(self) -> int:
+        return await self.w3.eth.get_transaction_count(self.address, "pending")
+
+    async def reserve(self) -> int:
+        """Atomically reserve the next nonce for the signer"""
+        async with self._lock:
+            if self._released:
+                return heapq.heappop(self._released)
+
+            if self._next_nonce is None:
+                self._next_nonce = await self._pending_count()
+
+            nonce = self._next_nonce
+            self._next_nonce += 1
+            return nonce
+
+    async def release(self, nonce: int):
+        """Return a nonce that was reserved but never broadcast"""
+        async with self._lock:
+            if self._next_nonce is not None and nonce == self._next_nonce - 1:
+                self._next_nonce = nonce
+            else:
+                heapq.heappush(self._released, nonce)
+
+    async def resync(self):
+        """Resynchronize the local counter with the node's pending count
+
+        Used after a broadcast was rejected for its nonce (e.g. "nonce too
+        low"), which means the local view has drifted from the chain.
+        """
+        async with self._lock:
+            chain_nonce = await self._pending_count()
+            highest_pending = max(self._pending, default=chain_nonce - 1)
+
+            self._next_nonce = max(chain_nonce, highest_pending + 1)
+            self._released = [n for n in self._released if n >= chain_nonce]
+            heapq.heapify(self._released)
+
+            logger.info(f"Nonce manager resynced at {self._next_nonce} for {self.address}")
+
+    def track(self, nonce: int, transaction: Dict[str, Any], tx_hash: str) -> PendingTransaction:
+        """Record a broadcast transaction, or a replacement for it"""
+        pending = self._pending.get(nonce)
+        if pending:
+            if tx_hash not in pending.tx_hashes:
+                pending.replaced(transaction, tx_hash)
+        else:
+            pending = PendingTransaction(nonce, transaction, tx_hash)
+            self._pending[nonce] = pending
+        return pending
+
+    def complete(self, nonce: int):
+        """Forget a transaction once it has been mined"""
+        self._pending.pop(nonce, None)
+
+    def get_pending(self, nonce: int) -> Optional[PendingTransaction]:
+        return self._pending.get(nonce)
+
+    def stuck(self, max_age: float) -> List[PendingTransaction]:
+        """Transactions that have waited longer than max_age seconds"""
+        now = time.monotonic()
+        return [p for p in self._pending.values() if now - p.sent_at >= max_age]
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
@@ -0,0 +1,184 @@
+import asyncio
+import os
+from collections import Counter
+from typing import Dict, Any, List, Optional, Set
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from websocket.manager import manager
+import logging
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY = 11000
+
+class NotificationBuffer:
+    """Write-behind buffer that persists notifications with insert_many
+
+    Documents are grouped until either NOTIFICATION_FLUSH_SIZE are pending
+    or NOTIFICATION_FLUSH_MS have passed since the first one arrived. The
+    buffer holds at most NOTIFICATION_BUFFER_SIZE documents; beyond that
+    add() waits, which pushes back on whoever is producing notifications.
+    Documents carry their own _id, so a retried insert is idempotent.
+
+    Each flush also bumps the per-user unread counters in
+    `notification_counters` for the documents it stored and pushes the new
+    counts to the users' sockets. A user's counter is seeded from the
+    inbox before their first documents are inserted, so it also covers
+    notifications stored before counters existed.
+    """
+
+    def __init__(self):
+        self.max_items = int(os.getenv("NOTIFICATION_FLUSH_SIZE", "500"))
+        self.max_wait = int(os.getenv("NOTIFICATION_FLUSH_MS", "100")) / 1000
+        self.max_attempts = 3
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=int(os.getenv("NOTIFICATION_BUFFER_SIZE", "10000")))
+        self._pending: List[Dict[str, Any]] = []
+        self._flushing: Optional[asyncio.Future] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _database(self):
+        from database.connection import db
+        return db.database
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop collecting and write everything still buffered"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        # An insert in progress finishes and counts its own documents
+        if self._flushing:
+            await self._flushing
+            self._flushing = None
+
+        # The group being collected and anything still queued
+        while not self._queue.empty():
+            self._pending.append(self._queue.get_nowait())
+        pending, self._pending = self._pending, []
+        for i in range(0, len(pending), self.max_items):
+            await self._insert(pending[i:i + self.max_items])
+
+    async def add(self, documents: List[Dict[str, Any]]):
+        """Queue documents for insertion; only waits when the buffer is full"""
+        if not self.running:
+            await self._insert(documents)
+            return
+        for document in documents:
+            await self._queue.put(document)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            self._pending.append(await self._queue.get())
+            deadline = loop.time() + self.max_wait
+
+            while len(self._pending) < self.max_items:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    self._pending.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            group, self._pending = self._pending, []
+            # Shielded so stop() waits for the insert rather than interrupting
+            # it and inserting the group again, when documents the cancelled
+            # attempt stored would come back as duplicates and go uncounted
+            self._flushing = asyncio.ensure_future(self._insert(group))
+            await asyncio.shield(self._flushing)
+            self._flushing = None
+
+    async def _insert(self, documents: List[Dict[str, Any]]):
+        try:
+            await self.seed_counters({d["user_id"] for d in documents if not d.get("read")})
+        except Exception as e:
+            logger.error(f"Failed to seed unread counters: {e}")
+
+        # Set once an attempt fails in a way that may have stored some documents
+        maybe_stored = False
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                await self._database().notifications.insert_many(documents, ordered=False)
+                await self._count_unread(documents)
+                return
+            except BulkWriteError as e:
+                write_errors = e.details.get("writeErrors", [])
+                failed = {err["index"]: err["code"] for err in write_errors}
+                # Count what this attempt stored, plus duplicates stored (but
+                # never counted) by an attempt that failed before counting
+                await self._count_unread([
+                    d for i, d in enumerate(documents)
+                    if i not in failed or (maybe_stored and failed[i] == DUPLICATE_KEY)
+                ])
+
+                # Duplicates are documents an earlier attempt already stored
+                errors = [err for err in write_errors if err["code"] != DUPLICATE_KEY]
+                if not errors:
+                    return
+                documents = [documents[err["index"]] for err in errors]
+                logger.warning(f"Failed to store {len(documents)} notifications (attempt {attempt})")
+            except Exception as e:
+                maybe_stored = True
+                logger.warning(f"Failed to store {len(documents)} notifications (attempt {attempt}): {e}")
+
+            if attempt < self.max_attempts:
+                await asyncio.sleep(0.5 * attempt)
+
+        logger.error(f"Dropping {len(documents)} notifications after {self.max_attempts} attempts")
+
+    async def seed_counters(self, user_ids: Set[str]):
+        """Create missing unread counters from the users' current inboxes
+
+        Must run before new notifications for the users are inserted: the
+        count then never includes them, and they are added by $inc.
+        """
+        if not user_ids:
+            return
+
+        database = self._database()
+        existing = await database.notification_counters.distinct("_id", {"_id": {"$in": list(user_ids)}})
+        for user_id in set(user_ids) - set(existing):
+            unread = await database.notifications.count_documents({"user_id": user_id, "read": False})
+            await database.notification_counters.update_one(
+                {"_id": user_id},
+                {"$setOnInsert": {"unread": unread}},
+                upsert=True
+            )
+
+    async def _count_unread(self, documents: List[Dict[str, Any]]):
+        """Increment unread counters for newly stored notifications"""
+        try:
+            counts = Counter(d["user_id"] for d in documents if not d.get("read"))
+            if not counts:
+                return
+
+            database = self._database()
+            await database.notification_counters.bulk_write([
+                UpdateOne({"_id": user_id}, {"$inc": {"unread": count}})
+                for user_id, count in counts.items()
+            ], ordered=False)
+
+            counters = database.notification_counters.find({"_id": {"$in": list(counts)}})
+            async for counter in counters:
+                await manager.send_personal_message({
+                    "type": "unread_count",
+                    "unread": counter["unread"]
+                }, counter["_id"])
+        except Exception as e:
+            logger.error(f"Failed to update unread counters: {e}")
+
+notification_buffer = NotificationBuffer()
@@ -1,6 +1,10 @@
 import asyncio
-from typing import Dict, Any
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from bson import ObjectId
+from pymongo import ReturnDocument
 from database.connection import get_database
+from services.notification_buffer import notification_buffer
 from websocket.manager import manager
 import logging
 
@@ -17,37 +21,129 @@ class NotificationService:
         notification_type: str = "info"
     ):
         """Create and send a notification to a user"""
+        await NotificationService.create_notifications([user_id], title, message, notification_type)
+    
+    @staticmethod
+    async def create_notifications(
+        user_ids: List[str],
+        title: str,
+        message: str,
+        notification_type: str = "info"
+    ):
+        """Create and send the same notification to several users
+        
+        Ids are assigned here so the socket message goes out immediately;
+        the documents are persisted in bulk by the notification buffer.
+        """
         try:
-            from database.connection import db
-            database = db.database
-            
-            # Store notification in database
-            notification_data = {
-                "user_id": user_id,
-                "title": title,
-                "message": message,
-                "type": notification_type,
-                "read": False
-            }
-            
-            result = await database.notifications.insert_one(notification_data)
-            
-            # Send real-time notification
-            await manager.send_personal_message({
-                "type": "notification",
-                "data": {
-                    "id": str(result.inserted_id),
+            created_at = datetime.utcnow()
+            notifications = [
+                {
+                    "_id": ObjectId(),
+                    "user_id": user_id,
                     "title": title,
                     "message": message,
-                    "type": notification_type
+                    "type": notification_type,
+                    "read": False,
+                    "created_at": created_at
                 }
-            }, user_id)
+                for user_id in user_ids
+            ]
+            
+            # Send real-time notifications
+            for notification in notifications:
+                await manager.send_personal_message({
+                    "type": "notification",
+                    "data": {
+                        "id": str(notification["_id"]),
+                        "title": title,
+                        "message": message,
+                        "type": notification_type
+                    }
+                }, notification["user_id"])
+            
+            # Store notifications in database (write-behind)
+            await notification_buffer.add(notifications)
             
-            logger.info(f"Notification sent to user {user_id}: {title}")
+            logger.info(f"Notification sent to {len(user_ids)} users: {title}")
             
         except Exception as e:
             logger.error(f"Failed to create notification: {e}")
     
+    @staticmethod
+    async def list_notifications(
+        user_id: str,
+        before: Optional[str] = None,
+        limit: int = 20,
+        unread_only: bool = False
+    ) -> Dict[str, Any]:
+        """Newest-first page of a user's inbox, keyset-paginated on _id"""
+        from database.connection import db
+        
+        query: Dict[str, Any] = {"user_id": user_id}
+        if before:
+            query["_id"] = {"$lt": ObjectId(before)}
+        if unread_only:
+            query["read"] = False
+        
+        cursor = db.database.notifications.find(query).sort("_id", -1).limit(limit)
+        notifications = [format_notification(n) async for n in cursor]
+        
+        return {
+            "notifications": notifications,
+            "next_before": notifications[-1]["id"] if len(notifications) == limit else None,
+            "unread": await NotificationService.get_unread_count(user_id)
+        }
+    
+    @staticmethod
+    async def get_unread_count(user_id: str) -> int:
+        """Unread badge count, read from the maintained counter"""
+        from database.connection import db
+        database = db.database
+        
+        counter = await database.notification_counters.find_one({"_id": user_id})
+        if counter is None:
+            # First read for this user: seed the counter from the inbox
+            await notification_buffer.seed_counters({user_id})
+            counter = await database.notification_counters.find_one({"_id": user_id})
+        return counter["unread"]
+    
+    @staticmethod
+    async def mark_read(user_id: str, notification_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Mark some (or, without ids, all) of a user's notifications as read"""
+        from database.connection import db
+        database = db.database
+        
+        query: Dict[str, Any] = {"user_id": user_id, "read": False}
+        if notification_ids is not None:
+            query["_id"] = {"$in": [ObjectId(i) for i in notification_ids]}
+        
+        result = await database.notifications.update_many(
+            query,
+            {"$set": {"read": True, "read_at": datetime.utcnow()}}
+        )
+        
+        unread = await NotificationService._adjust_unread(user_id, -result.modified_count)
+        return {"marked_read": result.modified_count, "unread": unread}
+    
+    @staticmethod
+    async def _adjust_unread(user_id: str, delta: int) -> int:
+        from database.connection import db
+        
+        counter = await db.database.notification_counters.find_one_and_update(
+            {"_id": user_id},
+            [{"$set": {"unread": {"$max": [0, {"$add": ["$unread", delta]}]}}}],
+            return_document=ReturnDocument.AFTER
+        )
+        # No counter yet: seeding counts the inbox as it is now, after the change
+        unread = counter["unread"] if counter else await NotificationService.get_unread_count(user_id)
+        
+        await manager.send_personal_message({
+            "type": "unread_count",
+            "unread": unread
+        }, user_id)
+        return unread
+    
     @staticmethod
     async def notify_batch_status_change(
         batch_id: str,
@@ -129,4 +225,15 @@ class NotificationService:
             title="Price Alert",
             message=message,
             notification_type="info"
-        )
\ No newline at end of file
+        )
+
+def format_notification(notification: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": str(notification["_id"]),
+        "title": notification["title"],
+        "message": notification["message"],
+        "type": notification["type"],
+        "read": notification["read"],
+        "created_at": notification.get("created_at"),
+        "read_at": notification.get("read_at")
+    }
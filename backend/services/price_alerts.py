@@ -0,0 +1,280 @@
+import asyncio
+import os
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from bson import ObjectId
+import logging
+
+logger = logging.getLogger(__name__)
+
+DIRECTIONS = ("above", "below")
+
+class ThresholdList:
+    """Alert thresholds for one product and direction, kept sorted
+
+    Thresholds and alert ids are parallel lists so the thresholds can be
+    searched with bisect directly.
+    """
+
+    __slots__ = ("thresholds", "ids")
+
+    def __init__(self):
+        self.thresholds: List[float] = []
+        self.ids: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, threshold: float, alert_id: str):
+        i = bisect_right(self.thresholds, threshold)
+        self.thresholds.insert(i, threshold)
+        self.ids.insert(i, alert_id)
+
+    def remove(self, threshold: float, alert_id: str) -> bool:
+        i = bisect_left(self.thresholds, threshold)
+        while i < len(self.thresholds) and self.thresholds[i] == threshold:
+            if self.ids[i] == alert_id:
+                del self.thresholds[i]
+                del self.ids[i]
+                return True
+            i += 1
+        return False
+
+    def pop_at_or_below(self, price: float) -> List[Tuple[float, str]]:
+        """Remove and return every threshold <= price"""
+        k = bisect_right(self.thresholds, price)
+        fired = list(zip(self.thresholds[:k], self.ids[:k]))
+        del self.thresholds[:k]
+        del self.ids[:k]
+        return fired
+
+    def pop_at_or_above(self, price: float) -> List[Tuple[float, str]]:
+        """Remove and return every threshold >= price"""
+        k = bisect_left(self.thresholds, price)
+        fired = list(zip(self.thresholds[k:], self.ids[k:]))
+        del self.thresholds[k:]
+        del self.ids[k:]
+        return fired
+
+class PriceAlertIndex:
+    """In-memory index of active price alerts
+
+    Each product has one sorted threshold list per direction. A price tick
+    bisects both lists, so it only touches the alerts that fire instead of
+    scanning every alert for the product. Alerts are one-shot and leave the
+    index when they fire.
+    """
+
+    def __init__(self):
+        self.products: Dict[str, Dict[str, ThresholdList]] = defaultdict(
+            lambda: {direction: ThresholdList() for direction in DIRECTIONS}
+        )
+        # alert id -> (product, direction, threshold, user id)
+        self.alerts: Dict[str, Tuple[str, str, float, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.alerts)
+
+    def add(self, alert_id: str, user_id: str, product: str, direction: str, threshold: float):
+        self.products[product][direction].add(threshold, alert_id)
+        self.alerts[alert_id] = (product, direction, threshold, user_id)
+
+    def load(self, alerts: List[Dict[str, Any]]):
+        """Rebuild the index from stored alerts, sorting each list once"""
+        grouped: Dict[Tuple[str, str], List[Tuple[float, str]]] = defaultdict(list)
+        self.products.clear()
+        self.alerts.clear()
+        for alert in alerts:
+            alert_id = str(alert["_id"])
+            key = (alert["product_type"], alert["direction"])
+            grouped[key].append((alert["threshold"], alert_id))
+            self.alerts[alert_id] = (*key, alert["threshold"], alert["user_id"])
+
+        for (product, direction), entries in grouped.items():
+            entries.sort()
+            thresholds = self.products[product][direction]
+            thresholds.thresholds = [threshold for threshold, _ in entries]
+            thresholds.ids = [alert_id for _, alert_id in entries]
+
+    def remove(self, alert_id: str) -> bool:
+        alert = self.alerts.pop(alert_id, None)
+        if alert is None:
+            return False
+        product, direction, threshold, _ = alert
+        return self.products[product][direction].remove(threshold, alert_id)
+
+    def evaluate(self, product: str, price: float) -> List[Dict[str, Any]]:
+        """Remove and return the alerts triggered by a price for product"""
+        lists = self.products.get(product)
+        if lists is None:
+            return []
+
+        fired = [
+            ("above", threshold, alert_id) for threshold, alert_id in lists["above"].pop_at_or_below(price)
+        ] + [
+            ("below", threshold, alert_id) for threshold, alert_id in lists["below"].pop_at_or_above(price)
+        ]
+        if not lists["above"] and not lists["below"]:
+            del self.products[product]
+
+        triggered = []
+        for direction, threshold, alert_id in fired:
+            user_id = self.alerts.pop(alert_id)[3]
+            triggered.append({
+                "id": alert_id,
+                "user_id": user_id,
+                "product_type": product,
+                "direction": direction,
+                "threshold": threshold
+            })
+        return triggered
+
+class PriceAlertService:
+    """Price alert subscriptions, persisted in `price_alerts`
+
+    Every worker keeps its own index, rebuilt from active alerts at startup
+    and kept in step with its own changes. Alerts created by other workers
+    are picked up every PRICE_ALERT_REFRESH_INTERVAL seconds. The index only
+    proposes candidates: on_price() fires an alert by moving it from active
+    to triggered in Mongo, so an alert that another worker already fired or
+    deleted is dropped without a notification.
+    """
+
+    def __init__(self):
+        self.index = PriceAlertIndex()
+        self.refresh_interval = float(os.getenv("PRICE_ALERT_REFRESH_INTERVAL", "5"))
+        self.refreshed_at: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _collection(self):
+        from database.connection import db
+        return db.database.price_alerts
+
+    async def start(self):
+        await self.load()
+        if not self._task:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Price alert refresh failed: {e}")
+
+    async def load(self):
+        """Rebuild the in-memory index from the active alerts in Mongo"""
+        self.refreshed_at = datetime.utcnow()
+        alerts = await self._collection().find(
+            {"status": "active"},
+            {"user_id": 1, "product_type": 1, "direction": 1, "threshold": 1}
+        ).to_list(None)
+        self.index.load(alerts)
+        logger.info(f"Loaded {len(self.index)} active price alerts")
+
+    async def refresh(self):
+        """Add active alerts created since the last load or refresh"""
+        # Overlap the previous refresh, since other workers' clocks and
+        # in-flight inserts can land created_at slightly in the past
+        since = self.refreshed_at - timedelta(seconds=self.refresh_interval)
+        self.refreshed_at = datetime.utcnow()
+        alerts = await self._collection().find(
+            {"status": "active", "created_at": {"$gte": since}},
+            {"user_id": 1, "product_type": 1, "direction": 1, "threshold": 1}
+        ).to_list(None)
+        for alert in alerts:
+            alert_id = str(alert["_id"])
+            if alert_id not in self.index.alerts:
+                self.index.add(
+                    alert_id, alert["user_id"], alert["product_type"], alert["direction"], alert["threshold"]
+                )
+
+    async def create_alert(self, user_id: str, product_type: str, direction: str, threshold: float) -> Dict[str, Any]:
+        alert = {
+            "_id": ObjectId(),
+            "user_id": user_id,
+            "product_type": product_type.lower(),
+            "direction": direction,
+            "threshold": threshold,
+            "status": "active",
+            "created_at": datetime.utcnow()
+        }
+        await self._collection().insert_one(alert)
+        self.index.add(str(alert["_id"]), user_id, alert["product_type"], direction, threshold)
+        return format_alert(alert)
+
+    async def list_alerts(self, user_id: str, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        query: Dict[str, Any] = {"user_id": user_id}
+        if status:
+            query["status"] = status
+        alerts = await self._collection().find(query).sort("_id", -1).to_list(None)
+        return [format_alert(alert) for alert in alerts]
+
+    async def delete_alert(self, alert_id: str) -> bool:
+        result = await self._collection().delete_one({"_id": ObjectId(alert_id)})
+        self.index.remove(alert_id)
+        return result.deleted_count > 0
+
+    async def on_price(self, product_type: str, price: float):
+        """Fire the alerts crossed by a new price for product_type"""
+        triggered = self.index.evaluate(product_type.lower(), price)
+        if not triggered:
+            return
+
+        results = await asyncio.gather(
+            *[self._fire(alert, product_type, price) for alert in triggered], return_exceptions=True
+        )
+        for alert, result in zip(triggered, results):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to notify price alert {alert['id']}: {result}")
+
+    async def _fire(self, alert: Dict[str, Any], product_type: str, price: float):
+        from services.notification_service import NotificationService
+
+        # Only the worker whose update claims the alert notifies
+        try:
+            claimed = await self._collection().find_one_and_update(
+                {"_id": ObjectId(alert["id"]), "status": "active"},
+                {"$set": {"status": "triggered", "triggered_at": datetime.utcnow(), "triggered_price": price}},
+                projection={"_id": 1}
+            )
+        except Exception as e:
+            # Still active in Mongo, so put it back for the next tick
+            logger.error(f"Failed to claim price alert {alert['id']}: {e}")
+            if alert["id"] not in self.index.alerts:
+                self.index.add(
+                    alert["id"], alert["user_id"], alert["product_type"], alert["direction"], alert["threshold"]
+                )
+            return
+        if claimed is None:
+            return
+        await NotificationService.notify_price_alert(
+            alert["user_id"], product_type, price, alert["threshold"], alert["direction"]
+        )
+
+def format_alert(alert: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": str(alert["_id"]),
+        "user_id": alert["user_id"],
+        "product_type": alert["product_type"],
+        "direction": alert["direction"],
+        "threshold": alert["threshold"],
+        "status": alert["status"],
+        "created_at": alert.get("created_at"),
+        "triggered_at": alert.get("triggered_at"),
+        "triggered_price": alert.get("triggered_price")
+    }
+
+price_alerts = PriceAlertService()
@@ -0,0 +1,87 @@
+import asyncio
+import os
+from typing import Dict, Optional, Tuple
+from websocket.encoding import Frame
+from websocket.manager import manager
+import logging
+
+logger = logging.getLogger(__name__)
+
+TOPIC = "prices"
+
+# product -> [price, change_24h]
+Quote = Tuple[float, float]
+
+class PriceFeed:
+    """Streams price changes to sockets subscribed to the `prices` topic
+
+    Ticks are conflated: changes arriving within PRICE_FEED_INTERVAL_MS of
+    the first one are merged, and one delta per interval goes out with
+    only the products whose quote differs from what was last published.
+    Messages use short keys, {"type": "prices", "p": {product: [price,
+    change_24h]}}, and MessagePack connections get them packed as usual.
+    A subscriber first receives the full market as one snapshot message.
+    """
+
+    def __init__(self):
+        self.interval = int(os.getenv("PRICE_FEED_INTERVAL_MS", "1000")) / 1000
+        self.published: Dict[str, Quote] = {}
+        self.pending: Dict[str, Quote] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        # Snapshot frame, rebuilt when the market snapshot changes
+        self._snapshot: Optional[Tuple[object, Frame]] = None
+
+    def on_prices(self, quotes: Dict[str, Quote]):
+        """Record new quotes from a price tick"""
+        for product, quote in quotes.items():
+            if self.published.get(product) == quote:
+                # Moved and came back within one interval
+                self.pending.pop(product, None)
+            else:
+                self.pending[product] = quote
+
+        if self.pending and self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_after(self.interval))
+
+    async def _flush_after(self, delay: float):
+        try:
+            if delay:
+                await asyncio.sleep(delay)
+        finally:
+            self._flush_task = None
+        await self.flush()
+
+    async def flush(self):
+        if not self.pending:
+            return
+        delta, self.pending = self.pending, {}
+        self.published.update(delta)
+        await manager.publish({"type": "prices", "p": delta}, TOPIC)
+
+    async def stop(self):
+        if self._flush_task:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+
+    async def send_snapshot(self, connection_id: str):
+        """Send the current price of every product to one connection"""
+        from services.pricing_service import PricingService
+
+        snapshot = await PricingService().get_market_snapshot()
+        if self._snapshot is None or self._snapshot[0] is not snapshot:
+            frame = Frame.from_message({
+                "type": "prices",
+                "snapshot": True,
+                "p": {
+                    product: [trend["current_price"], trend["change_24h"]]
+                    for product, trend in snapshot.data["product_trends"].items()
+                }
+            })
+            self._snapshot = (snapshot, frame)
+        await manager.send_frame(self._snapshot[1], connection_id)
+
+price_feed = PriceFeed()
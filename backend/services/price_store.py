@@ -0,0 +1,223 @@
+import asyncio
+import os
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+import numpy as np
+from pymongo import UpdateOne
+from services.chain_cache import LRUCache
+from services.market_snapshot import market_snapshots
+from services.price_alerts import price_alerts
+from services.price_feed import price_feed
+import logging
+
+logger = logging.getLogger(__name__)
+
+BAR_FIELDS = ("open", "high", "low", "close", "volume", "pv", "count")
+INTERVALS = ("daily", "weekly", "monthly")
+
+def rollup(keys: np.ndarray, bars: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Combine consecutive bars that share a key into one OHLC bar
+
+    keys must be sorted. Raw observations are bars where open, high, low
+    and close are all the observed price, so the same reduction builds
+    daily bars from observations and weekly/monthly bars from daily ones.
+    """
+    if len(keys) == 0:
+        return {"key": keys, **{field: bars[field][:0] for field in BAR_FIELDS}}
+
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(keys)]
+    return {
+        "key": keys[starts],
+        "open": bars["open"][starts],
+        "high": np.maximum.reduceat(bars["high"], starts),
+        "low": np.minimum.reduceat(bars["low"], starts),
+        "close": bars["close"][ends - 1],
+        "volume": np.add.reduceat(bars["volume"], starts),
+        "pv": np.add.reduceat(bars["pv"], starts),
+        "count": np.add.reduceat(bars["count"], starts)
+    }
+
+def bucket_dates(dates: np.ndarray, interval: str):
+    """Bucket keys for daily dates, and a function mapping keys back to start dates"""
+    if interval == "weekly":
+        # Day 0 (1970-01-01) was a Thursday; shift so weeks start on Monday
+        return (dates.astype(np.int64) + 3) // 7, lambda keys: (keys * 7 - 3).astype("datetime64[D]")
+    if interval == "monthly":
+        return dates.astype("datetime64[M]"), lambda keys: keys.astype("datetime64[D]")
+    return dates, lambda keys: keys
+
+def utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Naive UTC datetime, as Mongo stores it; naive input is taken as UTC"""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+class PriceStore:
+    """Observed prices and their OHLC/VWAP rollups
+
+    Raw observations go to the `price_observations` time-series collection.
+    Each ingest recomputes the daily bars of the days it touched from the
+    raw data and stores them in `price_daily`; weekly and monthly bars are
+    reduced from the daily ones on request. Daily bars are cached per
+    product as NumPy arrays (PRICE_HISTORY_CACHE_SIZE products). The entry
+    is dropped when this worker ingests prices for the product and expires
+    after PRICE_HISTORY_CACHE_TTL seconds, which bounds how long prices
+    ingested by other workers take to show up; the whole cache is also
+    dropped when the market snapshot reveals another worker's ingest.
+    """
+
+    def __init__(self):
+        self.cache = LRUCache(int(os.getenv("PRICE_HISTORY_CACHE_SIZE", "1000")))
+        self.cache_ttl = float(os.getenv("PRICE_HISTORY_CACHE_TTL", "5"))
+        # Prices ingested by another worker make every cached product suspect
+        market_snapshots.on_change(self.cache.clear)
+        self._locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+    def _database(self):
+        from database.connection import db
+        return db.database
+
+    async def ingest(self, observations: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Store observed prices and refresh the affected daily bars
+
+        Raises ValueError, before storing anything, if any observation is
+        dated in the future.
+        """
+        now = datetime.utcnow()
+        documents = [
+            {
+                "product_type": o["product_type"].lower(),
+                "price": float(o["price"]),
+                "volume": float(o.get("volume", 1.0)),
+                "observed_at": utc(o.get("observed_at")) or now
+            }
+            for o in observations
+        ]
+        for document in documents:
+            if document["observed_at"] > now:
+                raise ValueError(f"observed_at {document['observed_at'].isoformat()} is in the future")
+        await self._database().price_observations.insert_many(documents, ordered=False)
+
+        days: Dict[str, set] = defaultdict(set)
+        for document in documents:
+            observed_at = document["observed_at"]
+            days[document["product_type"]].add(datetime(observed_at.year, observed_at.month, observed_at.day))
+
+        for product, touched in days.items():
+            await self._refresh_days(product, touched)
+        try:
+            await market_snapshots.invalidate()
+        except Exception as e:
+            logger.error(f"Failed to invalidate the market snapshot: {e}")
+
+        quotes = {}
+        for product in days:
+            latest = await self.latest(product)
+            if latest:
+                quotes[product] = (round(latest["price"], 2), round(latest["change"], 1))
+                await price_alerts.on_price(product, latest["price"])
+        price_feed.on_prices(quotes)
+
+        return {"stored": len(documents), "products": sorted(days)}
+
+    async def _refresh_days(self, product: str, days: set):
+        database = self._database()
+        start = min(days)
+        end = max(days) + timedelta(days=1)
+
+        # Serialized per product so a slower refresh can't overwrite a newer one
+        async with self._locks[product]:
+            documents = await database.price_observations.find(
+                {"product_type": product, "observed_at": {"$gte": start, "$lt": end}},
+                {"_id": 0, "price": 1, "volume": 1, "observed_at": 1}
+            ).sort("observed_at", 1).to_list(None)
+            if not documents:
+                return
+
+            observed_at = np.array([d["observed_at"] for d in documents], dtype="datetime64[ms]")
+            price = np.array([d["price"] for d in documents], dtype=np.float64)
+            volume = np.array([d["volume"] for d in documents], dtype=np.float64)
+            bars = rollup(observed_at.astype("datetime64[D]"), {
+                "open": price, "high": price, "low": price, "close": price,
+                "volume": volume, "pv": price * volume, "count": np.ones(len(price), dtype=np.int64)
+            })
+
+            # Last observation of each day, for last_updated
+            day_keys = observed_at.astype("datetime64[D]")
+            last_at = observed_at[np.r_[np.flatnonzero(day_keys[1:] != day_keys[:-1]), len(day_keys) - 1]]
+
+            updates = []
+            for i, day in enumerate(bars["key"].astype("datetime64[s]").tolist()):
+                if day not in days:
+                    continue
+                updates.append(UpdateOne(
+                    {"product_type": product, "date": day},
+                    {"$set": {
+                        **{field: bars[field][i].item() for field in BAR_FIELDS},
+                        "last_at": last_at[i].item()
+                    }},
+                    upsert=True
+                ))
+            if updates:
+                await database.price_daily.bulk_write(updates, ordered=False)
+            self.cache.invalidate(product)
+
+    async def products(self) -> List[str]:
+        """Every product with stored prices"""
+        return await self._database().price_daily.distinct("product_type")
+
+    async def daily_bars(self, product: str) -> Dict[str, Any]:
+        """All daily bars for a product as NumPy arrays, oldest first"""
+        product = product.lower()
+        cached = self.cache.get(product)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+
+        documents = await self._database().price_daily.find(
+            {"product_type": product},
+            {"_id": 0, "date": 1, "last_at": 1, **{field: 1 for field in BAR_FIELDS}}
+        ).sort("date", 1).to_list(None)
+
+        bars = {
+            "date": np.array([d["date"] for d in documents], dtype="datetime64[D]"),
+            **{field: np.array([d[field] for d in documents], dtype=np.float64) for field in BAR_FIELDS},
+            "last_at": documents[-1]["last_at"] if documents else None
+        }
+        self.cache.set(product, (time.monotonic() + self.cache_ttl, bars))
+        return bars
+
+    async def latest(self, product: str) -> Optional[Dict[str, Any]]:
+        """Most recent observed price and its change from the previous day's close"""
+        bars = await self.daily_bars(product)
+        if not len(bars["date"]):
+            return None
+
+        close = bars["close"]
+        return {
+            "price": float(close[-1]),
+            "change": float((close[-1] / close[-2] - 1) * 100) if len(close) > 1 else 0.0,
+            "last_updated": bars["last_at"]
+        }
+
+    async def history(self, product: str, days: int, interval: str = "daily") -> Dict[str, List]:
+        """OHLC/VWAP bars covering the last `days` days"""
+        bars = await self.daily_bars(product)
+        start = np.datetime64(datetime.utcnow().date(), "D") - days
+        i = np.searchsorted(bars["date"], start)
+
+        keys, to_dates = bucket_dates(bars["date"][i:], interval)
+        rolled = rollup(keys, {field: bars[field][i:] for field in BAR_FIELDS})
+        return {
+            "date": np.datetime_as_string(to_dates(rolled["key"]), unit="D").tolist(),
+            "open": rolled["open"].round(2).tolist(),
+            "high": rolled["high"].round(2).tolist(),
+            "low": rolled["low"].round(2).tolist(),
+            "close": rolled["close"].round(2).tolist(),
+            "vwap": (rolled["pv"] / rolled["volume"]).round(2).tolist(),
+            "volume": rolled["volume"].round(3).tolist()
+        }
+
+price_store = PriceStore()
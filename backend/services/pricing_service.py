@@ -1,6 +1,10 @@
+import asyncio
 import random
-from datetime import datetime, timedelta
-from typing import Dict, Any, List
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from services.forecasting import forecast_engine
+from services.market_snapshot import Snapshot, market_snapshots
+from services.price_store import price_store
 import logging
 
 logger = logging.getLogger(__name__)
@@ -29,6 +33,18 @@ class PricingService:
         """Get current price for a product type"""
         try:
             product_key = product_type.lower()
+            latest = await price_store.latest(product_key)
+            if latest:
+                return {
+                    "product_type": product_type,
+                    "current_price": round(latest["price"], 2),
+                    "price_change_24h": round(latest["change"], 1),
+                    "currency": "USD",
+                    "unit": "per kg",
+                    "last_updated": latest["last_updated"].isoformat()
+                }
+            
+            # No observed prices yet; fall back to a simulated quote
             base_price = self.base_prices.get(product_key, 5.00)
             
             # Add market volatility (±15%)
@@ -51,98 +67,49 @@ class PricingService:
             logger.error(f"Failed to get current price: {e}")
             raise Exception(f"Price lookup failed: {str(e)}")
     
-    async def get_price_forecast(self, product_type: str, days: int = 30) -> Dict[str, Any]:
-        """Get price forecast for a product type"""
-        try:
-            current_price_data = await self.get_current_price(product_type)
-            current_price = current_price_data["current_price"]
-            
-            forecast = []
-            price = current_price
-            
-            for i in range(1, days + 1):
-                # Simulate price movement with trend and randomness
-                trend = random.uniform(-0.02, 0.03)  # Slight upward bias
-                daily_change = random.uniform(-0.05, 0.05)  # Daily volatility
-                
-                price = price * (1 + trend + daily_change)
-                confidence = max(0.5, 1.0 - (i * 0.01))  # Decreasing confidence over time
-                
-                forecast_date = datetime.utcnow() + timedelta(days=i)
-                forecast.append({
-                    "date": forecast_date.strftime("%Y-%m-%d"),
-                    "predicted_price": round(price, 2),
-                    "confidence": round(confidence, 2)
-                })
-            
-            # Determine overall trend
-            final_price = forecast[-1]["predicted_price"]
-            trend_direction = "up" if final_price > current_price else "down"
-            trend_percentage = abs((final_price - current_price) / current_price * 100)
-            
-            return {
-                "product_type": product_type,
-                "current_price": current_price,
-                "forecast_period": f"{days} days",
-                "forecast": forecast,
-                "trend": {
-                    "direction": trend_direction,
-                    "percentage": round(trend_percentage, 1),
-                    "factors": [
-                        "Seasonal demand patterns",
-                        "Weather conditions",
-                        "Supply chain efficiency",
-                        "Market competition"
-                    ]
-                }
-            }
-            
-        except Exception as e:
-            logger.error(f"Failed to generate price forecast: {e}")
-            raise Exception(f"Price forecast failed: {str(e)}")
+    async def get_price_forecast(self, product_type: str, days: int = 30) -> Optional[Dict[str, Any]]:
+        """Get the scheduled price forecast for a product type, if it has one"""
+        return forecast_engine.forecast(product_type, days)
     
-    async def get_price_history(self, product_type: str, period: str = "30d") -> Dict[str, Any]:
-        """Get price history for a product type"""
+    async def get_price_history(self, product_type: str, period: str = "30d", interval: str = "daily") -> Dict[str, Any]:
+        """Get OHLC/VWAP price history for a product type from the stored rollups"""
         try:
             # Parse period
             if period.endswith('d'):
                 days = int(period[:-1])
             elif period.endswith('m'):
                 days = int(period[:-1]) * 30
+            elif period.endswith('y'):
+                days = int(period[:-1]) * 365
             else:
                 days = 30
             
-            current_price_data = await self.get_current_price(product_type)
-            current_price = current_price_data["current_price"]
-            
-            history = []
-            price = current_price
-            
-            # Generate historical data (working backwards)
-            for i in range(days, 0, -1):
-                # Simulate historical price movement
-                daily_change = random.uniform(-0.03, 0.03)
-                price = price * (1 + daily_change)
-                
-                history_date = datetime.utcnow() - timedelta(days=i)
-                history.append({
-                    "date": history_date.strftime("%Y-%m-%d"),
-                    "price": round(price, 2)
-                })
-            
-            # Add current price
-            history.append({
-                "date": datetime.utcnow().strftime("%Y-%m-%d"),
-                "price": current_price
-            })
+            bars = await price_store.history(product_type, days, interval)
+            history = [
+                {
+                    "date": date,
+                    "price": close,
+                    "open": open_,
+                    "high": high,
+                    "low": low,
+                    "close": close,
+                    "vwap": vwap,
+                    "volume": volume
+                }
+                for date, open_, high, low, close, vwap, volume in zip(
+                    bars["date"], bars["open"], bars["high"], bars["low"],
+                    bars["close"], bars["vwap"], bars["volume"]
+                )
+            ]
             
             return {
                 "product_type": product_type,
                 "period": period,
+                "interval": interval,
                 "price_history": history,
-                "min_price": round(min(h["price"] for h in history), 2),
-                "max_price": round(max(h["price"] for h in history), 2),
-                "avg_price": round(sum(h["price"] for h in history) / len(history), 2)
+                "min_price": min(bars["low"]) if history else None,
+                "max_price": max(bars["high"]) if history else None,
+                "avg_price": round(sum(bars["close"]) / len(history), 2) if history else None
             }
             
         except Exception as e:
@@ -152,15 +119,17 @@ class PricingService:
     async def get_market_trends(self) -> Dict[str, Any]:
         """Get overall market trends"""
         try:
-            trends = {}
+            products = sorted(set(self.base_prices) | set(await price_store.products()))
+            prices = await asyncio.gather(*[self.get_current_price(product) for product in products])
             
-            for product, base_price in self.base_prices.items():
-                price_data = await self.get_current_price(product)
-                trends[product] = {
+            trends = {
+                product: {
                     "current_price": price_data["current_price"],
                     "change_24h": price_data["price_change_24h"],
                     "trend": "up" if price_data["price_change_24h"] > 0 else "down"
                 }
+                for product, price_data in zip(products, prices)
+            }
             
             # Calculate market summary
             all_changes = [trends[p]["change_24h"] for p in trends]
@@ -179,4 +148,8 @@ class PricingService:
             
         except Exception as e:
             logger.error(f"Failed to get market trends: {e}")
-            raise Exception(f"Market trends lookup failed: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Market trends lookup failed: {str(e)}")
+    
+    async def get_market_snapshot(self) -> Snapshot:
+        """Serialized market trends for the current price tick"""
+        return await market_snapshots.get(self.get_market_trends)
\ No newline at end of file
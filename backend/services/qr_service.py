@@ -1,45 +1,173 @@
 import qrcode
+import qrcode.image.svg
+import asyncio
+import hashlib
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 import base64
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
+import aiofiles
+from services.chain_cache import LRUCache
+from services.http_cache import content_etag
 import logging
 
 logger = logging.getLogger(__name__)
 
+CONTENT_TYPES = {
+    "png": "image/png",
+    "jpeg": "image/jpeg",
+    "gif": "image/gif",
+    "svg": "image/svg+xml"
+}
+
+ERROR_LEVELS = {
+    "L": qrcode.constants.ERROR_CORRECT_L,
+    "M": qrcode.constants.ERROR_CORRECT_M,
+    "Q": qrcode.constants.ERROR_CORRECT_Q,
+    "H": qrcode.constants.ERROR_CORRECT_H
+}
+
+BORDER = 4
+
+def render_qr(data: str, format: str, size: Optional[int], error_level: str) -> bytes:
+    """Encode a QR code image; runs in the render pool"""
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=ERROR_LEVELS[error_level],
+        box_size=10,
+        border=BORDER,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+    if size:
+        # Largest whole-pixel modules that fit in size x size
+        qr.box_size = max(1, size // (qr.modules_count + 2 * BORDER))
+
+    buffer = BytesIO()
+    if format == "svg":
+        qr.make_image(image_factory=qrcode.image.svg.SvgPathImage).save(buffer)
+    else:
+        img = qr.make_image(fill_color="black", back_color="white")
+        if format == "jpeg":
+            # JPEG has no 1-bit mode
+            img = img.get_image().convert("L")
+        img.save(buffer, format=format.upper())
+    return buffer.getvalue()
+
+class QRImage:
+    """Encoded QR image bytes with their content type and ETag"""
+
+    __slots__ = ("content", "content_type", "etag")
+
+    def __init__(self, content: bytes, format: str):
+        self.content = content
+        self.content_type = CONTENT_TYPES[format]
+        self.etag = content_etag(content)
+
 class QRCodeService:
-    """Service for generating QR codes for batch tracking"""
-    
+    """Service for generating QR codes for batch tracking
+
+    Rendered images are cached by (url, format, size, error level): first
+    in an in-process LRU of QR_MEMORY_CACHE_SIZE images, then on disk
+    under QR_CACHE_DIR, with files named by the hash of that key. The
+    on-disk cache is unbounded and safe to delete at any time. Misses are
+    rendered in a thread pool, and concurrent requests for the same image
+    share one render.
+    """
+
     def __init__(self):
         self.base_url = "https://tracechain.com/track"  # In production, use actual domain
-    
-    def generate_batch_qr(self, batch_id: str, format: str = "png") -> Dict[str, Any]:
+        self.memory = LRUCache(int(os.getenv("QR_MEMORY_CACHE_SIZE", "1024")))
+        self.cache_dir = os.getenv("QR_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "tracechain-qr")
+        self.pool = ThreadPoolExecutor(
+            max_workers=int(os.getenv("QR_RENDER_WORKERS", "4")), thread_name_prefix="qr-render"
+        )
+        self._rendering: Dict[Tuple, asyncio.Future] = {}
+
+    async def get_image(
+        self,
+        data: str,
+        format: str = "png",
+        size: Optional[int] = None,
+        error_level: str = "L"
+    ) -> QRImage:
+        """QR image for data, from the memory or disk cache or freshly rendered"""
+        format = format.lower()
+        if format not in CONTENT_TYPES:
+            raise ValueError(f"Unsupported QR code format: {format}")
+
+        key = (data, format, size or 0, error_level)
+        image = self.memory.get(key)
+        if image is not None:
+            return image
+
+        if key not in self._rendering:
+            self._rendering[key] = asyncio.ensure_future(self._load(key))
+        # Callers that go away must not cancel a load others are waiting on
+        return await asyncio.shield(self._rendering[key])
+
+    async def _load(self, key: Tuple) -> QRImage:
+        data, format, size, error_level = key
+        digest = hashlib.sha256(repr(key).encode()).hexdigest()
+        path = os.path.join(self.cache_dir, digest[:2], f"{digest}.{format}")
+
+        try:
+            content = await self._read(path)
+            if content is None:
+                content = await asyncio.get_running_loop().run_in_executor(
+                    self.pool, render_qr, data, format, size, error_level
+                )
+                await self._write(path, content)
+
+            image = QRImage(content, format)
+            self.memory.set(key, image)
+            return image
+        finally:
+            del self._rendering[key]
+
+    async def _read(self, path: str) -> Optional[bytes]:
+        try:
+            async with aiofiles.open(path, "rb") as f:
+                return await f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"Failed to read cached QR code {path}: {e}")
+            return None
+
+    async def _write(self, path: str, content: bytes):
+        # Write then rename, so readers never see a partial file
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temporary = f"{path}.{os.getpid()}.tmp"
+            async with aiofiles.open(temporary, "wb") as f:
+                await f.write(content)
+            os.replace(temporary, path)
+        except OSError as e:
+            logger.warning(f"Failed to cache QR code {path}: {e}")
+
+    def batch_url(self, batch_id: str) -> str:
+        return f"{self.base_url}/{batch_id}"
+
+    def producer_url(self, producer_id: str) -> str:
+        return f"{self.base_url}/producer/{producer_id}"
+
+    async def generate_batch_qr(self, batch_id: str, format: str = "png") -> Dict[str, Any]:
         """Generate QR code for batch tracking"""
         try:
             # Create tracking URL
-            tracking_url = f"{self.base_url}/{batch_id}"
-            
-            # Generate QR code
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=10,
-                border=4,
-            )
-            qr.add_data(tracking_url)
-            qr.make(fit=True)
-            
-            # Create QR code image
-            img = qr.make_image(fill_color="black", back_color="white")
+            tracking_url = self.batch_url(batch_id)
+            image = await self.get_image(tracking_url, format)
             
             # Convert to base64 for API response
-            buffer = BytesIO()
-            img.save(buffer, format=format.upper())
-            img_str = base64.b64encode(buffer.getvalue()).decode()
+            img_str = base64.b64encode(image.content).decode()
             
             return {
                 "batch_id": batch_id,
                 "tracking_url": tracking_url,
-                "qr_code_data": f"data:image/{format};base64,{img_str}",
+                "qr_code_data": f"data:{image.content_type};base64,{img_str}",
                 "format": format
             }
             
@@ -47,25 +175,13 @@ class QRCodeService:
             logger.error(f"Failed to generate QR code: {e}")
             raise Exception(f"QR code generation failed: {str(e)}")
     
-    def generate_producer_qr(self, producer_id: str) -> Dict[str, Any]:
+    async def generate_producer_qr(self, producer_id: str) -> Dict[str, Any]:
         """Generate QR code for producer profile"""
         try:
-            profile_url = f"{self.base_url}/producer/{producer_id}"
-            
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=10,
-                border=4,
-            )
-            qr.add_data(profile_url)
-            qr.make(fit=True)
-            
-            img = qr.make_image(fill_color="black", back_color="white")
+            profile_url = self.producer_url(producer_id)
+            image = await self.get_image(profile_url, "png")
             
-            buffer = BytesIO()
-            img.save(buffer, format="PNG")
-            img_str = base64.b64encode(buffer.getvalue()).decode()
+            img_str = base64.b64encode(image.content).decode()
             
             return {
                 "producer_id": producer_id,
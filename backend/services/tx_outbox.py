@@ -0,0 +1,482 @@
+import os
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from web3.exceptions import TransactionNotFound
+from web3.logs import DISCARD
+import logging
+
+from services.blockchain_service import GasEstimateError, NonceConsumed, ReplacementLimit
+from services.leases import Lease
+from websocket.manager import manager
+
+logger = logging.getLogger(__name__)
+
+# Intent lifecycle
+PENDING = "pending"
+SUBMITTING = "submitting"
+SUBMITTED = "submitted"
+CONFIRMED = "confirmed"
+FAILED = "failed"
+
+class TransactionOutbox:
+    """MongoDB-backed outbox for contract transactions
+
+    Requests are stored as idempotent intents in `tx_outbox` and return
+    immediately. A submitter loop, run only by the worker holding the
+    `tx_outbox` lease, claims pending intents, signs and broadcasts them,
+    and records every transaction hash (including fee-bumped
+    replacements) before waiting on it. Pending mints are
+    claimed together, up to MINT_BATCH_SIZE at a time, and submitted as
+    one mintBatches call. The hash of a signed transaction is stored before
+    it is sent, so a new lease holder tracks it instead of submitting the
+    intent again. Results are written back once the receipt is
+    OUTBOX_CONFIRMATIONS blocks deep. Failed attempts are retried with
+    exponential backoff, and status changes are pushed to the batch's
+    producer over the WebSocket.
+    """
+
+    def __init__(self, blockchain_service):
+        self.blockchain = blockchain_service
+        self.confirmations = int(os.getenv("OUTBOX_CONFIRMATIONS", "2"))
+        self.concurrency = int(os.getenv("OUTBOX_CONCURRENCY", "10"))
+        self.max_attempts = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+        self.retry_backoff = float(os.getenv("OUTBOX_RETRY_BACKOFF", "5"))
+        self.poll_interval = float(os.getenv("OUTBOX_POLL_INTERVAL", "1"))
+
+        # A single submitter across all workers, so nonces never collide
+        self.lease = Lease("tx_outbox", float(os.getenv("OUTBOX_LEASE_TTL", "30")))
+
+        self._task: Optional[asyncio.Task] = None
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._workers: set = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.blockchain.contract is not None and self.blockchain.account is not None
+
+    def _database(self):
+        from database.connection import db
+        return db.database
+
+    async def enqueue_mint(self, batch: Dict[str, Any]) -> Dict[str, Any]:
+        """Record an intent to mint the NFT for a batch"""
+        batch_id = str(batch["_id"])
+        return await self._enqueue(
+            key=f"mint:{batch_id}",
+            kind="mint",
+            batch_id=batch_id,
+            notify_user=batch.get("producer_id"),
+            method="mintBatch",
+            args=list(self.blockchain.mint_args(batch))
+        )
+
+    async def enqueue_stage(self, batch: Dict[str, Any], event_index: int) -> Dict[str, Any]:
+        """Record an intent to anchor a supply chain event with updateStage"""
+        batch_id = str(batch["_id"])
+        event = batch["supply_chain"][event_index]
+        return await self._enqueue(
+            key=f"stage:{batch_id}:{event_index}",
+            kind="stage",
+            batch_id=batch_id,
+            notify_user=batch.get("producer_id"),
+            method="updateStage",
+            args=[batch["token_id"], event["stage"], event["location"], event["actor"], event["description"]],
+            event_index=event_index
+        )
+
+    async def enqueue_anchor(self, anchor: Dict[str, Any]) -> Dict[str, Any]:
+        """Record an intent to commit a Merkle root with anchorRoot"""
+        return await self._enqueue(
+            key=f"anchor:{anchor['root']}",
+            kind="anchor",
+            batch_id=None,
+            anchor_id=anchor["_id"],
+            method="anchorRoot",
+            args=[anchor["root"], anchor["event_count"]]
+        )
+
+    async def _enqueue(self, key: str, **fields) -> Dict[str, Any]:
+        database = self._database()
+        now = datetime.utcnow()
+        intent = {
+            "idempotency_key": key,
+            "status": PENDING,
+            "attempts": 0,
+            "tx_hashes": [],
+            "next_attempt_at": now,
+            "created_at": now,
+            "updated_at": now,
+            **fields
+        }
+
+        try:
+            await database.tx_outbox.insert_one(intent)
+        except DuplicateKeyError:
+            # Same request again: return the existing intent, reviving it if it failed
+            intent = await database.tx_outbox.find_one_and_update(
+                {"idempotency_key": key, "status": FAILED},
+                {"$set": {"status": PENDING, "attempts": 0, "next_attempt_at": now, "updated_at": now}},
+                return_document=ReturnDocument.AFTER
+            ) or await database.tx_outbox.find_one({"idempotency_key": key})
+
+        return format_intent(intent)
+
+    async def get_intent(self, intent_id: str) -> Optional[Dict[str, Any]]:
+        intent = await self._database().tx_outbox.find_one({"_id": ObjectId(intent_id)})
+        return format_intent(intent) if intent else None
+
+    async def list_intents(self, batch_id: str) -> list:
+        cursor = self._database().tx_outbox.find({"batch_id": batch_id}).sort("created_at", -1)
+        return [format_intent(intent) for intent in await cursor.to_list(length=100)]
+
+    async def start(self):
+        if not self.enabled or self._task:
+            return
+
+        # Every worker competes for the lease; only its holder submits
+        self._task = asyncio.create_task(self.lease.run(self._lead))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _lead(self):
+        """Submit intents while this worker holds the outbox lease"""
+        # Intents left in flight by the previous holder are claimed again.
+        # Those with a recorded hash resume tracking it, since it may have
+        # been sent; the others were never signed and are submitted afresh.
+        database = self._database()
+        await database.tx_outbox.update_many(
+            {"status": {"$in": [SUBMITTING, SUBMITTED]}},
+            {"$set": {"status": PENDING, "next_attempt_at": datetime.utcnow()}}
+        )
+        # Their nonces stay reserved, and the previous holder may have used
+        # nonces this worker has not seen
+        nonce_manager = self.blockchain.nonce_manager
+        async for intent in database.tx_outbox.find({"status": PENDING, "tx_hashes.0": {"$exists": True}}):
+            for tx_hash in intent["tx_hashes"]:
+                nonce_manager.track(intent["nonce"], intent["transaction"], tx_hash)
+        await nonce_manager.resync()
+
+        try:
+            await self._run()
+        finally:
+            # In-flight intents are durable and resume under the next holder
+            for worker in list(self._workers):
+                worker.cancel()
+            await asyncio.gather(*self._workers, return_exceptions=True)
+
+    async def _run(self):
+        database = self._database()
+        while True:
+            await self._slots.acquire()
+            try:
+                now = datetime.utcnow()
+                intent = await database.tx_outbox.find_one_and_update(
+                    {"status": PENDING, "next_attempt_at": {"$lte": now}},
+                    {"$set": {"status": SUBMITTING, "updated_at": now}},
+                    sort=[("next_attempt_at", 1)],
+                    return_document=ReturnDocument.AFTER
+                )
+            except Exception as e:
+                logger.error(f"Failed to claim outbox intent: {e}")
+                intent = None
+
+            if intent:
+                self._spawn(await self._claim_group(intent))
+            else:
+                self._slots.release()
+                await asyncio.sleep(self.poll_interval)
+
+    async def _claim_group(self, intent: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Claim the intents that go out in the same transaction as intent"""
+        now = datetime.utcnow()
+        if intent["tx_hashes"]:
+            # Broadcast together before, so tracked together again
+            query = {"status": PENDING, "tx_hashes": intent["tx_hashes"][0]}
+        elif intent["kind"] == "mint" and not intent.get("solo"):
+            query = {
+                "status": PENDING,
+                "kind": "mint",
+                "tx_hashes": [],
+                "solo": {"$ne": True},
+                "next_attempt_at": {"$lte": now}
+            }
+        else:
+            return [intent]
+
+        intents = [intent]
+        try:
+            while len(intents) < self.blockchain.mint_batch_size:
+                other = await self._database().tx_outbox.find_one_and_update(
+                    query,
+                    {"$set": {"status": SUBMITTING, "updated_at": now}},
+                    sort=[("next_attempt_at", 1)],
+                    return_document=ReturnDocument.AFTER
+                )
+                if not other:
+                    break
+                intents.append(other)
+        except Exception as e:
+            logger.error(f"Failed to claim outbox intents to group with {intent['_id']}: {e}")
+        return intents
+
+    def _spawn(self, intents: List[Dict[str, Any]]):
+        worker = asyncio.create_task(self._process(intents))
+        self._workers.add(worker)
+        worker.add_done_callback(self._workers.discard)
+        worker.add_done_callback(lambda _: self._slots.release())
+
+    async def _process(self, intents: List[Dict[str, Any]]):
+        try:
+            if intents[0]["tx_hashes"]:
+                intents = [await self._update(intent, SUBMITTED, {}) for intent in intents]
+            else:
+                if intents[0]["kind"] == "mint":
+                    intents = [intent for intent in intents if not await self._already_minted(intent)]
+                    if not intents:
+                        return
+                intents = await self._submit(intents)
+
+            await self._track(intents)
+        except asyncio.CancelledError:
+            raise
+        except GasEstimateError as e:
+            if len(intents) > 1:
+                await self._split(intents, str(e))
+            else:
+                await self._retry(intents[0], str(e))
+        except NonceConsumed as e:
+            # None of our hashes can be mined any more, so nothing was applied
+            await self.blockchain.nonce_manager.resync()
+            for intent in intents:
+                await self._retry(intent, str(e), resubmit=True)
+        except ReplacementLimit as e:
+            for intent in intents:
+                await self._update(intent, FAILED, {"last_error": str(e)})
+        except Exception as e:
+            for intent in intents:
+                await self._retry(intent, str(e))
+
+    async def _split(self, intents: List[Dict[str, Any]], error: str):
+        """Requeue a failed group to be submitted one intent at a time
+
+        A single bad batch reverts the whole mintBatches call, so nothing in
+        the group was minted and each intent is retried on its own.
+        """
+        logger.warning(f"Grouped mint of {len(intents)} batches failed, submitting individually: {error}")
+        for intent in intents:
+            await self._update(intent, PENDING, {
+                "solo": True,
+                "tx_hashes": [],
+                "last_error": error,
+                "next_attempt_at": datetime.utcnow()
+            })
+
+    async def _already_minted(self, intent: Dict[str, Any]) -> bool:
+        """Recover a mint whose transaction landed but was never recorded"""
+        token_id = await self.blockchain.contract.functions.batchIdToTokenId(intent["batch_id"]).call()
+        if not token_id:
+            return False
+
+        await self._write_back(intent, {"token_id": token_id})
+        await self._update(intent, CONFIRMED, {"result": {"token_id": token_id}})
+        return True
+
+    async def _submit(self, intents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        contract = self.blockchain.contract
+        if len(intents) == 1:
+            function = contract.functions[intents[0]["method"]](*intents[0]["args"])
+        else:
+            # mintBatches takes one array per mintBatch parameter
+            function = contract.functions.mintBatches(
+                *[list(column) for column in zip(*[intent["args"] for intent in intents])]
+            )
+        ids = [intent["_id"] for intent in intents]
+
+        async def before_send(nonce: int, transaction: Dict[str, Any], tx_hash: str):
+            await self._database().tx_outbox.update_many({"_id": {"$in": ids}}, {"$set": {
+                "nonce": nonce,
+                "transaction": {k: v for k, v in transaction.items() if k != "from"},
+                "tx_hashes": [tx_hash],
+                "updated_at": datetime.utcnow()
+            }})
+
+        try:
+            pending = await self.blockchain.broadcast(function, before_send=before_send)
+        except Exception:
+            # The send was rejected and its nonce handed back, so the recorded
+            # hash can never be mined
+            await self._database().tx_outbox.update_many({"_id": {"$in": ids}}, {"$set": {"tx_hashes": []}})
+            raise
+
+        fields = {
+            "nonce": pending.nonce,
+            "transaction": {k: v for k, v in pending.transaction.items() if k != "from"},
+            "tx_hashes": [pending.tx_hash]
+        }
+        return [await self._update(intent, SUBMITTED, fields) for intent in intents]
+
+    async def _track(self, intents: List[Dict[str, Any]]):
+        """Wait for the receipt, bumping fees if stuck, then for confirmations"""
+        nonce_manager = self.blockchain.nonce_manager
+        intent = intents[0]
+        nonce = intent["nonce"]
+
+        # Restore tracking for intents resumed after a restart
+        if not nonce_manager.get_pending(nonce):
+            for tx_hash in intent["tx_hashes"]:
+                nonce_manager.track(nonce, intent["transaction"], tx_hash)
+
+        async def on_replace(tx_hash: str):
+            # Keep the bumped transaction so a restart bumps from the latest price
+            transaction = nonce_manager.get_pending(nonce).transaction
+            await self._database().tx_outbox.update_many(
+                {"_id": {"$in": [i["_id"] for i in intents]}},
+                {
+                    "$push": {"tx_hashes": tx_hash},
+                    "$set": {
+                        "transaction": {k: v for k, v in transaction.items() if k != "from"},
+                        "updated_at": datetime.utcnow()
+                    }
+                }
+            )
+            for i in intents:
+                await self._notify(i, SUBMITTED, {"transaction_hash": tx_hash})
+
+        try:
+            while True:
+                receipt = await self.blockchain.wait_for_receipt(nonce, on_replace=on_replace)
+
+                if receipt.status == 0:
+                    if len(intents) > 1:
+                        await self._split(intents, "Transaction reverted")
+                        return
+                    await self._update(intent, FAILED, {"last_error": "Transaction reverted"})
+                    return
+
+                # Wait for depth, then make sure the receipt survived any reorg
+                while await self.blockchain.head_tracker.get_block_number() - receipt.blockNumber < self.confirmations:
+                    await asyncio.sleep(self.poll_interval)
+                try:
+                    await self.blockchain.w3.eth.get_transaction_receipt(receipt.transactionHash)
+                except TransactionNotFound:
+                    continue
+                break
+        finally:
+            nonce_manager.complete(nonce)
+
+        result = {
+            "transaction_hash": receipt.transactionHash.hex(),
+            "block_number": receipt.blockNumber,
+            "gas_used": receipt.gasUsed
+        }
+
+        token_ids = {}
+        if intent["kind"] == "mint":
+            result["batch_size"] = len(intents)
+            for event in self.blockchain.contract.events.BatchMinted().process_receipt(receipt, errors=DISCARD):
+                token_ids[event["args"]["batchId"]] = event["args"]["tokenId"]
+
+        for intent in intents:
+            intent_result = dict(result)
+            if intent["kind"] == "mint":
+                intent_result["token_id"] = token_ids.get(intent["batch_id"])
+            await self._write_back(intent, intent_result)
+            await self._update(intent, CONFIRMED, {"result": intent_result})
+
+    async def _write_back(self, intent: Dict[str, Any], result: Dict[str, Any]):
+        database = self._database()
+
+        if intent["kind"] == "anchor":
+            await database.anchors.update_one(
+                {"_id": intent["anchor_id"]},
+                {"$set": {
+                    "status": "anchored",
+                    "transaction_hash": result["transaction_hash"],
+                    "block_number": result["block_number"]
+                }}
+            )
+            return
+
+        batches = database.batches
+        batch_filter = {"_id": ObjectId(intent["batch_id"])}
+
+        if intent["kind"] == "mint":
+            fields = {"token_id": result["token_id"]}
+            if result.get("transaction_hash"):
+                fields["transaction_hash"] = result["transaction_hash"]
+            await batches.update_one(batch_filter, {"$set": fields})
+        elif intent["kind"] == "stage":
+            await batches.update_one(
+                batch_filter,
+                {"$set": {f"supply_chain.{intent['event_index']}.transaction_hash": result["transaction_hash"]}}
+            )
+
+    async def _retry(self, intent: Dict[str, Any], error: str, resubmit: bool = False):
+        attempts = intent.get("attempts", 0) + 1
+        logger.warning(f"Outbox intent {intent['_id']} attempt {attempts} failed: {error}")
+
+        if attempts >= self.max_attempts:
+            await self._update(intent, FAILED, {"attempts": attempts, "last_error": error})
+            return
+
+        # Broadcast intents keep their hashes, so the retry resumes tracking
+        # instead of submitting a second transaction, unless none of them
+        # can be mined any more
+        delay = self.retry_backoff * 2 ** (attempts - 1)
+        fields = {
+            "attempts": attempts,
+            "last_error": error,
+            "next_attempt_at": datetime.utcnow() + timedelta(seconds=delay)
+        }
+        if resubmit:
+            fields["tx_hashes"] = []
+        await self._update(intent, PENDING, fields)
+
+    async def _update(self, intent: Dict[str, Any], status: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+        updated = await self._database().tx_outbox.find_one_and_update(
+            {"_id": intent["_id"]},
+            {"$set": {**fields, "status": status, "updated_at": datetime.utcnow()}},
+            return_document=ReturnDocument.AFTER
+        )
+        await self._notify(updated, status, fields.get("result") or {})
+        return updated
+
+    async def _notify(self, intent: Dict[str, Any], status: str, data: Dict[str, Any]):
+        if not intent.get("notify_user"):
+            return
+        try:
+            await manager.send_personal_message({
+                "type": "transaction_status",
+                "intent_id": str(intent["_id"]),
+                "kind": intent["kind"],
+                "batch_id": intent["batch_id"],
+                "status": status,
+                "data": data
+            }, intent["notify_user"])
+        except Exception as e:
+            logger.error(f"Failed to send transaction status: {e}")
+
+def format_intent(intent: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "intent_id": str(intent["_id"]),
+        "kind": intent["kind"],
+        "batch_id": intent["batch_id"],
+        "status": intent["status"],
+        "attempts": intent.get("attempts", 0),
+        "transaction_hashes": intent.get("tx_hashes", []),
+        "result": intent.get("result"),
+        "last_error": intent.get("last_error"),
+        "created_at": intent["created_at"],
+        "updated_at": intent["updated_at"]
+    }
@@ -0,0 +1,20 @@
+import os
+from pathlib import Path
+
+import pytest
+
+BLOCKCHAIN_DIR = Path(__file__).resolve().parents[2] / "blockchain"
+
+@pytest.fixture(scope="session")
+def trace_chain_artifact() -> Path:
+    """Compiled TraceChain artifact, from TRACECHAIN_ARTIFACT or blockchain/artifacts
+
+    Tests using it are skipped, with the reason, when the artifact or
+    eth-tester is missing, so CI runs them wherever both are installed.
+    """
+    pytest.importorskip("eth_tester", reason="eth-tester is not installed (pip install -r requirements-dev.txt)")
+    path = Path(os.getenv("TRACECHAIN_ARTIFACT") or
+                BLOCKCHAIN_DIR / "artifacts" / "contracts" / "TraceChain.sol" / "TraceChain.json")
+    if not path.exists():
+        pytest.skip(f"TraceChain is not compiled: {path} is missing (run `npx hardhat compile` in blockchain/)")
+    return path
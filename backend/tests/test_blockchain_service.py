@@ -0,0 +1,130 @@
+"""BlockchainService against an in-process eth-tester chain.
+
+Needs eth-tester[py-evm] (requirements-dev.txt) and the compiled TraceChain
+artifact (`npx hardhat compile` in blockchain/, or TRACECHAIN_ARTIFACT);
+without either the tests are skipped. Run from backend/:
+
+    python -m pytest tests
+"""
+import asyncio
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from bson import ObjectId
+
+from eth_account import Account
+from web3 import AsyncWeb3
+
+from services.blockchain_service import BlockchainService
+from services.nonce_manager import NonceManager
+
+async def deploy(w3: AsyncWeb3, account, artifact: dict) -> str:
+    """Deploy TraceChain and register account as a verified producer"""
+
+    async def send(function):
+        transaction = await function.build_transaction({
+            "from": account.address,
+            "nonce": await w3.eth.get_transaction_count(account.address, "pending")
+        })
+        signed = account.sign_transaction(transaction)
+        return await w3.eth.wait_for_transaction_receipt(await w3.eth.send_raw_transaction(signed.rawTransaction))
+
+    factory = w3.eth.contract(abi=artifact["abi"], bytecode=artifact["bytecode"])
+    receipt = await send(factory.constructor())
+    contract = w3.eth.contract(address=receipt.contractAddress, abi=artifact["abi"])
+
+    await send(contract.functions.registerProducer("Test Farm", "In-process chain"))
+    await send(contract.functions.verifyProducer(account.address))
+    return receipt.contractAddress
+
+async def make_service(monkeypatch, artifact_path: Path, mint_batch_size: int = 1) -> BlockchainService:
+    from web3.providers.eth_tester import AsyncEthereumTesterProvider
+
+    artifact = json.loads(artifact_path.read_text())
+    provider = AsyncEthereumTesterProvider()
+    w3 = AsyncWeb3(provider)
+    account = Account.create()
+    funder = (await w3.eth.accounts)[0]
+    await w3.eth.send_transaction({"from": funder, "to": account.address, "value": 10 ** 20})
+    contract_address = await deploy(w3, account, artifact)
+
+    monkeypatch.setenv("CONTRACT_ADDRESS", contract_address)
+    monkeypatch.setenv("CONTRACT_ABI_PATH", str(artifact_path))
+    monkeypatch.setenv("PRIVATE_KEY", account.key.hex())
+    monkeypatch.setenv("MINT_BATCH_SIZE", str(mint_batch_size))
+    monkeypatch.setenv("MINT_BATCH_WINDOW_MS", "500")
+    monkeypatch.setenv("TX_RECEIPT_POLL_INTERVAL", "0.01")
+    service = BlockchainService()
+
+    # Point the service at the in-process chain instead of RPC_URL
+    service.w3 = w3
+    service.contract = w3.eth.contract(address=contract_address, abi=artifact["abi"])
+    service.nonce_manager = NonceManager(w3, account.address)
+    return service
+
+def make_batch() -> dict:
+    return {
+        "_id": ObjectId(),
+        "product_type": "Organic Tomatoes",
+        "quantity": 100,
+        "harvest_date": datetime.utcnow(),
+        "location": "Field 1, Green Valley Farm"
+    }
+
+def test_requests_stay_responsive_while_a_mint_is_pending(monkeypatch, trace_chain_artifact):
+    async def scenario():
+        service = await make_service(monkeypatch, trace_chain_artifact)
+        tester = service.w3.provider.ethereum_tester
+
+        # Hold the mint in the mempool until the test mines it
+        tester.disable_auto_mine_transactions()
+        mint = asyncio.create_task(service.mint_batch_nft(make_batch()))
+        while not service.nonce_manager.in_flight:
+            await asyncio.sleep(0.01)
+
+        # Other requests and the event loop keep running while the mint waits
+        lags = []
+        served = 0
+        deadline = time.perf_counter() + 1.0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lags.append(time.perf_counter() - start - 0.01)
+            await service.w3.eth.get_balance(service.account.address)
+            served += 1
+        assert not mint.done()
+        assert served >= 20
+        assert max(lags) < 0.1
+
+        tester.mine_blocks(1)
+        result = await asyncio.wait_for(mint, timeout=5)
+        assert result["success"], result
+        assert result["token_id"] == 1
+
+    asyncio.run(scenario())
+
+def test_concurrent_mints_share_one_transaction(monkeypatch, trace_chain_artifact):
+    async def scenario():
+        service = await make_service(monkeypatch, trace_chain_artifact, mint_batch_size=5)
+        service.mint_aggregator.start()
+        try:
+            batches = [make_batch() for _ in range(5)]
+            results = await asyncio.gather(*[service.mint_batch_nft(batch) for batch in batches])
+        finally:
+            await service.mint_aggregator.stop()
+
+        assert all(result["success"] for result in results), results
+        # One mintBatches transaction carried all five
+        assert len({result["transaction_hash"] for result in results}) == 1
+        assert all(result["batch_size"] == 5 for result in results)
+
+        # Each caller got the token minted for its own batch
+        assert len({result["token_id"] for result in results}) == 5
+        for batch, result in zip(batches, results):
+            token_id = await service.contract.functions.getTokenIdByBatchId(str(batch["_id"])).call()
+            assert result["token_id"] == token_id
+
+    asyncio.run(scenario())
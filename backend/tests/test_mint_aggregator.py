@@ -0,0 +1,67 @@
+"""MintAggregator grouping and shutdown, with a recording mint_many."""
+import asyncio
+
+from services.mint_aggregator import MintAggregator
+
+class RecordingMinter:
+    """mint_many stand-in that records each group and answers per batch"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.groups = []
+
+    async def __call__(self, batches):
+        self.groups.append([batch["_id"] for batch in batches])
+        await asyncio.sleep(self.delay)
+        return {
+            str(batch["_id"]): {"success": True, "token_id": i + 1, "group": len(self.groups)}
+            for i, batch in enumerate(batches)
+        }
+
+def test_concurrent_submits_are_grouped_and_answered_individually():
+    async def scenario():
+        minter = RecordingMinter()
+        aggregator = MintAggregator(minter, max_items=5, max_wait=0.5)
+        aggregator.start()
+        results = await asyncio.gather(*[aggregator.submit({"_id": f"batch-{i}"}) for i in range(5)])
+        await aggregator.stop()
+
+        assert minter.groups == [[f"batch-{i}" for i in range(5)]]
+        assert [result["token_id"] for result in results] == [1, 2, 3, 4, 5]
+
+    asyncio.run(scenario())
+
+def test_stop_flushes_queued_and_collecting_requests():
+    async def scenario():
+        minter = RecordingMinter()
+        aggregator = MintAggregator(minter, max_items=2, max_wait=60)
+        aggregator.start()
+        submits = [asyncio.create_task(aggregator.submit({"_id": f"batch-{i}"})) for i in range(5)]
+        # Two full groups go out; the fifth request sits in the collecting group
+        await asyncio.sleep(0.05)
+        assert len(minter.groups) == 2
+
+        await asyncio.wait_for(aggregator.stop(), timeout=1)
+        results = await asyncio.wait_for(asyncio.gather(*submits), timeout=1)
+
+        assert all(result["success"] for result in results)
+        assert minter.groups[-1] == ["batch-4"]
+
+    asyncio.run(scenario())
+
+def test_stop_flushes_requests_still_in_the_queue():
+    async def scenario():
+        minter = RecordingMinter()
+        aggregator = MintAggregator(minter, max_items=2, max_wait=60)
+        aggregator.start()
+        # Queued before the loop ever runs
+        submits = [asyncio.create_task(aggregator.submit({"_id": f"batch-{i}"})) for i in range(3)]
+        await asyncio.sleep(0)
+
+        await asyncio.wait_for(aggregator.stop(), timeout=1)
+        results = await asyncio.wait_for(asyncio.gather(*submits), timeout=1)
+
+        assert all(result["success"] for result in results)
+        assert sorted(sum(minter.groups, [])) == ["batch-0", "batch-1", "batch-2"]
+
+    asyncio.run(scenario())
@@ -0,0 +1,192 @@
+import abc
+import asyncio
+import os
+from typing import Callable, Dict, Optional, Set
+import logging
+
+logger = logging.getLogger(__name__)
+
+MessageHandler = Callable[[str, str], None]
+
+class Backplane(abc.ABC):
+    """Pub/sub transport that relays WebSocket frames between workers
+
+    Channels are per user, per topic and one for broadcasts. A worker only
+    subscribes to channels it holds sockets for, so the transport only
+    routes a message to workers that can deliver it.
+    """
+
+    def __init__(self):
+        self.channels: Set[str] = set()
+        self.on_message: Optional[MessageHandler] = None
+
+    async def start(self, on_message: MessageHandler):
+        self.on_message = on_message
+
+    async def stop(self):
+        self.on_message = None
+
+    @abc.abstractmethod
+    def subscribe(self, channel: str):
+        """Start receiving messages published to channel"""
+
+    @abc.abstractmethod
+    def unsubscribe(self, channel: str):
+        """Stop receiving messages published to channel"""
+
+    @abc.abstractmethod
+    async def publish(self, channel: str, payload: str):
+        """Send payload to every worker subscribed to channel"""
+
+class InMemoryHub:
+    """Routes messages between in-memory backplanes in one process"""
+
+    def __init__(self):
+        self.subscribers: Dict[str, Set["InMemoryBackplane"]] = {}
+
+    def deliver(self, channel: str, payload: str):
+        for backplane in list(self.subscribers.get(channel, ())):
+            backplane.receive(channel, payload)
+
+class InMemoryBackplane(Backplane):
+    """Backplane for a single process, or several managers in one test"""
+
+    def __init__(self, hub: Optional[InMemoryHub] = None):
+        super().__init__()
+        self.hub = hub or default_hub
+
+    async def stop(self):
+        for channel in list(self.channels):
+            self.unsubscribe(channel)
+        await super().stop()
+
+    def subscribe(self, channel: str):
+        self.channels.add(channel)
+        self.hub.subscribers.setdefault(channel, set()).add(self)
+
+    def unsubscribe(self, channel: str):
+        self.channels.discard(channel)
+        subscribers = self.hub.subscribers.get(channel)
+        if subscribers is not None:
+            subscribers.discard(self)
+            if not subscribers:
+                del self.hub.subscribers[channel]
+
+    async def publish(self, channel: str, payload: str):
+        # Deliver on the next loop iteration, like a network hop would
+        asyncio.get_running_loop().call_soon(self.hub.deliver, channel, payload)
+
+    def receive(self, channel: str, payload: str):
+        if self.on_message:
+            self.on_message(channel, payload)
+
+default_hub = InMemoryHub()
+
+class RedisBackplane(Backplane):
+    """Backplane over Redis Pub/Sub
+
+    Redis only forwards a PUBLISH to connections subscribed to the channel,
+    so workers without local subscribers never see the message. Any client
+    with the redis.asyncio interface can be passed in, e.g. fakeredis for
+    local testing.
+    """
+
+    def __init__(self, url: Optional[str] = None, prefix: Optional[str] = None, client=None):
+        super().__init__()
+        self.url = url or os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        self.prefix = prefix if prefix is not None else os.getenv("WS_BACKPLANE_PREFIX", "ws:")
+        self.client = client
+        self.pubsub = None
+        self._changes: Optional[asyncio.Queue] = None
+        self._tasks = []
+
+    async def start(self, on_message: MessageHandler):
+        await super().start(on_message)
+        if self.client is None:
+            import redis.asyncio as redis
+            self.client = redis.from_url(self.url, decode_responses=True)
+
+        self.pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        self._changes = asyncio.Queue()
+        if self.channels:
+            await self.pubsub.subscribe(*[self.prefix + c for c in self.channels])
+        self._tasks = [
+            asyncio.create_task(self._apply_changes()),
+            asyncio.create_task(self._read())
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+        if self.pubsub is not None:
+            await self.pubsub.aclose()
+            self.pubsub = None
+        await super().stop()
+
+    def subscribe(self, channel: str):
+        if channel not in self.channels:
+            self.channels.add(channel)
+            if self._changes is not None:
+                self._changes.put_nowait(("subscribe", channel))
+
+    def unsubscribe(self, channel: str):
+        if channel in self.channels:
+            self.channels.discard(channel)
+            if self._changes is not None:
+                self._changes.put_nowait(("unsubscribe", channel))
+
+    async def _apply_changes(self):
+        """Apply subscription changes in order, off the caller's path"""
+        while True:
+            action, channel = await self._changes.get()
+            try:
+                if action == "subscribe":
+                    await self.pubsub.subscribe(self.prefix + channel)
+                else:
+                    await self.pubsub.unsubscribe(self.prefix + channel)
+            except Exception as e:
+                logger.error(f"Failed to {action} backplane channel {channel}: {e}")
+
+    async def _read(self):
+        while True:
+            try:
+                message = await self.pubsub.get_message(timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Backplane read failed: {e}")
+                await asyncio.sleep(1)
+                continue
+
+            if not message or message.get("type") != "message":
+                continue
+            channel = message["channel"]
+            payload = message["data"]
+            if isinstance(channel, bytes):
+                channel = channel.decode()
+            if isinstance(payload, bytes):
+                payload = payload.decode()
+
+            if self.on_message:
+                self.on_message(channel[len(self.prefix):], payload)
+
+    async def publish(self, channel: str, payload: str):
+        await self.client.publish(self.prefix + channel, payload)
+
+def create_backplane(kind: Optional[str] = None) -> Optional[Backplane]:
+    """Backplane selected by WS_BACKPLANE: "", "memory" or "redis" """
+    kind = (kind if kind is not None else os.getenv("WS_BACKPLANE", "")).lower()
+    if not kind:
+        return None
+    if kind == "memory":
+        return InMemoryBackplane()
+    if kind == "redis":
+        return RedisBackplane()
+    raise ValueError(f"Unknown WS_BACKPLANE: {kind}")
@@ -0,0 +1,76 @@
+import json
+from typing import Any, Dict, List, Optional, Union
+
+try:
+    import msgpack
+except ImportError:  # MessagePack is optional; clients fall back to JSON
+    msgpack = None
+
+ENCODINGS = {"json", "msgpack"}
+
+def negotiate_encoding(requested: Optional[str]) -> str:
+    """Encoding for a new connection; MessagePack only if it is installed"""
+    if requested == "msgpack" and msgpack is not None:
+        return "msgpack"
+    return "json"
+
+class Frame:
+    """One outgoing message, encoded at most once per wire format
+
+    The JSON text is produced up front since every path needs it (JSON
+    clients and the backplane). MessagePack bytes are produced on first use
+    and shared by every MessagePack connection.
+    """
+
+    __slots__ = ("text", "message", "_packed")
+
+    def __init__(self, text: str, message: Optional[Dict[str, Any]] = None):
+        self.text = text
+        self.message = message
+        self._packed: Optional[bytes] = None
+
+    @classmethod
+    def from_message(cls, message: Dict[str, Any]) -> "Frame":
+        return cls(json.dumps(message), message)
+
+    def with_seq(self, seq: int) -> "Frame":
+        """Copy of this frame carrying a per-user sequence number
+
+        The number is spliced into the encoded JSON object rather than
+        re-serializing the message.
+        """
+        text = self.text[:-1] + f', "seq": {seq}}}' if self.text != "{}" else f'{{"seq": {seq}}}'
+        message = {**self.message, "seq": seq} if self.message is not None else None
+        return Frame(text, message)
+
+    def encode(self, encoding: str) -> Union[str, bytes]:
+        if encoding == "json":
+            return self.text
+        if self._packed is None:
+            message = self.message if self.message is not None else json.loads(self.text)
+            self._packed = msgpack.packb(message, use_bin_type=True)
+        return self._packed
+
+def encode_batch(frames: List[Frame], encoding: str) -> Union[str, bytes]:
+    """Wrap several frames in one {"type": "batch", "messages": [...]} frame
+
+    Already-encoded messages are spliced in as-is rather than re-encoded.
+    """
+    if encoding == "json":
+        return '{"type": "batch", "messages": [' + ", ".join(f.text for f in frames) + "]}"
+
+    packer = msgpack.Packer(use_bin_type=True)
+    head = (
+        packer.pack_map_header(2)
+        + packer.pack("type") + packer.pack("batch")
+        + packer.pack("messages") + packer.pack_array_header(len(frames))
+    )
+    return head + b"".join(f.encode(encoding) for f in frames)
+
+def decode(data: Union[str, bytes]) -> Any:
+    """Decode a client message sent as JSON text or MessagePack bytes"""
+    if isinstance(data, bytes):
+        if msgpack is None:
+            raise ValueError("MessagePack is not available")
+        return msgpack.unpackb(data, raw=False)
+    return json.loads(data)
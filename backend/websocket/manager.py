@@ -1,77 +1,620 @@
 import asyncio
 import json
-from typing import Dict, Set
+import os
+import random
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Hashable, Iterable, List, Optional, Set, Tuple
 from fastapi import WebSocket, WebSocketDisconnect
+from websocket.backplane import Backplane, create_backplane
+from websocket.encoding import Frame, encode_batch, negotiate_encoding
+from websocket.sessions import RedisSessionStore, create_session_store
+from websocket.timer_wheel import TimerWheel
 import logging
 
 logger = logging.getLogger(__name__)
 
+SLOW_CONSUMER_POLICIES = {"drop", "coalesce", "disconnect"}
+TOPIC_PREFIXES = ("batch:", "producer:", "product:")
+GLOBAL_TOPICS = {"prices"}
+
+def process_rss() -> int:
+    """Resident set size of this process in bytes"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        # Peak rather than current RSS where /proc is unavailable
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def valid_topic(topic) -> bool:
+    """Topics are `batch:{id}`, `producer:{id}`, `product:{type}` or `prices`"""
+    if not isinstance(topic, str):
+        return False
+    if topic in GLOBAL_TOPICS:
+        return True
+    return any(topic.startswith(prefix) and len(topic) > len(prefix) for prefix in TOPIC_PREFIXES)
+
+def coalesce_key(message: dict) -> Optional[Hashable]:
+    """Messages with the same key supersede each other in a backed-up queue
+
+    Only state updates about a batch or transaction are coalesced; anything
+    else (notifications, pongs) is never replaced.
+    """
+    subject = message.get("batch_id") or message.get("intent_id")
+    if subject is None:
+        return None
+    return (message.get("type"), subject)
+
+NO_TOPICS: frozenset = frozenset()
+
+# Coalescing key for heartbeat pings, which never count as writer activity
+HEARTBEAT = ("ping",)
+
+class Connection:
+    """A socket with its own bounded send queue and on-demand writer task
+
+    Producers only enqueue pre-encoded frames; the writer task is the one
+    place that awaits the socket, so a slow client only backs up its own
+    queue. With coalescing on, the writer waits up to `coalesce_interval`
+    seconds or until `coalesce_max` frames are queued and sends them as one
+    batch frame.
+
+    Idle connections are kept small: the record uses __slots__, the topic
+    set is created on first subscribe, and the queue and writer task are
+    created on the first message and retired by the heartbeat timer once
+    the writer has been idle for a whole interval.
+    """
+
+    __slots__ = (
+        "websocket", "user_id", "connection_id", "max_queue", "encoding",
+        "coalesce_interval", "coalesce_max", "queue", "ready", "full", "writer",
+        "topics", "dropped", "last_seen", "last_active"
+    )
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        user_id: str,
+        connection_id: str,
+        max_queue: int,
+        encoding: str = "json",
+        coalesce_interval: float = 0,
+        coalesce_max: int = 1
+    ):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.connection_id = connection_id
+        self.max_queue = max_queue
+        self.encoding = encoding
+        self.coalesce_interval = coalesce_interval
+        self.coalesce_max = coalesce_max
+        self.queue: Optional[Deque[Tuple[Optional[Hashable], Frame]]] = None
+        self.ready: Optional[asyncio.Event] = None
+        self.full: Optional[asyncio.Event] = asyncio.Event() if coalesce_interval else None
+        self.writer: Optional[asyncio.Task] = None
+        self.topics = NO_TOPICS
+        self.dropped = 0
+        self.last_seen = time.monotonic()
+        # When a frame other than a heartbeat was last queued
+        self.last_active = 0.0
+
+    def touch(self):
+        """Record client activity; any inbound frame counts as a heartbeat"""
+        self.last_seen = time.monotonic()
+
+    def enqueue(self, frame: Frame, key: Optional[Hashable], policy: str) -> bool:
+        """Queue a frame; returns False if the consumer should be disconnected"""
+        if self.queue is None:
+            self.queue = deque()
+
+        if len(self.queue) >= self.max_queue:
+            if policy == "disconnect":
+                return False
+            if policy == "coalesce" and key is not None:
+                # Replace the queued frame this one supersedes instead of growing
+                for i, (queued_key, _) in enumerate(self.queue):
+                    if queued_key == key:
+                        del self.queue[i]
+                        break
+            if len(self.queue) >= self.max_queue:
+                self.queue.popleft()
+            self.dropped += 1
+
+        self.queue.append((key, frame))
+        if key is not HEARTBEAT:
+            self.last_active = time.monotonic()
+        if self.ready is not None:
+            self.ready.set()
+        if self.full is not None and len(self.queue) >= self.coalesce_max:
+            self.full.set()
+        return True
+
+class Session:
+    """Replay state for one user's stream of personal messages
+
+    Every personal message gets the next sequence number and is kept in a
+    bounded ring buffer, so a reconnecting client can ask for just the
+    messages after the last one it saw. `epoch` changes whenever the
+    session is recreated, which tells the client its numbers are stale.
+    """
+
+    def __init__(self, user_id: str, buffer_size: int):
+        self.user_id = user_id
+        self.epoch = uuid.uuid4().hex[:12]
+        self.seq = 0
+        self.buffer: Deque[Tuple[int, Frame]] = deque(maxlen=buffer_size)
+
+    def append(self, frame: Frame) -> Frame:
+        self.seq += 1
+        frame = frame.with_seq(self.seq)
+        self.buffer.append((self.seq, frame))
+        return frame
+
+    def replay(self, after: int) -> Optional[List[Frame]]:
+        """Frames after `after`, or None if some were already evicted"""
+        if after > self.seq or after < 0:
+            return None
+        if after == self.seq:
+            return []
+        if not self.buffer or self.buffer[0][0] > after + 1:
+            return None
+        return [frame for seq, frame in self.buffer if seq > after]
+
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = {}
+        self.max_queue = int(os.getenv("WS_SEND_QUEUE_SIZE", "256"))
+        self.max_topics = int(os.getenv("WS_MAX_TOPICS", "100"))
+        self.coalesce_interval = int(os.getenv("WS_COALESCE_MS", "0")) / 1000
+        self.coalesce_max = int(os.getenv("WS_COALESCE_MAX", "50"))
+        self.slow_consumer_policy = os.getenv("WS_SLOW_CONSUMER_POLICY", "coalesce")
+        if self.slow_consumer_policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"Unknown WS_SLOW_CONSUMER_POLICY: {self.slow_consumer_policy}")
+
+        self.active_connections: Dict[str, Connection] = {}
         self.user_connections: Dict[str, Set[str]] = {}
+        # Reverse index so cleanup never has to scan user_connections
+        self.connection_users: Dict[str, str] = {}
+        # Inverted index so a publish only visits that topic's subscribers
+        self.topic_connections: Dict[str, Set[str]] = {}
+        self._closing: Set[asyncio.Task] = set()
+
+        # Sessions outlive their sockets for WS_SESSION_TTL seconds so a
+        # reconnect can resume; idle sessions are ordered by expiry. With a
+        # shared store they live there instead, so a client can resume on
+        # any worker; otherwise each worker has its own and a user's
+        # sockets must all be routed to the same worker.
+        self.replay_buffer = int(os.getenv("WS_REPLAY_BUFFER", "256"))
+        self.session_ttl = float(os.getenv("WS_SESSION_TTL", "300"))
+        self.sessions: Dict[str, Session] = {}
+        self._idle_sessions: OrderedDict = OrderedDict()
+        self.shared_sessions: Optional[RedisSessionStore] = None
+        self._touching: Set[asyncio.Task] = set()
+
+        # One wheel drives heartbeats and idle reaping for every socket
+        self.heartbeat_interval = float(os.getenv("WS_HEARTBEAT_INTERVAL", "30"))
+        self.idle_timeout = float(os.getenv("WS_IDLE_TIMEOUT", "90"))
+        self.timers = TimerWheel(self._on_timer, tick=float(os.getenv("WS_TIMER_TICK", "1")))
+        self.reaped = 0
+
+        # Relays messages to connections held by other workers
+        self.worker_id = uuid.uuid4().hex
+        self.backplane: Optional[Backplane] = None
+
+    async def start(self, backplane: Optional[Backplane] = None, sessions: Optional[RedisSessionStore] = None):
+        self.timers.start()
+        self.shared_sessions = sessions or create_session_store(self.replay_buffer, self.session_ttl)
+        if self.shared_sessions:
+            await self.shared_sessions.start()
+
+        self.backplane = backplane or create_backplane()
+        if not self.backplane:
+            return
 
-    async def connect(self, websocket: WebSocket, user_id: str, connection_id: str):
+        self.backplane.subscribe("broadcast")
+        for user_id in self.user_connections if self.shared_sessions else self.sessions:
+            self.backplane.subscribe(f"user:{user_id}")
+        for topic in self.topic_connections:
+            self.backplane.subscribe(f"topic:{topic}")
+        await self.backplane.start(self._on_backplane_message)
+        logger.info(f"WebSocket backplane started for worker {self.worker_id}")
+
+    async def stop(self):
+        await self.timers.stop()
+        if self.backplane:
+            await self.backplane.stop()
+            self.backplane = None
+
+    def _interest(self, channel: str, subscribed: bool):
+        """Follow a backplane channel only while this worker has sockets for it"""
+        if self.backplane:
+            if subscribed:
+                self.backplane.subscribe(channel)
+            else:
+                self.backplane.unsubscribe(channel)
+
+    async def connect(
+        self,
+        websocket: WebSocket,
+        user_id: str,
+        connection_id: str,
+        encoding: Optional[str] = None,
+        coalesce_ms: Optional[int] = None
+    ) -> Connection:
         await websocket.accept()
-        self.active_connections[connection_id] = websocket
-        
+        coalesce_interval = self.coalesce_interval if coalesce_ms is None else min(max(coalesce_ms, 0), 1000) / 1000
+        connection = Connection(
+            websocket,
+            user_id,
+            connection_id,
+            self.max_queue,
+            encoding=negotiate_encoding(encoding),
+            coalesce_interval=coalesce_interval,
+            coalesce_max=self.coalesce_max if coalesce_interval else 1
+        )
+
+        self.active_connections[connection_id] = connection
+        self.connection_users[connection_id] = user_id
+        # Jitter the first check so reconnect storms don't share one bucket
+        self.timers.schedule(connection_id, self.heartbeat_interval * random.uniform(0.5, 1.0))
+
         if user_id not in self.user_connections:
             self.user_connections[user_id] = set()
+            if self.shared_sessions:
+                self._interest(f"user:{user_id}", True)
         self.user_connections[user_id].add(connection_id)
-        
+
+        if self.shared_sessions:
+            await self.shared_sessions.open(user_id)
+            logger.info(f"User {user_id} connected with connection {connection_id}")
+            return connection
+
+        self._expire_sessions()
+        self._idle_sessions.pop(user_id, None)
+        if user_id not in self.sessions:
+            self.sessions[user_id] = Session(user_id, self.replay_buffer)
+            self._interest(f"user:{user_id}", True)
+
         logger.info(f"User {user_id} connected with connection {connection_id}")
+        return connection
 
     def disconnect(self, user_id: str, connection_id: str):
-        if connection_id in self.active_connections:
-            del self.active_connections[connection_id]
-        
+        user_id = self.connection_users.pop(connection_id, user_id)
+        connection = self.active_connections.pop(connection_id, None)
+        self.timers.cancel(connection_id)
+        if connection:
+            if connection.writer and connection.writer is not asyncio.current_task():
+                connection.writer.cancel()
+            for topic in connection.topics:
+                self._remove_subscriber(topic, connection_id)
+
         if user_id in self.user_connections:
             self.user_connections[user_id].discard(connection_id)
             if not self.user_connections[user_id]:
                 del self.user_connections[user_id]
-        
+                if self.shared_sessions:
+                    # The session's TTL now runs from the last socket closing
+                    self._interest(f"user:{user_id}", False)
+                    self._touch_session(user_id)
+                elif user_id in self.sessions:
+                    self._idle_sessions[user_id] = time.monotonic() + self.session_ttl
+                self._expire_sessions()
+
         logger.info(f"User {user_id} disconnected connection {connection_id}")
 
+    def _on_timer(self, connection_id: str):
+        """Heartbeat check: ping quiet sockets and reap ones gone silent"""
+        connection = self.active_connections.get(connection_id)
+        if not connection:
+            return
+
+        idle = time.monotonic() - connection.last_seen
+        if idle >= self.idle_timeout:
+            logger.info(f"Reaping idle connection {connection_id}")
+            self.reaped += 1
+            # 1001: going away
+            self._drop(connection, 1001)
+            return
+
+        self._retire_writer(connection)
+        if self.shared_sessions:
+            self._touch_session(connection.user_id)
+        if idle >= self.heartbeat_interval:
+            self._enqueue(connection_id, Frame.from_message({
+                "type": "ping",
+                "timestamp": int(time.time() * 1000)
+            }), HEARTBEAT)
+        self.timers.schedule(connection_id, min(self.heartbeat_interval, self.idle_timeout - idle))
+
+    def metrics(self) -> Dict[str, Any]:
+        """Connection counts and memory for monitoring"""
+        connections = self.active_connections.values()
+        rss = process_rss()
+        return {
+            "worker_id": self.worker_id,
+            "connections": len(self.active_connections),
+            "users": len(self.user_connections),
+            "topics": len(self.topic_connections),
+            "sessions": len(self.sessions),
+            "idle_sessions": len(self._idle_sessions),
+            "active_writers": sum(1 for c in connections if c.writer is not None),
+            "queued_frames": sum(len(c.queue) for c in connections if c.queue),
+            "dropped_frames": sum(c.dropped for c in connections),
+            "reaped_connections": self.reaped,
+            "timers": len(self.timers),
+            "rss_bytes": rss,
+            "rss_bytes_per_connection": rss // len(self.active_connections) if self.active_connections else None
+        }
+
+    def _expire_sessions(self):
+        now = time.monotonic()
+        while self._idle_sessions:
+            user_id, expires_at = next(iter(self._idle_sessions.items()))
+            if expires_at > now:
+                break
+            del self._idle_sessions[user_id]
+            del self.sessions[user_id]
+            self._interest(f"user:{user_id}", False)
+
+    def _touch_session(self, user_id: str):
+        """Extend a shared session's TTL in the background"""
+        async def touch():
+            try:
+                await self.shared_sessions.touch(user_id)
+            except Exception as e:
+                logger.error(f"Failed to refresh session for {user_id}: {e}")
+
+        task = asyncio.create_task(touch())
+        self._touching.add(task)
+        task.add_done_callback(self._touching.discard)
+
+    async def session_info(self, user_id: str) -> Dict[str, object]:
+        if self.shared_sessions:
+            return await self.shared_sessions.info(user_id)
+        session = self.sessions[user_id]
+        return {"session": session.epoch, "seq": session.seq}
+
+    async def resume(self, connection_id: str, epoch: Optional[str], resume_from: int):
+        """Replay the personal messages a reconnecting client missed
+
+        Falls back to a `resync_required` message when the session was
+        recreated or the gap is no longer in the ring buffer.
+        """
+        connection = self.active_connections.get(connection_id)
+        if not connection:
+            return
+
+        if self.shared_sessions:
+            frames = await self.shared_sessions.replay(connection.user_id, epoch, resume_from)
+        else:
+            session = self.sessions[connection.user_id]
+            frames = session.replay(resume_from) if epoch == session.epoch else None
+
+        info = await self.session_info(connection.user_id)
+        if frames is None:
+            await self.send_to_connection({
+                "type": "resync_required",
+                "reason": "session_expired" if epoch != info["session"] else "gap_too_large",
+                **info
+            }, connection_id)
+            return
+
+        await self.send_to_connection({
+            "type": "resumed",
+            "replayed": len(frames),
+            **info
+        }, connection_id)
+        for frame in frames:
+            self._enqueue(connection_id, frame, None)
+
+    def subscribe(self, connection_id: str, topics: Iterable[str]) -> List[str]:
+        """Subscribe a connection to topics; returns the topics now subscribed"""
+        connection = self.active_connections.get(connection_id)
+        if not connection:
+            return []
+
+        for topic in topics:
+            if len(connection.topics) >= self.max_topics:
+                break
+            if not valid_topic(topic) or topic in connection.topics:
+                continue
+            if connection.topics is NO_TOPICS:
+                connection.topics = set()
+            connection.topics.add(topic)
+            if topic not in self.topic_connections:
+                self.topic_connections[topic] = set()
+                self._interest(f"topic:{topic}", True)
+            self.topic_connections[topic].add(connection_id)
+        return sorted(connection.topics)
+
+    def unsubscribe(self, connection_id: str, topics: Iterable[str]) -> List[str]:
+        """Unsubscribe a connection from topics; returns the remaining topics"""
+        connection = self.active_connections.get(connection_id)
+        if not connection:
+            return []
+
+        for topic in topics:
+            if topic in connection.topics:
+                connection.topics.discard(topic)
+                self._remove_subscriber(topic, connection_id)
+        return sorted(connection.topics)
+
+    def _remove_subscriber(self, topic: str, connection_id: str):
+        subscribers = self.topic_connections.get(topic)
+        if subscribers is not None:
+            subscribers.discard(connection_id)
+            if not subscribers:
+                del self.topic_connections[topic]
+                self._interest(f"topic:{topic}", False)
+
+    async def _write(self, connection: Connection):
+        """Drain one connection's queue onto its socket"""
+        websocket = connection.websocket
+        send = websocket.send_text if connection.encoding == "json" else websocket.send_bytes
+        queue = connection.queue
+        ready = connection.ready
+        try:
+            while True:
+                await ready.wait()
+                if connection.coalesce_interval and len(queue) < connection.coalesce_max:
+                    # Give the batch a chance to fill before flushing
+                    connection.full.clear()
+                    try:
+                        await asyncio.wait_for(connection.full.wait(), connection.coalesce_interval)
+                    except asyncio.TimeoutError:
+                        pass
+
+                while queue:
+                    count = min(len(queue), connection.coalesce_max)
+                    frames = [queue.popleft()[1] for _ in range(count)]
+                    if count == 1:
+                        await send(frames[0].encode(connection.encoding))
+                    else:
+                        await send(encode_batch(frames, connection.encoding))
+                ready.clear()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if not isinstance(e, WebSocketDisconnect):
+                logger.error(f"Error sending message to {connection.connection_id}: {e}")
+            self.disconnect(connection.user_id, connection.connection_id)
+
+    def _enqueue(self, connection_id: str, frame: Frame, key: Optional[Hashable]):
+        connection = self.active_connections.get(connection_id)
+        if not connection:
+            return
+
+        if not connection.enqueue(frame, key, self.slow_consumer_policy):
+            logger.warning(f"Disconnecting slow consumer {connection_id}")
+            # 1013: try again later
+            self._drop(connection, 1013)
+        elif connection.writer is None:
+            connection.ready = asyncio.Event()
+            connection.ready.set()
+            connection.writer = asyncio.create_task(self._write(connection))
+
+    def _retire_writer(self, connection: Connection):
+        """Release the writer task and queue of a connection idle for a whole interval"""
+        # A cleared event means the writer is parked waiting for frames
+        if (connection.writer is not None and not connection.ready.is_set()
+                and time.monotonic() - connection.last_active >= self.heartbeat_interval):
+            connection.writer.cancel()
+            connection.writer = None
+            connection.ready = None
+            connection.queue = None
+
+    def _drop(self, connection: Connection, code: int):
+        """Forget a connection and close its socket in the background"""
+        self.disconnect(connection.user_id, connection.connection_id)
+        task = asyncio.create_task(self._close(connection.websocket, code))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def _close(self, websocket: WebSocket, code: int):
+        try:
+            await websocket.close(code=code)
+        except Exception:
+            pass
+
+    async def send_to_connection(self, message: dict, connection_id: str):
+        """Send message to a single connection"""
+        self._enqueue(connection_id, Frame.from_message(message), coalesce_key(message))
+
+    async def send_frame(self, frame: Frame, connection_id: str):
+        """Send an already-encoded frame to a single connection"""
+        self._enqueue(connection_id, frame, None)
+
+    def _deliver(self, connection_ids: Iterable[str], frame: Frame, key: Optional[Hashable]):
+        for connection_id in list(connection_ids):
+            self._enqueue(connection_id, frame, key)
+
+    async def _relay(self, channel: str, frame: Frame, key: Optional[Hashable], **header):
+        """Hand an encoded frame to the backplane for the other workers"""
+        if not self.backplane:
+            return
+        header = {"origin": self.worker_id, "key": key, **header}
+        try:
+            await self.backplane.publish(channel, json.dumps(header) + "\n" + frame.text)
+        except Exception as e:
+            logger.error(f"Failed to relay message on {channel}: {e}")
+
+    def _on_backplane_message(self, channel: str, payload: str):
+        header, text = payload.split("\n", 1)
+        header = json.loads(header)
+        frame = Frame(text)
+        if header["origin"] == self.worker_id:
+            return
+        key = tuple(header["key"]) if header.get("key") else None
+
+        if channel == "broadcast":
+            self._deliver(self.active_connections, frame, key)
+        elif channel.startswith("user:"):
+            user_id = channel[len("user:"):]
+            if self.shared_sessions:
+                # Already sequenced by the sending worker
+                self._deliver(self.user_connections.get(user_id, ()), frame, key)
+            else:
+                self._deliver_personal(user_id, frame, key)
+        elif channel.startswith("topic:"):
+            # Each topic of a multi-topic publish arrives separately; a socket
+            # takes the message from the first listed topic it follows
+            topic = channel[len("topic:"):]
+            topics = header.get("topics") or [topic]
+            connection_ids = set(self.topic_connections.get(topic, ()))
+            for earlier in topics[:topics.index(topic)]:
+                connection_ids -= self.topic_connections.get(earlier, set())
+            self._deliver(connection_ids, frame, key)
+
     async def send_personal_message(self, message: dict, user_id: str):
         """Send message to all connections of a specific user"""
-        if user_id in self.user_connections:
-            disconnected_connections = []
-            
-            for connection_id in self.user_connections[user_id]:
-                if connection_id in self.active_connections:
-                    try:
-                        await self.active_connections[connection_id].send_text(
-                            json.dumps(message)
-                        )
-                    except Exception as e:
-                        logger.error(f"Error sending message to {connection_id}: {e}")
-                        disconnected_connections.append(connection_id)
-            
-            # Clean up disconnected connections
-            for connection_id in disconnected_connections:
-                self.disconnect(user_id, connection_id)
+        frame = Frame.from_message(message)
+        key = coalesce_key(message)
+        if self.shared_sessions:
+            # Sequenced once, here, so every worker delivers the same numbers
+            try:
+                frame = await self.shared_sessions.append(user_id, frame)
+            except Exception as e:
+                logger.error(f"Failed to sequence message for {user_id}: {e}")
+            if frame is None:
+                return
+            self._deliver(self.user_connections.get(user_id, ()), frame, key)
+        else:
+            self._deliver_personal(user_id, frame, key)
+        await self._relay(f"user:{user_id}", frame, key)
+
+    def _deliver_personal(self, user_id: str, frame: Frame, key: Optional[Hashable]):
+        # Sequenced and buffered even while the user is between connections
+        session = self.sessions.get(user_id)
+        if session:
+            frame = session.append(frame)
+            self._deliver(self.user_connections.get(user_id, ()), frame, key)
 
     async def broadcast(self, message: dict):
         """Send message to all connected users"""
-        disconnected_connections = []
-        
-        for connection_id, websocket in self.active_connections.items():
-            try:
-                await websocket.send_text(json.dumps(message))
-            except Exception as e:
-                logger.error(f"Error broadcasting to {connection_id}: {e}")
-                disconnected_connections.append(connection_id)
-        
-        # Clean up disconnected connections
-        for connection_id in disconnected_connections:
-            # Find user_id for this connection
-            user_id = None
-            for uid, connections in self.user_connections.items():
-                if connection_id in connections:
-                    user_id = uid
-                    break
-            
-            if user_id:
-                self.disconnect(user_id, connection_id)
-
-manager = ConnectionManager()
\ No newline at end of file
+        frame = Frame.from_message(message)
+        key = coalesce_key(message)
+        self._deliver(self.active_connections, frame, key)
+        await self._relay("broadcast", frame, key)
+
+    async def publish(self, message: dict, *topics: str):
+        """Send message to every connection subscribed to any of the topics
+
+        A connection subscribed to several of the topics receives it once.
+        """
+        frame = Frame.from_message(message)
+        key = coalesce_key(message)
+
+        if len(topics) == 1:
+            connection_ids = self.topic_connections.get(topics[0], ())
+        else:
+            connection_ids = set()
+            for topic in topics:
+                connection_ids |= self.topic_connections.get(topic, set())
+        self._deliver(connection_ids, frame, key)
+
+        for topic in topics:
+            await self._relay(f"topic:{topic}", frame, key, topics=list(topics))
+
+manager = ConnectionManager()
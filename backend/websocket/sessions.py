@@ -0,0 +1,120 @@
+import os
+import uuid
+from typing import Dict, List, Optional, Tuple
+from websocket.encoding import Frame
+import logging
+
+logger = logging.getLogger(__name__)
+
+class RedisSessionStore:
+    """Replay sessions kept in Redis, shared by every worker
+
+    Each user's session is a hash of its epoch and last sequence number,
+    plus a sorted set of its last `buffer_size` frames scored by sequence
+    number. Both keys expire `ttl` seconds after the last touch, so the
+    workers holding the user's sockets touch them on every heartbeat.
+    Any client with the redis.asyncio interface can be passed in, e.g.
+    fakeredis for local testing.
+    """
+
+    def __init__(self, buffer_size: int, ttl: float, url: Optional[str] = None,
+                 prefix: Optional[str] = None, client=None):
+        self.buffer_size = buffer_size
+        self.ttl = int(ttl)
+        self.url = url or os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        self.prefix = prefix if prefix is not None else os.getenv("WS_BACKPLANE_PREFIX", "ws:")
+        self.client = client
+
+    def _keys(self, user_id: str) -> Tuple[str, str]:
+        session = f"{self.prefix}session:{user_id}"
+        return session, session + ":frames"
+
+    async def start(self):
+        if self.client is None:
+            import redis.asyncio as redis
+            self.client = redis.from_url(self.url, decode_responses=True)
+
+    async def open(self, user_id: str) -> Dict[str, object]:
+        """Session info for a connecting user, creating the session if needed"""
+        session, frames = self._keys(user_id)
+        async with self.client.pipeline() as pipe:
+            pipe.hsetnx(session, "epoch", uuid.uuid4().hex[:12])
+            pipe.hsetnx(session, "seq", 0)
+            pipe.expire(session, self.ttl)
+            pipe.expire(frames, self.ttl)
+            pipe.hmget(session, "epoch", "seq")
+            epoch, seq = (await pipe.execute())[-1]
+        return {"session": epoch, "seq": int(seq)}
+
+    async def touch(self, user_id: str):
+        """Keep a session alive for another `ttl` seconds"""
+        async with self.client.pipeline(transaction=False) as pipe:
+            for key in self._keys(user_id):
+                pipe.expire(key, self.ttl)
+            await pipe.execute()
+
+    async def info(self, user_id: str) -> Dict[str, object]:
+        epoch, seq = await self.client.hmget(self._keys(user_id)[0], "epoch", "seq")
+        return {"session": epoch, "seq": int(seq or 0)}
+
+    async def append(self, user_id: str, frame: Frame) -> Optional[Frame]:
+        """Sequence and buffer a frame, or None if the user has no session"""
+        from redis.exceptions import WatchError
+
+        session, frames = self._keys(user_id)
+        async with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    # The number is only taken if the session still exists
+                    await pipe.watch(session)
+                    if not await pipe.exists(session):
+                        return None
+                    pipe.multi()
+                    pipe.hincrby(session, "seq", 1)
+                    pipe.pttl(session)
+                    seq, ttl = await pipe.execute()
+                    break
+                except WatchError:
+                    continue
+
+        frame = frame.with_seq(seq)
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.zadd(frames, {frame.text: seq})
+            pipe.zremrangebyrank(frames, 0, -self.buffer_size - 1)
+            if ttl > 0:
+                pipe.pexpire(frames, ttl)
+            await pipe.execute()
+        return frame
+
+    async def replay(self, user_id: str, epoch: Optional[str], after: int) -> Optional[List[Frame]]:
+        """Frames after `after`, or None if the epoch is stale or some were evicted"""
+        session, frames = self._keys(user_id)
+        async with self.client.pipeline() as pipe:
+            pipe.hmget(session, "epoch", "seq")
+            pipe.zrange(frames, 0, 0, withscores=True)
+            pipe.zrangebyscore(frames, f"({after}", "+inf")
+            (current, seq), oldest, missed = await pipe.execute()
+
+        seq = int(seq or 0)
+        if current is None or epoch != current or after > seq or after < 0:
+            return None
+        if after == seq:
+            return []
+        if not oldest or oldest[0][1] > after + 1:
+            return None
+        return [Frame(text) for text in missed]
+
+def create_session_store(buffer_size: int, ttl: float, kind: Optional[str] = None) -> Optional[RedisSessionStore]:
+    """Session store selected by WS_SESSION_STORE: "memory" or "redis"
+
+    None means the in-process sessions. Unset, it follows WS_BACKPLANE, so
+    the Redis backplane also shares sessions through Redis.
+    """
+    kind = (kind if kind is not None else os.getenv("WS_SESSION_STORE", "")).lower()
+    if not kind:
+        kind = "redis" if os.getenv("WS_BACKPLANE", "").lower() == "redis" else "memory"
+    if kind == "memory":
+        return None
+    if kind == "redis":
+        return RedisSessionStore(buffer_size, ttl)
+    raise ValueError(f"Unknown WS_SESSION_STORE: {kind}")
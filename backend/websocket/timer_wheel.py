@@ -0,0 +1,84 @@
+import asyncio
+import math
+import time
+from typing import Callable, Dict, Hashable, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+class TimerWheel:
+    """Hashed timer wheel driving many timers from a single task
+
+    Timers live in `slots` buckets, one per `tick` seconds. Scheduling and
+    cancelling are O(1) dict operations, and each tick only visits the
+    bucket under the cursor, so 100k connection timers cost no more than
+    the ones that are actually due (plus one round counter per lap).
+    """
+
+    def __init__(self, on_expire: Callable[[Hashable], None], tick: float = 1.0, slots: int = 512):
+        self.on_expire = on_expire
+        self.tick = tick
+        self.slots = slots
+        self.buckets: List[Dict[Hashable, int]] = [{} for _ in range(slots)]
+        self.positions: Dict[Hashable, int] = {}
+        self.cursor = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def schedule(self, key: Hashable, delay: float):
+        """(Re)schedule the timer for key to fire after delay seconds"""
+        self.cancel(key)
+        ticks = max(1, math.ceil(delay / self.tick))
+        index = (self.cursor + ticks) % self.slots
+        # Number of full laps to skip before the timer is due
+        self.buckets[index][key] = (ticks - 1) // self.slots
+        self.positions[key] = index
+
+    def cancel(self, key: Hashable):
+        index = self.positions.pop(key, None)
+        if index is not None:
+            del self.buckets[index][key]
+
+    def advance(self):
+        """Move the cursor one tick and fire the timers that are due"""
+        self.cursor = (self.cursor + 1) % self.slots
+        bucket = self.buckets[self.cursor]
+        expired = []
+        for key, laps in bucket.items():
+            if laps:
+                bucket[key] = laps - 1
+            else:
+                expired.append(key)
+
+        for key in expired:
+            del bucket[key]
+            del self.positions[key]
+        for key in expired:
+            try:
+                self.on_expire(key)
+            except Exception as e:
+                logger.error(f"Timer callback failed for {key}: {e}")
+
+    def start(self):
+        if not self._task:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        next_tick = time.monotonic() + self.tick
+        while True:
+            await asyncio.sleep(max(0, next_tick - time.monotonic()))
+            # Catch up on ticks missed while the loop was busy
+            while next_tick <= time.monotonic():
+                self.advance()
+                next_tick += self.tick
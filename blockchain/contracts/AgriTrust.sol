@@ -21,6 +21,7 @@ contract TraceChain is ERC721, ERC721URIStorage, Ownable {
     event FairnessAssessed(uint256 indexed tokenId, uint256 fairnessScore, uint256 timestamp);
     event StageUpdated(uint256 indexed tokenId, string stage, uint256 timestamp);
     event ProducerVerified(address indexed producer, uint256 timestamp);
+    event BatchDeactivated(uint256 indexed tokenId, uint256 timestamp);
     
     // Structs
     struct BatchInfo {
@@ -63,6 +64,11 @@ contract TraceChain is ERC721, ERC721URIStorage, Ownable {
     mapping(string => uint256) public batchIdToTokenId;
     mapping(address => bool) public authorizedOracles;
     
+    // Running score totals over each producer's active batches
+    mapping(address => uint256) private _producerQualityTotal;
+    mapping(address => uint256) private _producerFairnessTotal;
+    mapping(address => uint256) private _producerActiveBatches;
+    
     // Modifiers
     modifier onlyAuthorizedOracle() {
         require(authorizedOracles[msg.sender] || msg.sender == owner(), "Not authorized oracle");
@@ -150,6 +156,7 @@ contract TraceChain is ERC721, ERC721URIStorage, Ownable {
         
         batchIdToTokenId[batchId] = tokenId;
         producers[msg.sender].totalBatches++;
+        _producerActiveBatches[msg.sender]++;
         
         // Add initial supply chain event
         supplyChainEvents[tokenId].push(SupplyChainEvent({
@@ -175,6 +182,9 @@ contract TraceChain is ERC721, ERC721URIStorage, Ownable {
         require(qualityScore <= 100, "Quality score must be <= 100");
         
         BatchInfo storage batch = batches[tokenId];
+        if (batch.isActive) {
+            _producerQualityTotal[batch.producer] = _producerQualityTotal[batch.producer] - batch.qualityScore + qualityScore;
+        }
         batch.qualityScore = qualityScore;
         
         // Update producer's average quality
@@ -193,6 +203,9 @@ contract TraceChain is ERC721, ERC721URIStorage, Ownable {
         require(fairnessScore <= 100, "Fairness score must be <= 100");
         
         BatchInfo storage batch = batches[tokenId];
+        if (batch.isActive) {
+            _producerFairnessTotal[batch.producer] = _producerFairnessTotal[batch.producer] - batch.fairnessScore + fairnessScore;
+        }
         batch.fairnessScore = fairnessScore;
         
         // Update producer's average fairness
@@ -231,6 +244,27 @@ contract TraceChain is ERC721, ERC721URIStorage, Ownable {
         emit StageUpdated(tokenId, stage, block.timestamp);
     }
     
+    /**
+     * @dev Deactivate a batch, removing it from its producer's averages
+     */
+    function deactivateBatch(uint256 tokenId) external validTokenId(tokenId) {
+        BatchInfo storage batch = batches[tokenId];
+        require(
+            msg.sender == batch.producer || msg.sender == owner(),
+            "Not authorized to deactivate batch"
+        );
+        require(batch.isActive, "Batch already inactive");
+        
+        batch.isActive = false;
+        _producerQualityTotal[batch.producer] -= batch.qualityScore;
+        _producerFairnessTotal[batch.producer] -= batch.fairnessScore;
+        _producerActiveBatches[batch.producer]--;
+        
+        _updateProducerAverages(batch.producer);
+        
+        emit BatchDeactivated(tokenId, block.timestamp);
+    }
+    
     /**
      * @dev Add authorized oracle
      */
@@ -283,26 +317,15 @@ contract TraceChain is ERC721, ERC721URIStorage, Ownable {
     }
     
     /**
-     * @dev Internal function to update producer averages
+     * @dev Internal function to update producer averages from running totals
      */
     function _updateProducerAverages(address producer) internal {
         ProducerInfo storage producerInfo = producers[producer];
-        uint256 totalQuality = 0;
-        uint256 totalFairness = 0;
-        uint256 count = 0;
-        
-        // Calculate averages across all producer's batches
-        for (uint256 i = 1; i <= _tokenIdCounter.current(); i++) {
-            if (batches[i].producer == producer && batches[i].isActive) {
-                totalQuality += batches[i].qualityScore;
-                totalFairness += batches[i].fairnessScore;
-                count++;
-            }
-        }
+        uint256 count = _producerActiveBatches[producer];
         
         if (count > 0) {
-            producerInfo.averageQuality = totalQuality / count;
-            producerInfo.averageFairness = totalFairness / count;
+            producerInfo.averageQuality = _producerQualityTotal[producer] / count;
+            producerInfo.averageFairness = _producerFairnessTotal[producer] / count;
         }
     }
     
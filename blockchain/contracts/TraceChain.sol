@@ -5,6 +5,7 @@ import "@openzeppelin/contracts/token/ERC721/ERC721.sol";
 import "@openzeppelin/contracts/token/ERC721/extensions/ERC721URIStorage.sol";
 import "@openzeppelin/contracts/access/Ownable.sol";
 import "@openzeppelin/contracts/utils/Counters.sol";
+import "@openzeppelin/contracts/utils/cryptography/MerkleProof.sol";
 
 /**
  * @title TraceChain
@@ -21,6 +22,8 @@ contract TraceChain is ERC721, ERC721URIStorage, Ownable {
     event FairnessAssessed(uint256 indexed tokenId, uint256 fairnessScore, uint256 timestamp);
     event StageUpdated(uint256 indexed tokenId, string stage, uint256 timestamp);
     event ProducerVerified(address indexed producer, uint256 timestamp);
+    event BatchDeactivated(uint256 indexed tokenId, uint256 timestamp);
+    event RootAnchored(bytes32 indexed root, uint256 eventCount, uint256 timestamp);
     
     // Structs
     struct BatchInfo {
@@ -62,6 +65,12 @@ contract TraceChain is ERC721, ERC721URIStorage, Ownable {
     mapping(uint256 => SupplyChainEvent[]) public supplyChainEvents;
     mapping(string => uint256) public batchIdToTokenId;
     mapping(address => bool) public authorizedOracles;
+    mapping(bytes32 => uint256) public anchoredRoots;
+    
+    // Running score totals over each producer's active batches
+    mapping(address => uint256) private _producerQualityTotal;
+    mapping(address => uint256) private _producerFairnessTotal;
+    mapping(address => uint256) private _producerActiveBatches;
     
     // Modifiers
     modifier onlyAuthorizedOracle() {
@@ -124,45 +133,43 @@ contract TraceChain is ERC721, ERC721URIStorage, Ownable {
         string memory tokenURI
     ) external returns (uint256) {
         require(producers[msg.sender].isVerified, "Producer not verified");
-        require(bytes(batchId).length > 0, "Batch ID cannot be empty");
-        require(batchIdToTokenId[batchId] == 0, "Batch ID already exists");
-        require(quantity > 0, "Quantity must be greater than 0");
-        
-        _tokenIdCounter.increment();
-        uint256 tokenId = _tokenIdCounter.current();
-        
-        _safeMint(msg.sender, tokenId);
-        _setTokenURI(tokenId, tokenURI);
-        
-        batches[tokenId] = BatchInfo({
-            batchId: batchId,
-            producer: msg.sender,
-            productType: productType,
-            quantity: quantity,
-            harvestDate: harvestDate,
-            location: location,
-            qualityScore: 0,
-            fairnessScore: 0,
-            currentStage: "harvested",
-            isActive: true,
-            createdAt: block.timestamp
-        });
-        
-        batchIdToTokenId[batchId] = tokenId;
-        producers[msg.sender].totalBatches++;
-        
-        // Add initial supply chain event
-        supplyChainEvents[tokenId].push(SupplyChainEvent({
-            stage: "harvested",
-            timestamp: block.timestamp,
-            location: location,
-            actor: producers[msg.sender].name,
-            description: string(abi.encodePacked("Batch ", batchId, " harvested")),
-            verified: true
-        }));
+        return _mintBatch(batchId, productType, quantity, harvestDate, location, tokenURI);
+    }
+    
+    /**
+     * @dev Mint several batch NFTs in one transaction. Parameters are parallel
+     * arrays indexed by batch; one BatchMinted event is emitted per batch.
+     */
+    function mintBatches(
+        string[] memory batchIds,
+        string[] memory productTypes,
+        uint256[] memory quantities,
+        uint256[] memory harvestDates,
+        string[] memory locations,
+        string[] memory tokenURIs
+    ) external returns (uint256[] memory tokenIds) {
+        require(producers[msg.sender].isVerified, "Producer not verified");
+        require(batchIds.length > 0, "No batches to mint");
+        require(
+            productTypes.length == batchIds.length &&
+            quantities.length == batchIds.length &&
+            harvestDates.length == batchIds.length &&
+            locations.length == batchIds.length &&
+            tokenURIs.length == batchIds.length,
+            "Array length mismatch"
+        );
         
-        emit BatchMinted(tokenId, msg.sender, batchId);
-        return tokenId;
+        tokenIds = new uint256[](batchIds.length);
+        for (uint256 i = 0; i < batchIds.length; i++) {
+            tokenIds[i] = _mintBatch(
+                batchIds[i],
+                productTypes[i],
+                quantities[i],
+                harvestDates[i],
+                locations[i],
+                tokenURIs[i]
+            );
+        }
     }
     
     /**
@@ -175,6 +182,9 @@ contract TraceChain is ERC721, ERC721URIStorage, Ownable {
         require(qualityScore <= 100, "Quality score must be <= 100");
         
         BatchInfo storage batch = batches[tokenId];
+        if (batch.isActive) {
+            _producerQualityTotal[batch.producer] = _producerQualityTotal[batch.producer] - batch.qualityScore + qualityScore;
+        }
         batch.qualityScore = qualityScore;
         
         // Update producer's average quality
@@ -193,6 +203,9 @@ contract TraceChain is ERC721, ERC721URIStorage, Ownable {
         require(fairnessScore <= 100, "Fairness score must be <= 100");
         
         BatchInfo storage batch = batches[tokenId];
+        if (batch.isActive) {
+            _producerFairnessTotal[batch.producer] = _producerFairnessTotal[batch.producer] - batch.fairnessScore + fairnessScore;
+        }
         batch.fairnessScore = fairnessScore;
         
         // Update producer's average fairness
@@ -231,6 +244,51 @@ contract TraceChain is ERC721, ERC721URIStorage, Ownable {
         emit StageUpdated(tokenId, stage, block.timestamp);
     }
     
+    /**
+     * @dev Deactivate a batch, removing it from its producer's averages
+     */
+    function deactivateBatch(uint256 tokenId) external validTokenId(tokenId) {
+        BatchInfo storage batch = batches[tokenId];
+        require(
+            msg.sender == batch.producer || msg.sender == owner(),
+            "Not authorized to deactivate batch"
+        );
+        require(batch.isActive, "Batch already inactive");
+        
+        batch.isActive = false;
+        _producerQualityTotal[batch.producer] -= batch.qualityScore;
+        _producerFairnessTotal[batch.producer] -= batch.fairnessScore;
+        _producerActiveBatches[batch.producer]--;
+        
+        _updateProducerAverages(batch.producer);
+        
+        emit BatchDeactivated(tokenId, block.timestamp);
+    }
+    
+    /**
+     * @dev Anchor the Merkle root of a set of off-chain supply chain events
+     */
+    function anchorRoot(bytes32 root, uint256 eventCount) external onlyAuthorizedOracle {
+        require(root != bytes32(0), "Root cannot be empty");
+        require(eventCount > 0, "Event count must be greater than 0");
+        require(anchoredRoots[root] == 0, "Root already anchored");
+        
+        anchoredRoots[root] = block.timestamp;
+        
+        emit RootAnchored(root, eventCount, block.timestamp);
+    }
+    
+    /**
+     * @dev Check that a leaf is included under an anchored root
+     */
+    function verifyEventInclusion(
+        bytes32 root,
+        bytes32 leaf,
+        bytes32[] calldata proof
+    ) external view returns (bool) {
+        return anchoredRoots[root] > 0 && MerkleProof.verifyCalldata(proof, root, leaf);
+    }
+    
     /**
      * @dev Add authorized oracle
      */
@@ -283,26 +341,68 @@ contract TraceChain is ERC721, ERC721URIStorage, Ownable {
     }
     
     /**
-     * @dev Internal function to update producer averages
+     * @dev Internal function to mint a batch NFT for the caller
+     */
+    function _mintBatch(
+        string memory batchId,
+        string memory productType,
+        uint256 quantity,
+        uint256 harvestDate,
+        string memory location,
+        string memory tokenURI
+    ) internal returns (uint256) {
+        require(bytes(batchId).length > 0, "Batch ID cannot be empty");
+        require(batchIdToTokenId[batchId] == 0, "Batch ID already exists");
+        require(quantity > 0, "Quantity must be greater than 0");
+        
+        _tokenIdCounter.increment();
+        uint256 tokenId = _tokenIdCounter.current();
+        
+        _safeMint(msg.sender, tokenId);
+        _setTokenURI(tokenId, tokenURI);
+        
+        batches[tokenId] = BatchInfo({
+            batchId: batchId,
+            producer: msg.sender,
+            productType: productType,
+            quantity: quantity,
+            harvestDate: harvestDate,
+            location: location,
+            qualityScore: 0,
+            fairnessScore: 0,
+            currentStage: "harvested",
+            isActive: true,
+            createdAt: block.timestamp
+        });
+        
+        batchIdToTokenId[batchId] = tokenId;
+        producers[msg.sender].totalBatches++;
+        _producerActiveBatches[msg.sender]++;
+        
+        // Add initial supply chain event
+        supplyChainEvents[tokenId].push(SupplyChainEvent({
+            stage: "harvested",
+            timestamp: block.timestamp,
+            location: location,
+            actor: producers[msg.sender].name,
+            description: string(abi.encodePacked("Batch ", batchId, " harvested")),
+            verified: true
+        }));
+        
+        emit BatchMinted(tokenId, msg.sender, batchId);
+        return tokenId;
+    }
+    
+    /**
+     * @dev Internal function to update producer averages from running totals
      */
     function _updateProducerAverages(address producer) internal {
         ProducerInfo storage producerInfo = producers[producer];
-        uint256 totalQuality = 0;
-        uint256 totalFairness = 0;
-        uint256 count = 0;
-        
-        // Calculate averages across all producer's batches
-        for (uint256 i = 1; i <= _tokenIdCounter.current(); i++) {
-            if (batches[i].producer == producer && batches[i].isActive) {
-                totalQuality += batches[i].qualityScore;
-                totalFairness += batches[i].fairnessScore;
-                count++;
-            }
-        }
+        uint256 count = _producerActiveBatches[producer];
         
         if (count > 0) {
-            producerInfo.averageQuality = totalQuality / count;
-            producerInfo.averageFairness = totalFairness / count;
+            producerInfo.averageQuality = _producerQualityTotal[producer] / count;
+            producerInfo.averageFairness = _producerFairnessTotal[producer] / count;
         }
     }
     
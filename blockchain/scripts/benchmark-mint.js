@@ -0,0 +1,99 @@
+const { ethers } = require("hardhat");
+
+// Compares single mintBatch calls against grouped mintBatches calls.
+// Usage: MINT_COUNT=200 GROUP_SIZE=20 npx hardhat run scripts/benchmark-mint.js
+const MINT_COUNT = parseInt(process.env.MINT_COUNT || "200");
+const GROUP_SIZE = parseInt(process.env.GROUP_SIZE || "20");
+
+function batchParams(prefix, index) {
+  return {
+    batchId: `${prefix}-${index}`,
+    productType: "Organic Tomatoes",
+    quantity: 500,
+    harvestDate: Math.floor(Date.now() / 1000),
+    location: "Green Valley Farm, California",
+    tokenURI: `https://api.tracechain.com/metadata/${prefix}-${index}`,
+  };
+}
+
+async function deploy() {
+  const [owner, producer] = await ethers.getSigners();
+
+  const TraceChain = await ethers.getContractFactory("TraceChain");
+  const traceChain = await TraceChain.deploy();
+  await traceChain.waitForDeployment();
+
+  await traceChain.connect(producer).registerProducer("Green Valley Farm", "California, USA");
+  await traceChain.verifyProducer(producer.address);
+
+  return traceChain.connect(producer);
+}
+
+async function benchmarkSingle(traceChain) {
+  let gasUsed = 0n;
+  const start = performance.now();
+
+  for (let i = 0; i < MINT_COUNT; i++) {
+    const p = batchParams("single", i);
+    const tx = await traceChain.mintBatch(
+      p.batchId, p.productType, p.quantity, p.harvestDate, p.location, p.tokenURI
+    );
+    gasUsed += (await tx.wait()).gasUsed;
+  }
+
+  return summarize("mintBatch", MINT_COUNT, MINT_COUNT, gasUsed, performance.now() - start);
+}
+
+async function benchmarkGrouped(traceChain) {
+  let gasUsed = 0n;
+  let transactions = 0;
+  const start = performance.now();
+
+  for (let offset = 0; offset < MINT_COUNT; offset += GROUP_SIZE) {
+    const group = [];
+    for (let i = offset; i < Math.min(offset + GROUP_SIZE, MINT_COUNT); i++) {
+      group.push(batchParams("grouped", i));
+    }
+
+    const tx = await traceChain.mintBatches(
+      group.map((p) => p.batchId),
+      group.map((p) => p.productType),
+      group.map((p) => p.quantity),
+      group.map((p) => p.harvestDate),
+      group.map((p) => p.location),
+      group.map((p) => p.tokenURI)
+    );
+    gasUsed += (await tx.wait()).gasUsed;
+    transactions++;
+  }
+
+  return summarize(`mintBatches(${GROUP_SIZE})`, MINT_COUNT, transactions, gasUsed, performance.now() - start);
+}
+
+function summarize(method, mints, transactions, gasUsed, elapsedMs) {
+  return {
+    method,
+    mints,
+    transactions,
+    gasPerBatch: Number(gasUsed / BigInt(mints)),
+    mintsPerSecond: Math.round((mints / elapsedMs) * 1000 * 10) / 10,
+    elapsedMs: Math.round(elapsedMs),
+  };
+}
+
+async function main() {
+  const results = [
+    await benchmarkSingle(await deploy()),
+    await benchmarkGrouped(await deploy()),
+  ];
+
+  console.table(results);
+  console.log(JSON.stringify({ network: network.name, results }, null, 2));
+}
+
+main()
+  .then(() => process.exit(0))
+  .catch((error) => {
+    console.error(error);
+    process.exit(1);
+  });
@@ -116,6 +116,71 @@ describe("TraceChain", function () {
     });
   });
 
+  describe("Batched Minting", function () {
+    const harvestDate = Math.floor(Date.now() / 1000);
+
+    beforeEach(async function () {
+      await traceChain.connect(producer).registerProducer("Green Valley Farm", "California, USA");
+      await traceChain.verifyProducer(producer.address);
+    });
+
+    it("Should mint several batches in one transaction", async function () {
+      const batchIds = ["B001", "B002", "B003"];
+
+      const tx = await traceChain.connect(producer).mintBatches(
+        batchIds,
+        ["Organic Tomatoes", "Carrots", "Lettuce"],
+        [500, 200, 100],
+        [harvestDate, harvestDate, harvestDate],
+        ["Field 1", "Field 2", "Field 3"],
+        ["uri1", "uri2", "uri3"]
+      );
+      const receipt = await tx.wait();
+
+      const minted = receipt.logs
+        .map((log) => traceChain.interface.parseLog(log))
+        .filter((event) => event && event.name === "BatchMinted");
+      expect(minted.length).to.equal(3);
+
+      for (let i = 0; i < batchIds.length; i++) {
+        expect(minted[i].args.batchId).to.equal(batchIds[i]);
+        expect(await traceChain.batchIdToTokenId(batchIds[i])).to.equal(minted[i].args.tokenId);
+      }
+
+      expect(await traceChain.totalSupply()).to.equal(3);
+      const producerInfo = await traceChain.getProducerInfo(producer.address);
+      expect(producerInfo.totalBatches).to.equal(3);
+    });
+
+    it("Should reject mismatched array lengths", async function () {
+      await expect(
+        traceChain.connect(producer).mintBatches(
+          ["B001", "B002"],
+          ["Tomatoes"],
+          [500, 200],
+          [harvestDate, harvestDate],
+          ["Field 1", "Field 2"],
+          ["uri1", "uri2"]
+        )
+      ).to.be.revertedWith("Array length mismatch");
+    });
+
+    it("Should revert the whole group on a duplicate batch ID", async function () {
+      await expect(
+        traceChain.connect(producer).mintBatches(
+          ["B001", "B001"],
+          ["Tomatoes", "Tomatoes"],
+          [500, 200],
+          [harvestDate, harvestDate],
+          ["Field 1", "Field 2"],
+          ["uri1", "uri2"]
+        )
+      ).to.be.revertedWith("Batch ID already exists");
+
+      expect(await traceChain.totalSupply()).to.equal(0);
+    });
+  });
+
   describe("Quality and Fairness Scoring", function () {
     let tokenId;
 
@@ -161,6 +226,120 @@ describe("TraceChain", function () {
     });
   });
 
+  describe("Producer Averages", function () {
+    let tokenIds;
+
+    beforeEach(async function () {
+      await traceChain.connect(producer).registerProducer("Green Valley Farm", "California, USA");
+      await traceChain.verifyProducer(producer.address);
+      await traceChain.addAuthorizedOracle(oracle.address);
+
+      const harvestDate = Math.floor(Date.now() / 1000);
+      await traceChain.connect(producer).mintBatches(
+        ["B001", "B002"],
+        ["Tomatoes", "Carrots"],
+        [500, 200],
+        [harvestDate, harvestDate],
+        ["Field 1", "Field 2"],
+        ["uri1", "uri2"]
+      );
+      tokenIds = [1, 2];
+    });
+
+    it("Should average scores over active batches", async function () {
+      await traceChain.connect(oracle).updateQualityScore(tokenIds[0], 80);
+      await traceChain.connect(oracle).updateQualityScore(tokenIds[1], 90);
+      await traceChain.connect(oracle).updateFairnessScore(tokenIds[0], 70);
+
+      let producerInfo = await traceChain.getProducerInfo(producer.address);
+      expect(producerInfo.averageQuality).to.equal(85);
+      expect(producerInfo.averageFairness).to.equal(35);
+
+      // Re-scoring replaces the previous score in the running total
+      await traceChain.connect(oracle).updateQualityScore(tokenIds[0], 60);
+      producerInfo = await traceChain.getProducerInfo(producer.address);
+      expect(producerInfo.averageQuality).to.equal(75);
+    });
+
+    it("Should drop deactivated batches from the averages", async function () {
+      await traceChain.connect(oracle).updateQualityScore(tokenIds[0], 80);
+      await traceChain.connect(oracle).updateQualityScore(tokenIds[1], 40);
+
+      await expect(
+        traceChain.connect(producer).deactivateBatch(tokenIds[1])
+      ).to.emit(traceChain, "BatchDeactivated");
+
+      const producerInfo = await traceChain.getProducerInfo(producer.address);
+      expect(producerInfo.averageQuality).to.equal(80);
+
+      const batchInfo = await traceChain.getBatchInfo(tokenIds[1]);
+      expect(batchInfo.isActive).to.equal(false);
+    });
+
+    it("Should only allow the producer or owner to deactivate", async function () {
+      await expect(
+        traceChain.connect(addr1).deactivateBatch(tokenIds[0])
+      ).to.be.revertedWith("Not authorized to deactivate batch");
+    });
+
+    it("Should keep score updates at constant gas as supply grows", async function () {
+      this.timeout(0);
+
+      const signers = await ethers.getSigners();
+      const harvestDate = Math.floor(Date.now() / 1000);
+      const chunkSize = 50;
+      const gasUsed = [];
+      let supply = Number(await traceChain.totalSupply());
+
+      // Filler supply comes from a producer that is never measured
+      const filler = signers[7];
+      await traceChain.connect(filler).registerProducer("Filler Farm", "Nevada, USA");
+      await traceChain.verifyProducer(filler.address);
+
+      for (const [index, target] of [10, 1000, 10000].entries()) {
+        // Grow global supply with another producer's batches
+        while (supply < target) {
+          const size = Math.min(chunkSize, target - supply);
+          const ids = Array.from({ length: size }, (_, i) => `S${supply + i}`);
+          await traceChain.connect(filler).mintBatches(
+            ids,
+            ids.map(() => "Tomatoes"),
+            ids.map(() => 1),
+            ids.map(() => harvestDate),
+            ids.map(() => "Field"),
+            ids.map(() => "")
+          );
+          supply += size;
+        }
+
+        // Fresh producer with one scored batch, so every measurement makes
+        // the same storage transitions
+        const measured = signers[4 + index];
+        await traceChain.connect(measured).registerProducer("Measured Farm", "Oregon, USA");
+        await traceChain.verifyProducer(measured.address);
+        await traceChain.connect(measured).mintBatch(`M${index}-1`, "Apples", 1, harvestDate, "Orchard", "");
+        await traceChain.connect(measured).mintBatch(`M${index}-2`, "Apples", 1, harvestDate, "Orchard", "");
+        supply += 2;
+
+        await traceChain.connect(oracle).updateQualityScore(await traceChain.batchIdToTokenId(`M${index}-1`), 80);
+        const tx = await traceChain.connect(oracle).updateQualityScore(
+          await traceChain.batchIdToTokenId(`M${index}-2`),
+          90
+        );
+        gasUsed.push((await tx.wait()).gasUsed);
+
+        // The average covers only the measured producer's own batches
+        const measuredInfo = await traceChain.getProducerInfo(measured.address);
+        expect(measuredInfo.averageQuality).to.equal(85);
+      }
+
+      // Only calldata for the larger token IDs may differ
+      for (const gas of gasUsed.slice(1)) {
+        expect(gas).to.be.closeTo(gasUsed[0], 100);
+      }
+    });
+  });
+
   describe("Supply Chain Updates", function () {
     let tokenId;
 
@@ -209,4 +388,41 @@ describe("TraceChain", function () {
       expect(events[1].stage).to.equal("processed");
     });
   });
-});
\ No newline at end of file
+
+  describe("Event Anchoring", function () {
+    // Sorted-pair hashing, as used by OpenZeppelin's MerkleProof
+    const hashPair = (a, b) => ethers.keccak256(ethers.concat(a < b ? [a, b] : [b, a]));
+    const leaves = ["harvested", "processed", "shipped"].map((stage) =>
+      ethers.keccak256(ethers.toUtf8Bytes(stage))
+    );
+    // Odd nodes are carried up to the next level unchanged
+    const pairHash = hashPair(leaves[0], leaves[1]);
+    const root = hashPair(pairHash, leaves[2]);
+
+    beforeEach(async function () {
+      await traceChain.addAuthorizedOracle(oracle.address);
+    });
+
+    it("Should anchor a root and verify inclusion proofs", async function () {
+      await expect(traceChain.connect(oracle).anchorRoot(root, 3)).to.emit(traceChain, "RootAnchored");
+
+      expect(await traceChain.anchoredRoots(root)).to.be.greaterThan(0);
+      expect(await traceChain.verifyEventInclusion(root, leaves[0], [leaves[1], leaves[2]])).to.equal(true);
+      expect(await traceChain.verifyEventInclusion(root, leaves[2], [pairHash])).to.equal(true);
+      expect(await traceChain.verifyEventInclusion(root, leaves[1], [leaves[2]])).to.equal(false);
+    });
+
+    it("Should not verify against roots that were never anchored", async function () {
+      expect(await traceChain.verifyEventInclusion(root, leaves[2], [pairHash])).to.equal(false);
+    });
+
+    it("Should reject duplicate roots and unauthorized callers", async function () {
+      await traceChain.connect(oracle).anchorRoot(root, 3);
+
+      await expect(traceChain.connect(oracle).anchorRoot(root, 3)).to.be.revertedWith("Root already anchored");
+      await expect(
+        traceChain.connect(addr1).anchorRoot(hashPair(root, leaves[0]), 1)
+      ).to.be.revertedWith("Not authorized oracle");
+    });
+  });
+});
@@ -75,11 +75,16 @@ export const apiService = {
       api.get<PriceData>(`/pricing/${productType}/forecast?days=${days}`),
     getHistory: (productType: string, period: string) => 
       api.get<PriceData>(`/pricing/${productType}/history?period=${period}`),
+    createAlert: (data: { user_id: string; product_type: string; direction: 'above' | 'below'; threshold: number }) =>
+      api.post('/pricing/alerts', data),
+    getAlerts: (userId: string) => api.get(`/pricing/alerts/${userId}`),
+    deleteAlert: (alertId: string) => api.delete(`/pricing/alerts/${alertId}`),
   },
 
   // Blockchain endpoints
   blockchain: {
     mintNFT: (batchData: any) => api.post('/blockchain/mint', batchData),
+    getMintStatus: (intentId: string) => api.get(`/blockchain/outbox/${intentId}`),
     getTokenInfo: (tokenId: number) => api.get(`/blockchain/token/${tokenId}`),
     verifyTransaction: (txHash: string) => api.get(`/blockchain/verify/${txHash}`),
   },
@@ -90,6 +95,15 @@ export const apiService = {
     getProducerStats: (producerId: string) => api.get(`/analytics/producer/${producerId}`),
     getMarketTrends: () => api.get('/analytics/market-trends'),
   },
+
+  // Notification endpoints
+  notifications: {
+    getInbox: (userId: string, params?: { before?: string; limit?: number; unread_only?: boolean }) =>
+      api.get(`/notifications/${userId}`, { params }),
+    getUnreadCount: (userId: string) => api.get(`/notifications/${userId}/unread-count`),
+    markRead: (userId: string, ids: string[]) => api.post(`/notifications/${userId}/read`, { ids }),
+    markAllRead: (userId: string) => api.post(`/notifications/${userId}/read-all`),
+  },
 };
 
 export default apiService;
\ No newline at end of file